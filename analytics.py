@@ -0,0 +1,110 @@
+"""Corridor state shared by the per-tick analytics panels.
+
+The traffic advice, ETA, delay, alternative route and bus performance
+panels all read the same rolling statistics of the ``cars`` count (see
+``rolling.RollingAnalytics``).  They are turned into a ``CorridorState``
+here once per tick and the dashboard renders every panel from that
+single object.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from random import randint
+
+from scoring import DELAY, ETA_PENALTY, LEVEL, SPEED, bus_delay
+
+# forecast vs smoothed level beyond which the trend counts as moving
+TREND_BAND = 0.10
+
+
+@dataclass(frozen=True)
+class CorridorState:
+    corridor: str
+    samples: int
+    current: int
+    recent_avg: float
+    ewma: float
+    std: float
+    p50: float
+    p90: float
+    window: int
+    level: str
+    trend: str
+    predicted_5m: int
+    period: str
+    delay: int
+    speed: int
+    bus_delay: int
+    eta: int
+    # tracked vehicles/min each way across the camera's counting line; NaN if untracked
+    flow_in: float
+    flow_out: float
+
+
+def traffic_level(cars):
+    return LEVEL(cars)
+
+
+def trend_label(forecast, level):
+    if forecast > level * (1 + TREND_BAND):
+        return "increasing"
+    elif forecast < level * (1 - TREND_BAND):
+        return "decreasing"
+    return "stable"
+
+
+def time_band(hour):
+    if 7 <= hour < 10:
+        return "AM peak (07:00–10:00)"
+    elif 16 <= hour < 19:
+        return "PM peak (16:00–19:00)"
+    return "Off-peak period"
+
+
+def predicted_delay(cars):
+    return DELAY(cars)
+
+
+def bus_speed(cars):
+    return SPEED(cars)
+
+
+def eta_minutes(cars, base_eta):
+    if cars is None:
+        return base_eta
+    return base_eta + ETA_PENALTY(cars)
+
+
+def compute_corridor_state(stats, corridor, now=None):
+    """Build the corridor state from a camera's ``rolling.RollingState``.
+
+    Returns None when there are no samples yet.
+    """
+    if stats is None or not stats.samples:
+        return None
+
+    current = stats.current
+    speed = bus_speed(current)
+    now = now or datetime.now()
+
+    return CorridorState(
+        corridor=corridor,
+        samples=stats.samples,
+        current=current,
+        recent_avg=stats.mean,
+        ewma=stats.ewma,
+        std=stats.std,
+        p50=stats.p50,
+        p90=stats.p90,
+        window=stats.window,
+        level=traffic_level(current),
+        trend=trend_label(stats.forecast, stats.level),
+        predicted_5m=int(round(stats.forecast)),
+        period=time_band(now.hour),
+        delay=predicted_delay(current),
+        speed=speed,
+        bus_delay=int(bus_delay(speed)),
+        eta=eta_minutes(current, randint(4, 10)),
+        flow_in=stats.flow_in,
+        flow_out=stats.flow_out,
+    )
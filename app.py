@@ -1,18 +1,35 @@
 import os
+import threading
 import time
 import math
 import json
-from datetime import datetime, timezone
 from random import randint
 
+import numpy as np
 import pandas as pd
-import requests
-import feedparser
 import plotly.express as px
+import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
-from dash import Dash, dcc, html
+from dash import Dash, ctx, dcc, html, no_update
 from dash.dependencies import Input, Output, State
 
+from analytics import compute_corridor_state, eta_minutes
+from cache import RefreshingCache
+from corridors import CorridorTiles
+from detection import get_engine, loaded_engine
+from events import EVENTS
+from feeds import FeedCache
+from instrumentation import FPS_BUCKETS, INSTRUMENTATION
+from jobs import DetectionScheduler, DONE, FAILED
+from sampler import CorridorSampler
+from timeseries import TimeSeriesStore
+from tracking import DEFAULT_ROI
+from metrics_store import COUNT_COLUMNS, MetricsStore
+from outbound import OUTBOUND
+from result_cache import RESULT_CACHE
+from rolling import RollingAnalytics
+from scoring import CONGESTION, LEVEL, score_counts
+
 # =========================================================
 # ROUTE MAP
 # =========================================================
@@ -130,6 +147,21 @@ CAMERA_STREAM_GROUPS = {
     },
 }
 
+# =========================================================
+# CAMERA_ROIS: tracked counting area + line per camera (tracking.py)
+# =========================================================
+# Keyed by camera name as in CAMERA_STREAM_GROUPS; coordinates are normalized
+# (0..1, y down).  Cameras not listed count over the whole frame across a
+# horizontal midline.  Example, lanes in the lower half only (CameraROI is in
+# tracking.py):
+#   "I-678 at 133rd Avenue Northbound": CameraROI(
+#       polygon=((0.1, 0.45), (0.9, 0.45), (1.0, 1.0), (0.0, 1.0)),
+#       line=((0.0, 0.7), (1.0, 0.7)),
+#       directions=("northbound", "southbound"),
+#   ),
+
+CAMERA_ROIS = {}
+
 # =========================================================
 # Flatten for single dropdown（Live Camera Feed had things in it）
 # =========================================================
@@ -140,29 +172,159 @@ CAMERA_STREAMS = {
     for cam, url in cams.items()
 }
 
+#URL to corridor/group
+CAMERA_URL_TO_GROUP = {}
+for group_name, cams in CAMERA_STREAM_GROUPS.items():
+    for cam_label, cam_url in cams.items():
+        CAMERA_URL_TO_GROUP[cam_url] = group_name
+
+#URL to ROI
+CAMERA_URL_TO_ROI = {
+    cam_url: CAMERA_ROIS[cam_label]
+    for cams in CAMERA_STREAM_GROUPS.values()
+    for cam_label, cam_url in cams.items()
+    if cam_label in CAMERA_ROIS
+}
+
+# per-camera history on disk + shared in-memory snapshots of it
+TIMESERIES = TimeSeriesStore(groups=CAMERA_URL_TO_GROUP)
+METRICS_STORE = MetricsStore(TIMESERIES)
+INSTRUMENTATION.collect("timeseries_late_rows_total", "counter",
+                        "Rows dropped for landing behind a camera's newest committed row",
+                        lambda: TIMESERIES.late_rows)
+# running per-camera stats for the corridor panels, fed by every append
+ROLLING = RollingAnalytics(TIMESERIES)
+# corridor × time tiles for the overview heatmap, also fed by every append
+# (primed from history in main())
+CORRIDOR_TILES = CorridorTiles(CAMERA_URL_TO_GROUP, TIMESERIES)
+
+# graph downsampling: "minmax" keeps every spike, "lttb" follows the shape more smoothly
+METRICS_DOWNSAMPLE = os.environ.get("METRICS_DOWNSAMPLE", "minmax")
+
 # =========================================================
-# AI Detection：with fake metrics.csv，to make sure everything work
+# AI Detection：YOLO on the camera stream → per-camera time series
 # =========================================================
 
-def run_detection_for_dashboard(camera_url, max_seconds=5, max_frames=30):
-    records = []
-    now = datetime.now(timezone.utc)
+def run_detection_for_dashboard(camera_url, max_seconds=5, max_frames=30, progress=None):
+    # saved inside detect(), so frames it claimed are released if the append fails
+    return get_engine().detect(
+        camera_url, max_seconds=max_seconds, max_frames=max_frames, progress=progress,
+        roi=CAMERA_URL_TO_ROI.get(camera_url), save=lambda records: save_records(camera_url, records),
+    )
 
-    for i in range(max_frames):
-        ts = (now + pd.Timedelta(seconds=i)).isoformat()
-        cars = randint(5, 30)
-        buses = randint(0, 3)
-        trucks = randint(0, 5)
-        records.append({"ts": ts, "cars": cars, "buses": buses, "trucks": trucks})
 
-    df = pd.DataFrame(records)
-    df.to_csv("metrics.csv", index=False)
-    return len(records)
+def save_records(camera_url, records):
+    if not len(records):
+        return 0
+    written = TIMESERIES.append(camera_url, records)
+    # tell clients watching this camera to re-render
+    EVENTS.publish("metrics", camera_url)
+    return written
+
+
+# detection throughput, served on /metrics
+JOB_FPS = INSTRUMENTATION.histogram("detection_job_fps", "Frames per second of finished detection jobs",
+                                    FPS_BUCKETS)
+JOBS_FINISHED = INSTRUMENTATION.counter("detection_jobs_total", "Finished detection jobs", label="status")
+JOB_FRAMES = INSTRUMENTATION.counter("detection_frames_total", "Frames processed by detection jobs")
+
+
+def record_job(job):
+    JOBS_FINISHED.inc(value=job.status)
+    JOB_FRAMES.inc(job.frames)
+    if job.frames:
+        JOB_FPS.observe(job.fps)
+
+
+DETECTION_JOBS = DetectionScheduler(run_detection_for_dashboard, on_finish=record_job)
+
+# load the model (exporting it for onnx / openvino) when the server starts, not on the first
+# "Run AI Detection"; see main()
+DETECT_WARMUP = os.environ.get("DETECT_WARMUP", "1") == "1"
+INSTRUMENTATION.collect("detect_warmup_seconds", "gauge", "Startup model load and warm-up time",
+                        lambda: getattr(loaded_engine(), "warmup_seconds", None) or 0)
+
+# per-frame results reused between overlapping runs on the same HLS segments
+INSTRUMENTATION.collect("detect_cache_hits_total", "counter", "Frames answered from the detection result cache",
+                        lambda: RESULT_CACHE.hits)
+INSTRUMENTATION.collect("detect_cache_misses_total", "counter", "Frames that had to be inferred",
+                        lambda: RESULT_CACHE.misses)
+INSTRUMENTATION.collect("detect_cache_evictions_total", "counter", "Entries evicted by the memory cap",
+                        lambda: RESULT_CACHE.evictions)
+INSTRUMENTATION.collect("detect_cache_bytes", "gauge", "Approximate detection result cache size",
+                        lambda: RESULT_CACHE.bytes)
+INSTRUMENTATION.collect("detect_cache_hit_ratio", "gauge", "Detection cache hits over lookups since start",
+                        lambda: RESULT_CACHE.hits / max(1, RESULT_CACHE.hits + RESULT_CACHE.misses))
+
+# static frames that reused the previous counts instead of running the model
+# (a scrape reads the engine only if it exists; it never loads the model)
+INSTRUMENTATION.collect("detect_motion_checked_total", "counter", "Frames checked by the motion gate",
+                        lambda: getattr(loaded_engine(), "gated_frames", 0))
+INSTRUMENTATION.collect("detect_motion_skipped_total", "counter", "Static frames that skipped inference",
+                        lambda: getattr(loaded_engine(), "skipped_frames", 0))
+
+# corridor-wide sampling of every camera (opt-in: CORRIDOR_SAMPLER=1)
+CORRIDOR_SAMPLER = CorridorSampler(CAMERA_STREAMS, on_records=save_records, rois=CAMERA_URL_TO_ROI)
+INSTRUMENTATION.collect("sampler_frames_total", "counter", "Frames processed by the corridor sampler",
+                        lambda: sum(s.frames for s in CORRIDOR_SAMPLER.stats.values()))
+INSTRUMENTATION.collect("sampler_fps", "gauge", "Corridor sampler frames per second since start",
+                        lambda: CORRIDOR_SAMPLER.report()["fps"])
+INSTRUMENTATION.collect("sampler_failures_total", "counter", "Corridor sampler visits that saved no records",
+                        lambda: sum(s.failures for s in CORRIDOR_SAMPLER.stats.values()))
+INSTRUMENTATION.collect("sampler_pool_restarts_total", "counter", "Times the sampler rebuilt a broken worker pool",
+                        lambda: CORRIDOR_SAMPLER.pool_restarts)
+
+
+def sampler_rates(field):
+    def by_camera():
+        rates = CORRIDOR_SAMPLER.rates()
+        return {label: rates[url][field] for label, url in CORRIDOR_SAMPLER.cameras.items()}
+    return by_camera
+
+
+# the visit rates the sampler chose from CPU headroom and each camera's volatility
+INSTRUMENTATION.collect("sampler_camera_period_seconds", "gauge", "Seconds between corridor sampler visits",
+                        sampler_rates("period_s"), label="camera")
+INSTRUMENTATION.collect("sampler_camera_volatility", "gauge", "Coefficient of variation of sampled counts",
+                        sampler_rates("volatility"), label="camera")
+INSTRUMENTATION.collect("sampler_cpu_scale", "gauge", "Corridor-wide sampling rate scale for CPU headroom",
+                        lambda: CORRIDOR_SAMPLER.report()["cpu_scale"])
 
 # =========================================================
 # Weather & News 
 # =========================================================
 
+WEATHER_URL = os.environ.get("WEATHER_URL", "https://wttr.in/Queens?format=j1")
+WEATHER_TTL = float(os.environ.get("WEATHER_TTL", "600"))
+
+
+def fetch_weather():
+    res = OUTBOUND.get(WEATHER_URL, timeout=6)
+    res.raise_for_status()
+    current = res.json()["current_condition"][0]
+    return {
+        "temp": current["temp_F"] + "°F",
+        "wind": current["windspeedMiles"] + " mph",
+        "desc": current["weatherDesc"][0]["value"],
+    }
+
+
+# one upstream call per TTL for every client, refreshed in the background (started in main())
+WEATHER_CACHE = RefreshingCache(fetch_weather, ttl=WEATHER_TTL, name="weather",
+                               on_change=lambda _: EVENTS.publish("weather"))
+
+NEWS_FEED_URLS = os.environ.get(
+    "NEWS_FEED_URLS", "https://rss.nytimes.com/services/xml/rss/nyt/NYRegion.xml"
+).split(",")
+NEWS_TTL = float(os.environ.get("NEWS_TTL", "900"))
+
+# fetched once for every client, with ETag / If-Modified-Since on refresh
+NEWS_CACHE = FeedCache({url: url for url in NEWS_FEED_URLS}, ttl=NEWS_TTL, top_n=5,
+                       on_change=lambda _: EVENTS.publish("news"))
+
+# hit rates on /metrics; news caches are named by feed URL
+INSTRUMENTATION.watch_caches({"weather": WEATHER_CACHE, **NEWS_CACHE.caches})
+
 def weather_style():
     return {
         "padding": "10px",
@@ -196,6 +358,19 @@ app = Dash(
 )
 app.title = "NYC Transit Intelligence Dashboard"
 
+# change events for assets/push.js
+EVENTS.register(app.server)
+
+# Prometheus scrape target: callback timings, detection fps, cache hit rates
+INSTRUMENTATION.register(app.server)
+INSTRUMENTATION.collect("push_clients", "gauge", "Browsers connected to /events", lambda: EVENTS.clients)
+INSTRUMENTATION.collect("push_events_total", "counter", "Change events published", lambda: EVENTS.published)
+
+# interval periods (ms) while polling, and while the push stream is connected
+POLL_INTERVALS = {"refresh": 5_000, "weather-refresh": 600_000, "news-refresh": 1_800_000}
+# weather/news already poll slowly, and push delivers their refreshes as they happen
+PUSHED_INTERVALS = {"refresh": 60_000, "weather-refresh": 600_000, "news-refresh": 1_800_000}
+
 card_style = {
     "backgroundColor": "#181818",
     "border": "1px solid #333",
@@ -209,6 +384,34 @@ card_style = {
     "letterSpacing": "0.3px",
 }
 
+# careers ad rotator: (text, link)
+ADS = [
+    (
+        "🚌 MTA hiring Bus Operators — Full-time roles available.",
+        "https://careers.mta.org/operations"
+    ),
+    (
+        "🛠️ NYC Transit recruiting Maintenance Technicians.",
+        "https://careers.mta.org/technical"
+    ),
+    (
+        "📊 NYC DOT opening Data Analyst Intern positions.",
+        "https://www.nyc.gov/site/dot/about/careers.page"
+    ),
+    (
+        "🚇 Become a Subway Conductor — Paid training included.",
+        "https://careers.mta.org/operations"
+    ),
+    (
+        "💼 Queens Tech startup hiring Python/Dash developers.",
+        "https://www.google.com/search?q=Queens+tech+jobs"
+    ),
+    (
+        "🧭 Port Authority of NY/NJ opening Airport Operations Intern roles.",
+        "https://www.panynj.gov/port-authority/en/careers.html"
+    )
+]
+
 # =========================================================
 # FRONTFACE + MAIN DASHBOARD WRAPPER
 # =========================================================
@@ -216,6 +419,13 @@ card_style = {
 app.layout = dbc.Container([
     dcc.Location(id="url", refresh=False),
 
+    # written by assets/push.js from the /events stream
+    dcc.Store(id="push-status", data=False),
+    dcc.Store(id="push-camera"),
+    dcc.Store(id="push-metrics"),
+    dcc.Store(id="push-weather"),
+    dcc.Store(id="push-news"),
+
     # ======= FRONTFACE =======
     html.Div(
         id="frontface",
@@ -421,14 +631,17 @@ app.layout = dbc.Container([
 
                         # Weather
                         html.Div(id="weather-box", className="text-light mt-3"),
-                        dcc.Interval(id="weather-refresh", interval=600_000, n_intervals=0),
+                        # served from WEATHER_CACHE; updates are pushed, polling is the fallback
+                        dcc.Interval(id="weather-refresh", interval=POLL_INTERVALS["weather-refresh"], n_intervals=0),
 
                         # News
                         html.Div(id="news-box", className="text-light mt-3"),
-                        dcc.Interval(id="news-refresh", interval=1_800_000, n_intervals=0),
+                        # served from NEWS_CACHE, same as the weather panel
+                        dcc.Interval(id="news-refresh", interval=POLL_INTERVALS["news-refresh"], n_intervals=0),
 
-                        # AD interval
+                        # AD interval; rotation runs in the browser
                         dcc.Interval(id="ad-refresh", interval=8000, n_intervals=0),
+                        dcc.Store(id="ads", data=ADS),
 
                         # === Floating AD Box  ===
 html.Div([
@@ -556,9 +769,18 @@ html.Div([
                             className="text-light mb-2"
                         ),
 
+                        # background detection job + progress polling
+                        dcc.Store(id="detect-job"),
+                        dcc.Interval(
+                            id="job-poll",
+                            interval=1_000,
+                            n_intervals=0,
+                            disabled=True
+                        ),
+
                         dcc.Interval(
                             id="refresh",
-                            interval=5_000,
+                            interval=POLL_INTERVALS["refresh"],
                             n_intervals=0
                         ),
 
@@ -566,6 +788,10 @@ html.Div([
                             id="metrics-graph",
                             style={"height": "300px"}
                         ),
+                        # camera + last timestamp the graph has already drawn
+                        dcc.Store(id="metrics-cursor"),
+                        # plot width in px; sets the downsampling point budget
+                        dcc.Store(id="graph-width"),
 
                         html.Div(
                             id="traffic-advice-box",
@@ -648,6 +874,27 @@ html.Div(
             "marginTop": "12px",
         }
 ),
+                        # === CORRIDOR OVERVIEW UI ===
+html.Div(
+    id="overview-box",
+    children=[
+        html.H5("🗺 Corridor Overview", className="text-light fw-bold"),
+        dcc.Graph(id="corridor-heatmap", style={"height": "260px"}),
+        # every camera's latest count, scored in one pass and rolled up per corridor
+        html.Div(id="corridor-status", className="text-light mt-2", style={"fontSize": "13px"}),
+        # tiles version the heatmap was drawn from
+        dcc.Store(id="corridor-cursor"),
+        # its own timer: pushes only carry the selected camera, and the shared
+        # "refresh" slows down while push is connected
+        dcc.Interval(id="corridor-refresh", interval=POLL_INTERVALS["refresh"], n_intervals=0),
+    ],
+    style={
+        "backgroundColor": "rgba(255,255,255,0.05)",
+        "padding": "12px",
+        "borderRadius": "10px",
+        "marginTop": "12px",
+    }
+),
 
                     ], style=card_style)
                 ], md=6)
@@ -660,12 +907,6 @@ html.Div(
 
 # ==== Helpers for traffic advice ==================================
 
-#URL to corridor/group
-CAMERA_URL_TO_GROUP = {}
-for group_name, cams in CAMERA_STREAM_GROUPS.items():
-    for cam_label, cam_url in cams.items():
-        CAMERA_URL_TO_GROUP[cam_url] = group_name
-
 # each corridor suggestion
 BUS_SUGGESTIONS = {
     "I-678 Van Wyck Expressway — Served by Q25":
@@ -682,222 +923,340 @@ BUS_SUGGESTIONS = {
         "LIE has no Q-bus running on the mainline. Use park-and-ride or connect via local Q routes near interchanges.",
 }
 
+# (bus alternative, subway alternative) per corridor
+ALTERNATIVES = {
+    "I-678 Van Wyck Expressway — Served by Q25":
+        ("Q44-SBS", "E/F subway at Jamaica"),
+    "I-278 (BQE) Queens Section — Served by Q18 / Q66":
+        ("Q66 local", "N/W subway at Astoria"),
+    "I-495 Long Island Expressway (LIE) — Highway Traffic Cameras":
+        ("Q30/Q17", "E subway at Queens Blvd"),
+}
+
 # =========================================================
 # Callbacks
 # =========================================================
 
 # camera select
-@app.callback(
+app.clientside_callback(
+    """
+    function(v) {
+        return v;
+    }
+    """,
     Output("video-player", "src"),
     Input("camera-select", "value")
 )
-def update_cam(v):
-    return v
 
 
-# refresh metrics 
-@app.callback(
-    Output("metrics-graph", "figure"),
-    Input("refresh", "n_intervals")
-)
-def update_metrics(_):
-    if not os.path.exists("metrics.csv"):
+# refresh metrics: downsampled figure on camera change or zoom, then only new points via extendData
+def point_budget(width):
+    # a min and a max per pixel column is all the plot can show
+    return 2 * int(width or 800)
+
+
+def relayout_range(relayout):
+    """x range in ns from a relayout event, None for autorange, False if x didn't change."""
+    if not relayout:
+        return False
+    if relayout.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout:
+        bounds = relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    elif "xaxis.range" in relayout:
+        bounds = relayout["xaxis.range"]
+    else:
+        return False
+    return [int(pd.Timestamp(b).value) for b in bounds]
+
+
+def metrics_figure(snap, budget=None, x_range=None):
+    if snap is None:
         return px.line(title="Waiting for detection...", template="plotly_dark")
 
-    df = pd.read_csv("metrics.csv")
-    if df.empty:
+    if snap.empty:
         return px.line(title="No data yet", template="plotly_dark")
 
-    fig = px.line(
-        df,
-        x="ts",
-        y=["cars", "buses", "trucks"],
+    start, end = x_range or (None, None)
+    picked = snap.pyramid().query(budget or point_budget(None), start, end, method=METRICS_DOWNSAMPLE)
+    fig = go.Figure()
+    # trace order must match COUNT_COLUMNS for extendData
+    for col in COUNT_COLUMNS:
+        idx = picked[col]
+        raw = len(idx) == 0 or idx[-1] - idx[0] + 1 == len(idx)
+        fig.add_trace(go.Scatter(
+            x=snap.ts[idx],
+            y=getattr(snap, col)[idx],
+            name=col,
+            mode="lines+markers" if raw else "lines",
+        ))
+    fig.update_layout(
         title="Vehicle Counts",
-        markers=True,
-        template="plotly_dark"
+        template="plotly_dark",
+        legend_title_text="variable",
+        margin=dict(l=0, r=0, t=40, b=0)
     )
-    fig.update_layout(margin=dict(l=0, r=0, t=40, b=0))
+    if x_range:
+        fig.update_xaxes(range=[pd.Timestamp(b) for b in x_range])
     return fig
 
 
-# click to run detyection generate metrics.csv
+def metrics_cursor(cam_url, snap, x_range=None, points=0):
+    # ns timestamps overflow JS numbers, so they travel as strings
+    return {
+        "camera": cam_url,
+        "version": list(snap.version) if snap is not None else None,
+        "last_ts": str(int(snap.ts[-1].astype("int64"))) if snap is not None and not snap.empty else None,
+        "range": [str(b) for b in x_range] if x_range else None,
+        # raw points appended on the client since the last downsampled figure
+        "points": points,
+    }
+
+
 @app.callback(
-    Output("run-status", "children"),
+    Output("metrics-graph", "figure"),
+    Output("metrics-graph", "extendData"),
+    Output("metrics-cursor", "data"),
+    Input("refresh", "n_intervals"),
+    Input("camera-select", "value"),
+    Input("metrics-graph", "relayoutData"),
+    Input("push-metrics", "data"),
+    State("metrics-cursor", "data"),
+    State("graph-width", "data")
+)
+def update_metrics(_, cam_url, relayout, _push, cursor, width):
+    snap = METRICS_STORE.snapshot(cam_url)
+    budget = point_budget(width)
+
+    if ctx.triggered_id == "metrics-graph":
+        x_range = relayout_range(relayout)
+        if x_range is False or not cursor or cursor["camera"] != cam_url:
+            return no_update, no_update, no_update
+        # zoomed in: re-query the pyramid at the finer level; zoomed out: back to the overview
+        return metrics_figure(snap, budget, x_range), no_update, metrics_cursor(cam_url, snap, x_range)
+
+    if not cursor or cursor["camera"] != cam_url or cursor["last_ts"] is None:
+        if cursor and cursor["camera"] == cam_url and snap is None:
+            # still waiting on the first detection; nothing to send
+            return no_update, no_update, no_update
+        return metrics_figure(snap, budget), no_update, metrics_cursor(cam_url, snap)
+
+    if cursor.get("range") or snap is None or list(snap.version) == cursor["version"]:
+        # a zoomed view stays put until the user zooms out
+        return no_update, no_update, no_update
+
+    ts_ns = snap.ts.astype("int64")
+    last_ts = int(cursor["last_ts"])
+    new = ts_ns > last_ts
+    added = int(new.sum())
+    if ts_ns[0] > last_ts or cursor.get("points", 0) + added > budget:
+        # the client fell behind the snapshot window, or its raw tail outgrew the
+        # budget; resend a freshly downsampled figure
+        return metrics_figure(snap, budget), no_update, metrics_cursor(cam_url, snap)
+
+    if not added:
+        return no_update, no_update, metrics_cursor(cam_url, snap, points=cursor.get("points", 0))
+
+    x = np.datetime_as_string(snap.ts[new], unit="us").tolist()
+    extend = {
+        "x": [x] * len(COUNT_COLUMNS),
+        "y": [getattr(snap, col)[new].tolist() for col in COUNT_COLUMNS],
+    }
+    extend_data = [extend, list(range(len(COUNT_COLUMNS)))]
+    return no_update, extend_data, metrics_cursor(cam_url, snap, points=cursor.get("points", 0) + added)
+
+
+# measure the plot once the page loads; hidden behind the frontface it reports 0
+app.clientside_callback(
+    """
+    function(_) {
+        var el = document.getElementById("metrics-graph");
+        return Math.round((el && el.offsetWidth) || window.innerWidth / 2);
+    }
+    """,
+    Output("graph-width", "data"),
+    Input("url", "pathname")
+)
+
+
+# push events for other cameras never reach the server
+app.clientside_callback(
+    """
+    function(event, camera) {
+        if (!event || (event.key !== camera && !event.resync)) {
+            return window.dash_clientside.no_update;
+        }
+        return event.seq;
+    }
+    """,
+    Output("push-metrics", "data"),
+    Input("push-camera", "data"),
+    State("camera-select", "value")
+)
+
+
+# polling is the fallback: slow it down while the push stream is up
+app.clientside_callback(
+    """
+    function(connected) {
+        return connected ? %s : %s;
+    }
+    """ % (json.dumps(list(PUSHED_INTERVALS.values())), json.dumps(list(POLL_INTERVALS.values()))),
+    [Output(id_, "interval") for id_ in POLL_INTERVALS],
+    Input("push-status", "data")
+)
+
+
+# click to run detection → queue a background job, hand back its id
+@app.callback(
+    Output("detect-job", "data"),
     Input("run-detect", "n_clicks"),
     State("camera-select", "value"),
     prevent_initial_call=True
 )
 def run_once(n, cam_url):
-    count = run_detection_for_dashboard(cam_url)
-    if count == 0:
-        return "❌ Detection failed."
-    return f"✅ Completed {count} frames."
+    return DETECTION_JOBS.submit(cam_url).id
+
+
+# poll the job until it finishes
+@app.callback(
+    Output("run-status", "children"),
+    Output("job-poll", "disabled"),
+    Input("detect-job", "data"),
+    Input("job-poll", "n_intervals"),
+    prevent_initial_call=True
+)
+def poll_detection(job_id, _):
+    job = DETECTION_JOBS.get(job_id)
+    if job is None:
+        return "❌ Detection failed.", True
+
+    if job.status == DONE:
+        return f"✅ Completed {job.count} frames.", True
+    if job.status == FAILED:
+        return "❌ Detection failed.", True
+    if job.frames == 0:
+        return "⏳ Detection queued…" if job.started is None else "🔄 Starting detection…", False
+    return f"🔄 Detecting… {job.frames} frames ({job.fps:.1f} fps)", False
 
 
 # weather
 @app.callback(
     Output("weather-box", "children"),
-    Input("weather-refresh", "n_intervals")
+    Input("weather-refresh", "n_intervals"),
+    Input("push-weather", "data")
 )
-def update_weather(_):
-    try:
-        url = "https://wttr.in/Queens?format=j1"
-        res = requests.get(url, timeout=6).json()
+def update_weather(_, _push=None):
+    weather = WEATHER_CACHE.get()
+    if weather is None:
+        if WEATHER_CACHE.last_error is None:
+            return html.Div("🌤 Loading weather…", className="text-muted")
+        return html.Div("🌫 Weather unavailable", className="text-warning")
 
-        temp = res["current_condition"][0]["temp_F"] + "°F"
-        wind = res["current_condition"][0]["windspeedMiles"] + " mph"
-        desc = res["current_condition"][0]["weatherDesc"][0]["value"]
+    temp, wind, desc = weather["temp"], weather["wind"], weather["desc"]
 
-        wind_emoji = "🌬️"
-        if "north" in desc.lower(): wind_emoji = "⬆️"
-        elif "south" in desc.lower(): wind_emoji = "⬇️"
-        elif "east" in desc.lower(): wind_emoji = "➡️"
-        elif "west" in desc.lower(): wind_emoji = "⬅️"
+    wind_emoji = "🌬️"
+    if "north" in desc.lower(): wind_emoji = "⬆️"
+    elif "south" in desc.lower(): wind_emoji = "⬇️"
+    elif "east" in desc.lower(): wind_emoji = "➡️"
+    elif "west" in desc.lower(): wind_emoji = "⬅️"
 
-        return [
-            html.H5("🌤 Current Weather (Queens)", className="fw-bold"),
-            html.Div(f"🌡 Temperature: {temp}"),
-            html.Div(f"{wind_emoji} Wind: {wind}"),
-            html.Div(f"📌 Condition: {desc}"),
-        ]
-    except:
-        return html.Div("🌫 Weather unavailable", className="text-warning")
+    return [
+        html.H5("🌤 Current Weather (Queens)", className="fw-bold"),
+        html.Div(f"🌡 Temperature: {temp}"),
+        html.Div(f"{wind_emoji} Wind: {wind}"),
+        html.Div(f"📌 Condition: {desc}"),
+    ]
 
 
 # news
 @app.callback(
     Output("news-box", "children"),
-    Input("news-refresh", "n_intervals")
+    Input("news-refresh", "n_intervals"),
+    Input("push-news", "data")
 )
-def update_news(_):
-    try:
-        feed_url = "https://rss.nytimes.com/services/xml/rss/nyt/NYRegion.xml"
-        feed = feedparser.parse(feed_url)
-
-        items = []
-        for entry in feed.entries[:5]:
-            items.append(
-                html.Div([
-                    html.A(entry.title, href=entry.link, target="_blank",
-                           style={"color": "#4da3ff", "textDecoration": "none"}),
-                    html.Div(entry.published, style={"fontSize": "11px", "opacity": 0.7}),
-                    html.Hr(style={"borderColor": "#444"})
-                ])
-            )
-
-        return html.Div([
-            html.Div("📰 NYC Transit / Local News",
-                     style={"fontSize": "16px", "fontWeight": "bold", "marginBottom": "6px"}),
-            *items
-        ], style=news_style())
-    except:
+def update_news(_, _push=None):
+    entries = NEWS_CACHE.entries()
+    if entries is None:
+        if NEWS_CACHE.last_error is None:
+            return html.Div("📰 Loading news…", style=news_style())
         return html.Div("📰 Unable to load news feed.", style=news_style())
 
+    items = []
+    for entry in entries:
+        items.append(
+            html.Div([
+                html.A(entry["title"], href=entry["link"], target="_blank",
+                       style={"color": "#4da3ff", "textDecoration": "none"}),
+                html.Div(entry["published"], style={"fontSize": "11px", "opacity": 0.7}),
+                html.Hr(style={"borderColor": "#444"})
+            ])
+        )
+
+    return html.Div([
+        html.Div("📰 NYC Transit / Local News",
+                 style={"fontSize": "16px", "fontWeight": "bold", "marginBottom": "6px"}),
+        *items
+    ], style=news_style())
+
 
 # =========================================================
 # AI Traffic Intelligence
 # =========================================================
-@app.callback(
-    Output("traffic-advice-box", "children"),
-    [Input("refresh", "n_intervals"),
-     Input("camera-select", "value")]
-)
-def update_traffic_advice(n, cam_url):
-    # If no detection yet
-    if n is None or not os.path.exists("metrics.csv"):
-        return [
-            html.Div(
-                "💡 Run AI Detection to see live traffic insights.",
-                style={"fontWeight": "600", "fontSize": "16px", "marginBottom": "4px"}
-            ),
-            html.Div(
-                "After at least one detection run, this panel will summarize congestion level and suggest routes.",
-                style={"fontSize": "13px", "opacity": 0.85},
-            ),
-        ]
 
-    try:
-        df = pd.read_csv("metrics.csv")
-    except:
-        return [
-            html.Div("⚠ Unable to read metrics file.", style={"fontWeight": "600"}),
-            html.Div("Please run AI Detection again.", style={"fontSize": "13px"}),
-        ]
+LEVEL_STYLE = {
+    "Low": ("🟢", "Free-flow traffic."),
+    "Medium": ("🟡", "Moderate traffic with some slowdowns."),
+    "High": ("🔴", "Heavy congestion expected."),
+}
 
-    if df.empty:
-        return [
-            html.Div("📉 No vehicle data yet.", style={"fontWeight": "600"}),
-            html.Div("Run AI Detection to start collecting traffic metrics.",
-                     style={"fontSize": "13px"}),
-        ]
-
-    tail = df.tail(5).copy()
-
-    current = int(tail.iloc[-1]["cars"])
-    recent_avg = float(tail["cars"].mean())
-
-    # Traffic level
-    if current < 10:
-        level = "Low"
-        icon = "🟢"
-        text = "Free-flow traffic."
-    elif current < 25:
-        level = "Medium"
-        icon = "🟡"
-        text = "Moderate traffic with some slowdowns."
-    else:
-        level = "High"
-        icon = "🔴"
-        text = "Heavy congestion expected."
+ADVICE_PLACEHOLDER = [
+    html.Div(
+        "💡 Run AI Detection to see live traffic insights.",
+        style={"fontWeight": "600", "fontSize": "16px", "marginBottom": "4px"}
+    ),
+    html.Div(
+        "After at least one detection run, this panel will summarize congestion level and suggest routes.",
+        style={"fontSize": "13px", "opacity": 0.85},
+    ),
+]
 
-    # Trend & simple prediction
-    if len(tail) >= 2:
-        prev_avg = float(tail["cars"].iloc[:-1].mean())
-    else:
-        prev_avg = recent_avg
-
-    if current > prev_avg * 1.1:
-        trend = "increasing"
-        factor = 1.15
-    elif current < prev_avg * 0.9:
-        trend = "decreasing"
-        factor = 0.90
-    else:
-        trend = "stable"
-        factor = 1.00
 
-    predicted_5m = int(round(current * factor))
+def render_flow(state, roi):
+    if math.isnan(state.flow_in):
+        # keyframe-only sampler visits and DETECT_TRACKING=0 runs carry no flows
+        return "↕ Flow: not tracked yet — run AI Detection on this camera."
+    into, out_of = roi.directions
+    return f"↕ Flow: {state.flow_in:.1f} vehicles/min {into}, {state.flow_out:.1f} vehicles/min {out_of}"
 
-    # Time band
-    hour = datetime.now().hour
-    if 7 <= hour < 10:
-        period = "AM peak (07:00–10:00)"
-    elif 16 <= hour < 19:
-        period = "PM peak (16:00–19:00)"
-    else:
-        period = "Off-peak period"
 
-    # Corridor + bus suggestions
-    corridor = CAMERA_URL_TO_GROUP.get(cam_url, "Selected corridor")
+def render_advice(state, roi=DEFAULT_ROI):
+    icon, text = LEVEL_STYLE[state.level]
+    corridor = state.corridor or "Selected corridor"
     bus_suggestion = BUS_SUGGESTIONS.get(
         corridor, "Use nearby Q routes or subway as alternatives."
     )
 
     return [
         html.Div(
-            f"{icon} Current Traffic Level: {level}",
+            f"{icon} Current Traffic Level: {state.level}",
             style={"fontWeight": "700", "fontSize": "16px", "marginBottom": "4px"}
         ),
         html.Div(text, style={"fontSize": "13px", "marginBottom": "8px"}),
-        html.Div(f"⏱ Time band: {period}", style={"fontSize": "13px"}),
+        html.Div(f"⏱ Time band: {state.period}", style={"fontSize": "13px"}),
         html.Div(
-            f"🚗 Vehicles detected: {current} (avg {recent_avg:.1f} across last {len(tail)} points)",
+            f"🚗 Vehicles detected: {state.current} (avg {state.recent_avg:.1f} across last {state.window} points)",
             style={"fontSize": "13px"}
         ),
         html.Div(
-            f"📈 Trend: {trend} → predicted {predicted_5m} in 5 minutes.",
-            style={"fontSize": "13px", "marginBottom": "8px"}
+            f"📊 Median {state.p50:.0f}, busy (p90) {state.p90:.0f}, spread ±{state.std:.1f}, smoothed {state.ewma:.1f}",
+            style={"fontSize": "13px"}
         ),
+        html.Div(
+            f"📈 Trend: {state.trend} → predicted {state.predicted_5m} in 5 minutes.",
+            style={"fontSize": "13px"}
+        ),
+        html.Div(render_flow(state, roi), style={"fontSize": "13px", "marginBottom": "8px"}),
         html.Div(f"🚌 Corridor: {corridor}", style={"fontSize": "13px"}),
         html.Div(
             f"✅ Route suggestion: {bus_suggestion}",
@@ -907,270 +1266,259 @@ def update_traffic_advice(n, cam_url):
                  style={"fontSize": "13px", "opacity": 0.85})
     ]
 
-#Frontface
-@app.callback(
-    Output("frontface", "style"),
-    Output("main-dashboard", "style"),
-    Input("enter-btn", "n_clicks"),
-    prevent_initial_call=True
-)
-def show_dashboard(n):
-
-    frontface_hide = {
-        "display": "none"
-    }
-
-    dashboard_show = {
-        "display": "block",
-        "opacity": 1,
-        "animation": "slideup 0.8s ease forwards",
-        "backgroundColor": "#121212"
-    }
-
-    return frontface_hide, dashboard_show
-#ETA
-@app.callback(
-    Output("eta-content", "children"),
-    Input("camera-select", "value"),
-    Input("refresh", "n_intervals")
-)
-def update_eta(cam_url, _):
-    corridor = CAMERA_URL_TO_GROUP.get(cam_url, "Unknown")
-
-    base_eta = random.randint(4, 10)
-
-    if os.path.exists("metrics.csv"):
-        df = pd.read_csv("metrics.csv")
-        if not df.empty:
-            cars = df.tail(1).iloc[0]["cars"]
-            if cars > 28:
-                base_eta += 6
-            elif cars > 18:
-                base_eta += 3
 
+def render_eta(corridor, eta):
     return [
-        html.Div(f"Corridor: {corridor}"),
-        html.Div(f"Estimated bus arrival: ~{base_eta} min"),
+        html.Div(f"Corridor: {corridor or 'Unknown'}"),
+        html.Div(f"Estimated bus arrival: ~{eta} min"),
     ]
-    
-#Delay Prediction Callback
-@app.callback(
-    Output("delay-content", "children"),
-    Input("refresh", "n_intervals"),
-    Input("camera-select", "value")
-)
-def update_delay(_, cam_url):
-
-    corridor = CAMERA_URL_TO_GROUP.get(cam_url, "Unknown Corridor")
-
-    if not os.path.exists("metrics.csv"):
-        return "Run AI Detection to enable delay prediction."
 
-    df = pd.read_csv("metrics.csv")
-    if df.empty:
-        return "Not enough data."
-
-    tail = df.tail(6)
-    cars = tail["cars"].iloc[-1]
-
-    if cars < 10:
-        delay = 0
-    elif cars < 20:
-        delay = 2
-    elif cars < 30:
-        delay = 5
-    else:
-        delay = 10
 
+def render_delay(state):
     return [
-        html.Div(f"Corridor: {corridor}"),
-        html.Div(f"Predicted Delay: {delay} minutes"),
+        html.Div(f"Corridor: {state.corridor or 'Unknown Corridor'}"),
+        html.Div(f"Predicted Delay: {state.delay} minutes"),
     ]
 
 
-#Recommendation
-@app.callback(
-    Output("alt-route-content", "children"),
-    Input("refresh", "n_intervals"),
-    Input("camera-select", "value")
-)
-def recommend_alt(_, cam_url):
-
-    corridor = CAMERA_URL_TO_GROUP.get(cam_url, "")
-
-    if not os.path.exists("metrics.csv"):
-        return "Waiting for detection data."
-
-    df = pd.read_csv("metrics.csv")
-    if df.empty:
-        return "Not enough data to generate recommendations."
+def render_alt(state):
+    alt = ALTERNATIVES.get(state.corridor, ("Check nearby subway", "Consider walking 5–10 mins"))
 
-    cars = df.tail(1).iloc[0]["cars"]
-
-    alternatives = {
-        "I-678 Van Wyck Expressway — Served by Q25":
-            ("Q44-SBS", "E/F subway at Jamaica"),
-        "I-278 (BQE) Queens Section — Served by Q18 / Q66":
-            ("Q66 local", "N/W subway at Astoria"),
-        "I-495 Long Island Expressway (LIE) — Highway Traffic Cameras":
-            ("Q30/Q17", "E subway at Queens Blvd"),
-    }
-
-    alt = alternatives.get(corridor, ("Check nearby subway", "Consider walking 5–10 mins"))
-
-    if cars > 25:
+    congestion = CONGESTION(state.current)
+    if congestion == "heavy":
         action = f"Heavy congestion detected → Recommend switching to {alt[1]}"
-    elif cars > 15:
+    elif congestion == "moderate":
         action = f"Moderate congestion → Consider {alt[0]}"
     else:
         action = "Traffic conditions are normal."
 
     return [
-        html.Div(f"Corridor: {corridor}"),
+        html.Div(f"Corridor: {state.corridor or ''}"),
         html.Div(action),
     ]
 
-#Bus Performance
 
+def render_bus_perf(state):
+    return [
+        html.Div(f"Corridor: {state.corridor or 'Unknown Corridor'}"),
+        html.Div(f"Estimated Bus Speed: {state.speed} mph"),
+        html.Div(f"Expected Delay: {state.bus_delay} minutes"),
+    ]
+
+
+# one round trip per tick fans the corridor state out to every panel
 @app.callback(
+    Output("traffic-advice-box", "children"),
+    Output("eta-content", "children"),
+    Output("delay-content", "children"),
+    Output("alt-route-content", "children"),
     Output("bus-perf-content", "children"),
     Input("refresh", "n_intervals"),
-    Input("camera-select", "value")
+    Input("camera-select", "value"),
+    Input("push-metrics", "data")
 )
-def bus_performance(_, cam_url):
+def update_corridor_panels(n, cam_url, _push=None):
+    corridor = CAMERA_URL_TO_GROUP.get(cam_url)
 
-    corridor = CAMERA_URL_TO_GROUP.get(cam_url, "Unknown Corridor")
+    try:
+        stats = ROLLING.get(cam_url)
+    except:
+        return (
+            [
+                html.Div("⚠ Unable to read metrics file.", style={"fontWeight": "600"}),
+                html.Div("Please run AI Detection again.", style={"fontSize": "13px"}),
+            ],
+            no_update, no_update, no_update, no_update,
+        )
 
-    if not os.path.exists("metrics.csv"):
-        return "Run detection to enable performance model."
+    # If no detection yet
+    state = compute_corridor_state(stats, corridor)
+    if state is None:
+        return (
+            ADVICE_PLACEHOLDER,
+            render_eta(corridor, eta_minutes(None, randint(4, 10))),
+            "Run AI Detection to enable delay prediction.",
+            "Waiting for detection data.",
+            "Run detection to enable performance model.",
+        )
 
-    df = pd.read_csv("metrics.csv")
-    if df.empty:
-        return "Not enough data."
+    return (
+        render_advice(state, CAMERA_URL_TO_ROI.get(cam_url, DEFAULT_ROI)),
+        render_eta(corridor, state.eta),
+        render_delay(state),
+        render_alt(state),
+        render_bus_perf(state),
+    )
 
-    cars = df.tail(1).iloc[0]["cars"]
+# corridor overview: heatmap of corridor totals per tile, drawn from pre-aggregated tiles
+OVERVIEW_TILES = 36  # 3 h of 5-min tiles
+
+
+def corridor_heatmap():
+    corridors, starts, total, p50, p90, cameras = CORRIDOR_TILES.grid(OVERVIEW_TILES)
+    if not cameras.any():
+        return px.imshow([[0]], title="No corridor data yet", template="plotly_dark")
+
+    labels = [corridor.split(" — ")[0] for corridor in corridors]
+    fig = go.Figure(go.Heatmap(
+        z=total,
+        x=pd.to_datetime(starts, utc=True),
+        y=labels,
+        customdata=np.dstack([p50, p90, cameras]),
+        colorscale="YlOrRd",
+        colorbar=dict(title="cars"),
+        hovertemplate=(
+            "%{y}<br>%{x|%H:%M}<br>total %{z:.1f} cars"
+            "<br>p50 %{customdata[0]:.1f}, p90 %{customdata[1]:.1f}"
+            "<br>%{customdata[2]} cameras<extra></extra>"
+        ),
+    ))
+    fig.update_layout(template="plotly_dark", margin=dict(l=0, r=0, t=10, b=0))
+    return fig
 
-    if cars < 10:
-        speed = 18
-    elif cars < 18:
-        speed = 12
-    elif cars < 28:
-        speed = 8
-    else:
-        speed = 4
 
-    delay = max(0, int((18 - speed) * 0.8))
+# corridor row of every camera, for scoring them all at once
+STATUS_CORRIDORS = list(CAMERA_STREAM_GROUPS)
+STATUS_CAMERAS = list(CAMERA_URL_TO_GROUP)
+STATUS_ROWS = np.array([STATUS_CORRIDORS.index(CAMERA_URL_TO_GROUP[url]) for url in STATUS_CAMERAS])
+HEAVY = list(CONGESTION.values).index("heavy")
+
+
+def corridor_status():
+    scores = score_counts(ROLLING.current_counts(STATUS_CAMERAS))
+    n = len(STATUS_CORRIDORS)
+    rows = STATUS_ROWS[scores.valid]
+    reporting = np.bincount(rows, minlength=n)
+    cameras = np.bincount(STATUS_ROWS, minlength=n)
+    heavy = np.bincount(rows, weights=scores.congestion[scores.valid] == HEAVY, minlength=n)
+    delay = np.bincount(rows, weights=scores.delay[scores.valid], minlength=n) / np.maximum(reporting, 1)
+    speed = np.bincount(rows, weights=scores.speed[scores.valid], minlength=n) / np.maximum(reporting, 1)
+    worst = np.full(n, -1)
+    np.maximum.at(worst, rows, scores.level[scores.valid])
+
+    if not reporting.any():
+        return html.Div("No camera has reported yet.", className="text-muted")
+
+    header = html.Tr([html.Th(h) for h in ("Corridor", "Cameras", "Worst level", "Heavy", "Delay", "Bus speed")])
+    body = []
+    for i, corridor in enumerate(STATUS_CORRIDORS):
+        label = corridor.split(" — ")[0]
+        if not reporting[i]:
+            body.append(html.Tr([html.Td(label), html.Td(f"0/{cameras[i]}"), html.Td("no data", colSpan=4)]))
+            continue
+        icon, _ = LEVEL_STYLE[LEVEL.values[worst[i]]]
+        body.append(html.Tr([
+            html.Td(label),
+            html.Td(f"{reporting[i]}/{cameras[i]}"),
+            html.Td(f"{icon} {LEVEL.values[worst[i]]}"),
+            html.Td(int(heavy[i])),
+            html.Td(f"{delay[i]:.1f} min"),
+            html.Td(f"{speed[i]:.0f} mph"),
+        ]))
+    return dbc.Table([html.Thead(header), html.Tbody(body)], size="sm", color="dark", className="mb-0")
 
-    return [
-        html.Div(f"Corridor: {corridor}"),
-        html.Div(f"Estimated Bus Speed: {speed} mph"),
-        html.Div(f"Expected Delay: {delay} minutes"),
-    ]
 
-#AD
 @app.callback(
+    Output("corridor-heatmap", "figure"),
+    Output("corridor-status", "children"),
+    Output("corridor-cursor", "data"),
+    Input("corridor-refresh", "n_intervals"),
+    Input("push-metrics", "data"),
+    State("corridor-cursor", "data")
+)
+def update_corridor_overview(_, _push, cursor):
+    # both only move when a tile changes (every append lands in one) or a new tile starts
+    key = [CORRIDOR_TILES.version, time.time_ns() // CORRIDOR_TILES.tile_ns]
+    if cursor == key:
+        return no_update, no_update, no_update
+    return corridor_heatmap(), corridor_status(), key
+
+#Frontface
+app.clientside_callback(
+    """
+    function(n) {
+        var frontface_hide = {"display": "none"};
+        var dashboard_show = {
+            "display": "block",
+            "opacity": 1,
+            "animation": "slideup 0.8s ease forwards",
+            "backgroundColor": "#121212"
+        };
+        return [frontface_hide, dashboard_show];
+    }
+    """,
+    Output("frontface", "style"),
+    Output("main-dashboard", "style"),
+    Input("enter-btn", "n_clicks"),
+    prevent_initial_call=True
+)
+
+#AD: rotate through the ADS store
+app.clientside_callback(
+    """
+    function(n, ads) {
+        var ad = ads[(n || 0) % ads.length];
+        return [ad[0], ad[1]];
+    }
+    """,
     Output("ad-content", "children"),
     Output("ad-link", "href"),
-    Input("ad-refresh", "n_intervals")
+    Input("ad-refresh", "n_intervals"),
+    State("ads", "data")
 )
-def update_ads(n):
-    ads = [
-        (
-            "🚌 MTA hiring Bus Operators — Full-time roles available.",
-            "https://careers.mta.org/operations"
-        ),
-        (
-            "🛠️ NYC Transit recruiting Maintenance Technicians.",
-            "https://careers.mta.org/technical"
-        ),
-        (
-            "📊 NYC DOT opening Data Analyst Intern positions.",
-            "https://www.nyc.gov/site/dot/about/careers.page"
-        ),
-        (
-            "🚇 Become a Subway Conductor — Paid training included.",
-            "https://careers.mta.org/operations"
-        ),
-        (
-            "💼 Queens Tech startup hiring Python/Dash developers.",
-            "https://www.google.com/search?q=Queens+tech+jobs"
-        ),
-        (
-            "🧭 Port Authority of NY/NJ opening Airport Operations Intern roles.",
-            "https://www.panynj.gov/port-authority/en/careers.html"
-        )
-    ]
 
-    idx = n % len(ads)
-    return ads[idx][0], ads[idx][1]
-    
-@app.callback(
+# close → collapse, re-expand → open; only "display" changes, the rest of the style stays as laid out
+app.clientside_callback(
+    """
+    function(close_clicks, expand_clicks, expanded_style, collapsed_style) {
+        var closed = (close_clicks || 0) > (expand_clicks || 0);
+        return [
+            Object.assign({}, expanded_style, {"display": closed ? "none" : "block"}),
+            Object.assign({}, collapsed_style, {"display": closed ? "flex" : "none"})
+        ];
+    }
+    """,
     Output("ad-expanded", "style"),
     Output("ad-collapsed", "style"),
     Input("ad-close", "n_clicks"),
-    Input("ad-collapsed", "n_clicks")
+    Input("ad-collapsed", "n_clicks"),
+    State("ad-expanded", "style"),
+    State("ad-collapsed", "style")
 )
-def toggle_ad(close_clicks, expand_clicks):
-
-    expanded_style = {
-        "position": "fixed",
-        "left": "20px",
-        "bottom": "20px",
-        "width": "260px",
-        "backgroundColor": "rgba(20,20,20,0.85)",
-        "border": "1px solid #333",
-        "borderRadius": "12px",
-        "padding": "14px",
-        "color": "white",
-        "zIndex": "9999",
-        "boxShadow": "0 4px 18px rgba(0,0,0,0.5)",
-        "backdropFilter": "blur(8px)",
-        "display": "block"
-    }
-
-    collapsed_style = {
-        "position": "fixed",
-        "left": "20px",
-        "bottom": "20px",
-        "width": "50px",
-        "height": "50px",
-        "backgroundColor": "rgba(20,20,20,0.7)",
-        "borderRadius": "50%",
-        "justifyContent": "center",
-        "alignItems": "center",
-        "fontSize": "24px",
-        "cursor": "pointer",
-        "color": "white",
-        "zIndex": "9999",
-        "boxShadow": "0 4px 18px rgba(0,0,0,0.4)",
-        "display": "none",
-    }
-
-    # Close → collapse
-    if close_clicks and close_clicks > expand_clicks:
-        expanded_style["display"] = "none"
-        collapsed_style["display"] = "flex"
-
-    # Re-expand
-    if expand_clicks and expand_clicks >= close_clicks:
-        expanded_style["display"] = "block"
-        collapsed_style["display"] = "none"
-
-    return expanded_style, collapsed_style
 
 #map road
-@app.callback(
+app.clientside_callback(
+    """
+    function(selected_png) {
+        return %s + selected_png;
+    }
+    """ % json.dumps(app.get_asset_url("")),
     Output("route-map", "src"),
     Input("route-select", "value")
 )
-def update_map(selected_png):
-    return app.get_asset_url(selected_png)
+
+# time every server-side callback for /metrics; must follow the last @app.callback
+INSTRUMENTATION.instrument_callbacks(app)
 
 
 # =========================================================
 # U:HuggingFace Spaces
 # =========================================================
 
-if __name__ == "__main__":
+def main():
+    # Background work starts here, not at import: sampler workers are spawned,
+    # and each one re-imports this file as __mp_main__
+    WEATHER_CACHE.start()
+    NEWS_CACHE.start()
+    CORRIDOR_TILES.prime(TIMESERIES, CAMERA_URL_TO_GROUP)
+    if DETECT_WARMUP:
+        threading.Thread(target=get_engine().warm_up, name="detect-warmup", daemon=True).start()
+    if os.environ.get("CORRIDOR_SAMPLER") == "1":
+        CORRIDOR_SAMPLER.start()
+
     # HF Spaces  7860，set host=0.0.0.0 
     app.run_server(host="0.0.0.0", port=7860, debug=False)
+
+
+if __name__ == "__main__":
+    main()
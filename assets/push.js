@@ -0,0 +1,69 @@
+// Change events from /events (see events.py) → dcc.Store updates.
+// Each store bump triggers the callbacks that read it; the dcc.Interval
+// timers slow down while connected and speed back up if the stream drops.
+(function () {
+    if (!window.EventSource) {
+        return;
+    }
+
+    var TOPICS = {
+        metrics: "push-camera",
+        weather: "push-weather",
+        news: "push-news"
+    };
+
+    function setProps(id, props) {
+        try {
+            window.dash_clientside.set_props(id, props);
+        } catch (e) {}
+    }
+
+    // set_props only reaches components the renderer has already mounted
+    function layoutReady() {
+        var stores = window.dash_stores || [];
+        if (!stores.length || !window.dash_clientside || !window.dash_clientside.set_props) {
+            return false;
+        }
+        var paths = stores[0].getState().paths;
+        return Boolean(paths && paths.strs && paths.strs["push-status"]);
+    }
+
+    function eventsUrl() {
+        var config = document.getElementById("_dash-config");
+        var prefix = config ? JSON.parse(config.textContent).requests_pathname_prefix : "/";
+        return (prefix || "/") + "events";
+    }
+
+    function connect() {
+        var source = new EventSource(eventsUrl());
+
+        source.onopen = function () {
+            setProps("push-status", {data: true});
+        };
+        // EventSource reconnects on its own; poll until it does
+        source.onerror = function () {
+            setProps("push-status", {data: false});
+        };
+
+        Object.keys(TOPICS).forEach(function (topic) {
+            source.addEventListener(topic, function (e) {
+                setProps(TOPICS[topic], {data: JSON.parse(e.data)});
+            });
+        });
+
+        // missed events: refresh everything once
+        source.addEventListener("resync", function () {
+            var stamp = Date.now();
+            setProps("push-camera", {data: {key: null, seq: stamp, resync: true}});
+            setProps("push-weather", {data: {key: null, seq: stamp}});
+            setProps("push-news", {data: {key: null, seq: stamp}});
+        });
+    }
+
+    var wait = setInterval(function () {
+        if (layoutReady()) {
+            clearInterval(wait);
+            connect();
+        }
+    }, 250);
+})();
@@ -0,0 +1,173 @@
+"""Exported ONNX / OpenVINO models for CPU-only inference.
+
+PyTorch eager mode is the slowest way to run YOLO on a box without a GPU.
+With ``DETECT_BACKEND=onnx`` or ``openvino`` the weights are exported once
+with ultralytics, as FP32, FP16 or calibrated INT8 per
+``DETECT_PRECISION``, into ``DETECT_MODEL_DIR``, and reused on later
+starts.  ``ExportedModel`` then runs them with the runtime directly:
+letterbox the batch, one session call, class-aware NMS with OpenCV.
+Neither path needs torch at inference time, and both take an explicit
+thread count (``DETECT_THREADS``), which ultralytics' own wrappers don't
+expose.  ``torch`` is the ultralytics predictor, as before.
+"""
+
+import glob
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+DETECT_BACKEND = os.environ.get("DETECT_BACKEND", "torch")
+DETECT_PRECISION = os.environ.get("DETECT_PRECISION", "fp32")
+# intra-op threads per model; 0 keeps the runtime's default (every core)
+DETECT_THREADS = int(os.environ.get("DETECT_THREADS", "0"))
+MODEL_DIR = os.environ.get("DETECT_MODEL_DIR", "models")
+# ultralytics dataset yaml that INT8 export calibrates on
+CALIBRATION_DATA = os.environ.get("DETECT_CALIBRATION_DATA", "coco8.yaml")
+
+# ultralytics' predict defaults, so exported models box like the torch one
+NMS_IOU = 0.7
+MAX_DETECTIONS = 300
+LETTERBOX_FILL = 114
+
+# PyTorch on CPU only runs FP32
+PRECISIONS = {"torch": ("fp32",), "onnx": ("fp32", "fp16", "int8"), "openvino": ("fp32", "fp16", "int8")}
+_QUANTIZE = {"fp16": 16, "int8": 8}
+
+
+def check_backend(backend, precision):
+    if backend not in PRECISIONS:
+        raise ValueError(f"unknown detection backend {backend!r}; expected one of {', '.join(PRECISIONS)}")
+    if precision not in PRECISIONS[backend]:
+        raise ValueError(f"{backend} backend doesn't support {precision!r}; "
+                         f"expected one of {', '.join(PRECISIONS[backend])}")
+
+
+def artifact_path(model_path, backend, precision, imgsz):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    name = f"{stem}-{imgsz}-{precision}"
+    return os.path.join(MODEL_DIR, f"{name}.onnx" if backend == "onnx" else f"{name}_openvino_model")
+
+
+def export_model(model_path, backend, precision, imgsz):
+    """Path of ``model_path`` exported for ``backend``; exports it on first use."""
+    target = artifact_path(model_path, backend, precision, imgsz)
+    if os.path.exists(target):
+        return target
+
+    from ultralytics import YOLO
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    # ultralytics exports next to the weights under a fixed name; a private
+    # copy keeps processes that start together from clobbering each other
+    workdir = tempfile.mkdtemp(prefix="export-", dir=MODEL_DIR)
+    try:
+        source = model_path
+        if os.path.isfile(model_path):
+            source = shutil.copy(model_path, workdir)
+        kwargs = {"format": backend, "imgsz": imgsz, "dynamic": True}
+        if precision in _QUANTIZE:
+            kwargs["quantize"] = _QUANTIZE[precision]
+        if precision == "int8":
+            kwargs["data"] = CALIBRATION_DATA
+        exported = YOLO(source).export(**kwargs)
+        try:
+            os.replace(exported, target)
+        except OSError:
+            # another process finished the same export first
+            if not os.path.exists(target):
+                raise
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return target
+
+
+def letterbox(frames, size):
+    """One RGB ``(n, 3, size, size)`` float batch in 0..1, plus each frame's ``(scale, left, top, w, h)``."""
+    import cv2
+
+    batch = np.full((len(frames), size, size, 3), LETTERBOX_FILL, dtype=np.uint8)
+    geometry = []
+    for i, frame in enumerate(frames):
+        h, w = frame.shape[:2]
+        scale = min(size / h, size / w)
+        nh, nw = round(h * scale), round(w * scale)
+        top, left = (size - nh) // 2, (size - nw) // 2
+        batch[i, top:top + nh, left:left + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+        geometry.append((scale, left, top, w, h))
+    x = batch[..., ::-1].transpose(0, 3, 1, 2).astype(np.float32)
+    x /= 255
+    return x, geometry
+
+
+def decode(output, geometry, conf, classes, iou=NMS_IOU):
+    """Per-frame ``(n, 6)`` ``x1 y1 x2 y2 conf cls`` arrays, boxes normalized 0..1, from a raw batch output."""
+    import cv2
+
+    wanted = np.asarray(classes)
+    out = []
+    for pred, (scale, left, top, w, h) in zip(output, geometry):
+        pred = pred.astype(np.float32)
+        if pred.shape[-1] == 6:
+            # NMS-free heads (YOLOv10, YOLO26) already emit x1 y1 x2 y2 conf cls rows
+            boxes, scores, cls = pred[:, :4], pred[:, 4], pred[:, 5].astype(int)
+            keep = (scores >= conf) & np.isin(cls, wanted)
+            boxes, scores, cls = boxes[keep], scores[keep], cls[keep]
+        else:
+            # (4 + classes, anchors): cx cy w h, then one score per class
+            pred = pred.T
+            cls = pred[:, 4:].argmax(1)
+            scores = pred[np.arange(len(pred)), 4 + cls]
+            keep = (scores >= conf) & np.isin(cls, wanted)
+            pred, scores, cls = pred[keep], scores[keep], cls[keep]
+            xywh = np.column_stack([pred[:, 0] - pred[:, 2] / 2, pred[:, 1] - pred[:, 3] / 2, pred[:, 2], pred[:, 3]])
+            kept = np.asarray(cv2.dnn.NMSBoxesBatched(xywh, scores, cls, conf, iou), dtype=int).reshape(-1)
+            kept = kept[:MAX_DETECTIONS]
+            boxes = np.column_stack([xywh[kept, :2], xywh[kept, :2] + xywh[kept, 2:]])
+            scores, cls = scores[kept], cls[kept]
+
+        # undo the letterbox, then normalize like ultralytics' xyxyn
+        boxes = (boxes - [left, top, left, top]) / scale
+        boxes = np.clip(boxes, 0, [w, h, w, h]) / [w, h, w, h]
+        out.append(np.column_stack([boxes, scores, cls]).astype(np.float32).reshape(-1, 6))
+    return out
+
+
+class ExportedModel:
+
+    def __init__(self, path, backend, threads=DETECT_THREADS):
+        self.path = path
+        self.backend = backend
+        self.threads = threads
+        if backend == "onnx":
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            if threads:
+                options.intra_op_num_threads = threads
+                options.inter_op_num_threads = 1
+            self._session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+            self._input = self._session.get_inputs()[0]
+            # FP16 exports keep FP32 inputs, but don't count on it
+            self._dtype = np.float16 if "float16" in self._input.type else np.float32
+        elif backend == "openvino":
+            import openvino as ov
+
+            config = {"PERFORMANCE_HINT": "LATENCY"}
+            if threads:
+                config["INFERENCE_NUM_THREADS"] = str(threads)
+            xml = path if path.endswith(".xml") else glob.glob(os.path.join(path, "*.xml"))[0]
+            self._compiled = ov.Core().compile_model(xml, "CPU", config)
+        else:
+            raise ValueError(f"no exported runtime for {backend!r}")
+
+    def run(self, batch):
+        """Raw model output for one letterboxed batch."""
+        if self.backend == "onnx":
+            return self._session.run(None, {self._input.name: batch.astype(self._dtype, copy=False)})[0]
+        return self._compiled(batch)[self._compiled.output(0)]
+
+    def predict(self, frames, imgsz, conf, classes):
+        batch, geometry = letterbox(frames, imgsz)
+        return decode(self.run(batch), geometry, conf, classes)
@@ -0,0 +1,116 @@
+"""Inference backends side by side on one fixed local clip.
+
+Decodes every ``--stride``-th frame of SOURCE once, then, for each
+``backend:precision``, loads the model (exporting it into
+``DETECT_MODEL_DIR`` the first time) and runs the same frames through
+``DetectionEngine.infer_boxes`` ``--batch`` at a time.  Reported per
+backend:
+
+* load: export (first run only), load and one warm-up batch,
+* fps: frames inferred per second, decode excluded,
+* agreement with the first backend listed (PyTorch FP32 by default): box
+  F1 at IoU 0.5 with matching classes, and mean absolute error of the
+  per-frame vehicle count.
+
+Backends whose runtime isn't installed (``onnxruntime``, ``openvino``) or
+whose export fails are reported as skipped.  Needs loadable weights, and
+real camera footage for the agreement numbers to mean anything; without
+SOURCE the synthetic clip from ``bench_detection.py`` is used.
+
+Run from the repo root:
+    python benchmarks/bench_backends.py [SOURCE] [--model yolov8n.pt] [--threads 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_detection import synthetic_clip  # noqa: E402
+from detection import MODEL_PATH, DetectionEngine  # noqa: E402
+from tracking import greedy_match, iou_matrix  # noqa: E402
+
+BACKENDS = "torch:fp32,onnx:fp32,onnx:fp16,onnx:int8,openvino:fp32,openvino:fp16,openvino:int8"
+MATCH_IOU = 0.5
+
+
+def read_frames(source, stride, count):
+    import cv2
+
+    cap = cv2.VideoCapture(source)
+    frames = []
+    index = 0
+    while len(frames) < count:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if index % stride == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+def agreement(reference, boxes, engine):
+    """Box F1 against ``reference`` and mean absolute per-frame count error."""
+    matched = found = expected = 0
+    errors = []
+    for ref, det in zip(reference, boxes):
+        ref, det = ref[ref[:, 4] >= engine.conf], det[det[:, 4] >= engine.conf]
+        iou = iou_matrix(ref[:, :4], det[:, :4])
+        iou[ref[:, 5, None] != det[None, :, 5]] = 0
+        matched += len(greedy_match(iou, MATCH_IOU))
+        found += len(det)
+        expected += len(ref)
+        errors.append(abs(len(det) - len(ref)))
+    f1 = 2 * matched / (found + expected) if found + expected else float("nan")
+    return f1, float(np.mean(errors))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", nargs="?")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--backends", default=BACKENDS)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--stride", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=120)
+    args = parser.parse_args()
+
+    source = args.source or synthetic_clip()
+    frames = read_frames(source, args.stride, args.frames)
+    print(f"source={source} frames={len(frames)} model={args.model} batch={args.batch} "
+          f"threads={args.threads or 'default'}")
+
+    reference = None
+    for spec in args.backends.split(","):
+        backend, precision = spec.split(":")
+        engine = DetectionEngine(args.model, batch_size=args.batch, backend=backend, precision=precision,
+                                 threads=args.threads)
+        try:
+            engine.warm_up()
+        except Exception as e:
+            print(f"{spec:<14} skipped: {type(e).__name__}: {e}")
+            continue
+
+        boxes = []
+        start = time.perf_counter()
+        for i in range(0, len(frames), args.batch):
+            boxes += engine.infer_boxes(frames[i:i + args.batch])
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            reference, baseline = boxes, spec
+        f1, count_error = agreement(reference, boxes, engine)
+        print(f"{spec:<14} load={engine.warmup_seconds:6.1f} s  fps={len(frames) / elapsed:6.1f}  "
+              f"F1 vs {baseline}={f1:.3f}  count error={count_error:.3f}/frame")
+
+
+if __name__ == "__main__":
+    main()
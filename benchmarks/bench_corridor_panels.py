@@ -0,0 +1,81 @@
+"""Requests and payload bytes per refresh tick for the corridor panels.
+
+Drives ``/_dash-update-component`` through the Flask test client.  The
+"before" row splits the combined response into the five single-output
+responses the old per-panel callbacks returned, so both rows carry the
+same rendered content.
+
+Run from the repo root:  python benchmarks/bench_corridor_panels.py
+"""
+
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_metrics_store import CAM, setup_workdir  # noqa: E402
+
+TICKS = 50
+PANELS = [
+    ("traffic-advice-box", "children"),
+    ("eta-content", "children"),
+    ("delay-content", "children"),
+    ("alt-route-content", "children"),
+    ("bus-perf-content", "children"),
+]
+
+
+def request_body(outputs, n):
+    return {
+        "output": "..{}..".format("...".join(f"{i}.{p}" for i, p in outputs))
+        if len(outputs) > 1 else f"{outputs[0][0]}.{outputs[0][1]}",
+        "outputs": [{"id": i, "property": p} for i, p in outputs]
+        if len(outputs) > 1 else {"id": outputs[0][0], "property": outputs[0][1]},
+        "inputs": [
+            {"id": "refresh", "property": "n_intervals", "value": n},
+            {"id": "camera-select", "property": "value", "value": CAM},
+            {"id": "push-metrics", "property": "data", "value": None},
+        ],
+        "changedPropIds": ["refresh.n_intervals"],
+        "state": [],
+    }
+
+
+def main():
+    app = setup_workdir("panels-bench-")
+
+    client = app.app.server.test_client()
+    client.get("/")  # first request initialises the callback map
+
+    req_bytes = resp_bytes = legacy_req_bytes = legacy_resp_bytes = 0
+    start = time.perf_counter()
+    for n in range(TICKS):
+        body = json.dumps(request_body(PANELS, n))
+        resp = client.post("/_dash-update-component", data=body,
+                           content_type="application/json")
+        assert resp.status_code == 200, resp.data[:200]
+        req_bytes += len(body)
+        resp_bytes += len(resp.data)
+
+        # what the five separate callbacks would have exchanged
+        combined = json.loads(resp.data)["response"]
+        for panel in PANELS:
+            legacy_req_bytes += len(json.dumps(request_body([panel], n)))
+            legacy_resp_bytes += len(json.dumps(
+                {"multi": True, "response": {panel[0]: combined[panel[0]]}}
+            ))
+    elapsed = time.perf_counter() - start
+
+    print(f"{TICKS} ticks, camera {CAM}")
+    print(f"before requests/tick=5  request B/tick={legacy_req_bytes / TICKS:8.0f}  "
+          f"response B/tick={legacy_resp_bytes / TICKS:8.0f}")
+    print(f"after  requests/tick=1  request B/tick={req_bytes / TICKS:8.0f}  "
+          f"response B/tick={resp_bytes / TICKS:8.0f}  "
+          f"server ms/tick={elapsed / TICKS * 1000:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
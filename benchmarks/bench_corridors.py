@@ -0,0 +1,102 @@
+"""Corridor overview cost: incremental tiles vs re-aggregating raw samples.
+
+Replays a day of corridor sampler output for every camera in
+``CAMERA_STREAM_GROUPS`` (4 frames per camera every 30 s) into
+``CorridorTiles`` in memory.  It reports:
+
+* fold: µs to fold one 4-row sampler batch into the tiles,
+* grid: ms to build the 3 h heatmap grid after a new batch, when unchanged,
+  and the first build (every tile summarised once),
+* raw: ms to build the same grid by grouping the raw samples of the window
+  with pandas on every tick (what rendering from raw samples would cost).
+
+Run from the repo root:  python benchmarks/bench_corridors.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_metrics_store import setup_workdir  # noqa: E402
+from corridors import CorridorTiles  # noqa: E402
+from timeseries import RECORD_DTYPE  # noqa: E402
+
+SAMPLER_NS = 30 * 10**9
+FRAMES = 4
+DAY_ROUNDS = 24 * 3600 * 10**9 // SAMPLER_NS
+OVERVIEW_TILES = 36
+
+
+def batch(ts, rng):
+    rows = np.empty(FRAMES, dtype=RECORD_DTYPE)
+    rows["ts"] = ts + np.arange(FRAMES) * 10**9 // 5
+    rows["cars"] = rng.poisson(15, FRAMES)
+    rows["buses"] = rows["trucks"] = 0
+    return rows
+
+
+def main():
+    app = setup_workdir("corridor-bench-", rows=0)
+    groups = app.CAMERA_URL_TO_GROUP
+    cameras = list(groups)
+    rng = np.random.default_rng(1)
+    now = time.time_ns()
+    start = now - DAY_ROUNDS * SAMPLER_NS
+
+    tiles = CorridorTiles(groups)
+    raw = []
+    folds = 0
+    t0 = time.perf_counter()
+    for r in range(DAY_ROUNDS):
+        for url in cameras:
+            rows = batch(start + r * SAMPLER_NS, rng)
+            tiles.update(url, rows)
+            raw.append((url, rows))
+            folds += 1
+    fold_us = (time.perf_counter() - t0) / folds * 1e6
+
+    t0 = time.perf_counter()
+    tiles.grid(OVERVIEW_TILES, now)
+    first_ms = (time.perf_counter() - t0) * 1000
+    # steady state: one new batch dirties one tile
+    tiles.update(cameras[0], batch(now - SAMPLER_NS, rng))
+    t0 = time.perf_counter()
+    tiles.grid(OVERVIEW_TILES, now)
+    dirty_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    for _ in range(100):
+        tiles.grid(OVERVIEW_TILES, now)
+    cached_ms = (time.perf_counter() - t0) / 100 * 1000
+
+    # raw: every tick regroups the window's samples
+    frame = pd.DataFrame({
+        "camera": np.repeat([url for url, _ in raw], FRAMES),
+        "ts": np.concatenate([rows["ts"] for _, rows in raw]),
+        "cars": np.concatenate([rows["cars"] for _, rows in raw]),
+    })
+    frame["corridor"] = frame["camera"].map(groups)
+    tile_ns = tiles.tile_ns
+    lo = (now // tile_ns - OVERVIEW_TILES + 1) * tile_ns
+    t0 = time.perf_counter()
+    window = frame[frame["ts"] >= lo]
+    per_camera = window.assign(tile=window["ts"] // tile_ns).groupby(["corridor", "tile", "camera"])["cars"].mean()
+    raw_grid = per_camera.groupby(["corridor", "tile"]).agg(["sum", lambda s: s.quantile(0.9)])
+    raw_ms = (time.perf_counter() - t0) * 1000
+
+    _, _, total, _, _, _ = tiles.grid(OVERVIEW_TILES, now)
+    check = np.isclose(np.nansum(total), raw_grid["sum"].sum(), rtol=1e-3)
+
+    print(f"{len(cameras)} cameras, {folds} sampler batches ({len(frame)} samples), {OVERVIEW_TILES} tiles shown")
+    print(f"fold   {fold_us:7.1f} µs/batch")
+    print(f"grid   {dirty_ms:7.2f} ms after a new batch, {cached_ms:.4f} ms unchanged, {first_ms:.2f} ms first build")
+    print(f"raw    {raw_ms:7.2f} ms per tick from {len(window)} raw samples   totals match: {check}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Decode cost per HLS segment: OpenCV vs ffmpeg at reduced resolution / keyframes.
+
+Renders ``SEGMENTS`` 2 s, 25 fps H.264 segments at 1280x720, with one
+keyframe per segment like the NYSDOT cameras, or decodes the segment
+files given on the command line.  Each mode decodes every segment the
+way ``detection`` does:
+
+* opencv: OpenCV, full resolution, every ``--stride``-th frame (the old path),
+* ffmpeg WxH: ``decode.decode_segment`` with ``select`` + ``scale``,
+* keyframes: ``-skip_frame nokey``, the corridor sampler's mode.
+
+Reported: frames kept per segment, their size, wall ms and CPU ms per
+segment.  CPU includes the ffmpeg child processes.  Needs ``ffmpeg`` on
+PATH (or ``FFMPEG_BINARY``).  ``--container mkv`` renders Matroska
+instead of MPEG-TS, for ffmpeg builds that can't demux TS from a pipe.
+
+Run from the repo root:
+    python benchmarks/bench_decode.py [SEGMENT ...] [--stride 5] [--container ts]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from decode import FFMPEG_BINARY, SegmentDecoder  # noqa: E402
+from detection import _segment_frames  # noqa: E402
+
+SEGMENTS = 5
+SEGMENT_SECONDS = 2
+FPS = 25
+SIZE = "1280x720"
+
+
+def render_segments(container):
+    root = tempfile.mkdtemp(prefix="decode-bench-")
+    paths = []
+    for s in range(SEGMENTS):
+        path = os.path.join(root, f"{s}.{container}")
+        subprocess.run([FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+                        "-f", "lavfi", "-i", f"testsrc2=size={SIZE}:rate={FPS}",
+                        "-ss", str(s * SEGMENT_SECONDS), "-t", str(SEGMENT_SECONDS),
+                        "-c:v", "libx264", "-preset", "veryfast", "-g", str(SEGMENT_SECONDS * FPS),
+                        "-f", "matroska" if container == "mkv" else "mpegts", path], check=True)
+        paths.append(path)
+    return paths
+
+
+def cpu_seconds():
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def run(label, segments, stride, decoder):
+    kept = 0
+    shape = None
+    wall = cpu = 0.0
+    for data in segments:
+        start, start_cpu = time.perf_counter(), cpu_seconds()
+        frames = list(_segment_frames(data, stride, time.monotonic() + 60, decoder))
+        wall += time.perf_counter() - start
+        cpu += cpu_seconds() - start_cpu
+        kept += len(frames)
+        shape = frames[0][2].shape if frames else shape
+    n = len(segments)
+    size = f"{shape[1]}x{shape[0]}" if shape else "-"
+    print(f"{label:<22} frames/segment={kept / n:5.1f}  {size:>9}  wall={wall / n * 1000:6.1f} ms  "
+          f"cpu={cpu / n * 1000:6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("segments", nargs="*")
+    parser.add_argument("--stride", type=int, default=5)
+    parser.add_argument("--container", choices=("ts", "mkv"), default="ts")
+    args = parser.parse_args()
+
+    paths = args.segments or render_segments(args.container)
+    segments = []
+    for path in paths:
+        with open(path, "rb") as f:
+            segments.append(f.read())
+
+    print(f"{len(segments)} segments, stride {args.stride}")
+    run("opencv full size", segments, args.stride, None)
+    run("ffmpeg full size", segments, args.stride, SegmentDecoder(width=0))
+    run("ffmpeg 640 wide", segments, args.stride, SegmentDecoder(width=640))
+    run("ffmpeg 640 keyframes", segments, args.stride, SegmentDecoder(width=640, keyframes=True))
+    run("ffmpeg 320 keyframes", segments, args.stride, SegmentDecoder(width=320, keyframes=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Detection throughput for different frame strides and batch sizes.
+
+Works offline: pass a local video file or a local HLS ``.m3u8`` stand-in
+(e.g. made with ``ffmpeg -i clip.mp4 -f hls -hls_time 2 playlist.m3u8``).
+Without an argument a synthetic clip is rendered to a temp file.
+
+Run from the repo root:
+    python benchmarks/bench_detection.py [SOURCE] [--model yolov8n.pt]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from detection import DetectionEngine, MODEL_PATH, load_model  # noqa: E402
+
+
+def synthetic_clip(seconds=10, fps=30, size=(640, 360)):
+    import cv2
+
+    path = os.path.join(tempfile.mkdtemp(prefix="detect-bench-"), "clip.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    w, h = size
+    for i in range(seconds * fps):
+        frame = np.full((h, w, 3), 60, dtype=np.uint8)
+        for lane in range(4):
+            x = (i * (4 + lane) + lane * 150) % w
+            y = 60 + lane * 70
+            cv2.rectangle(frame, (x, y), (x + 70, y + 40), (200, 200, 200), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", nargs="?")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--strides", default="1,5,10")
+    parser.add_argument("--batches", default="1,8")
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args()
+
+    source = args.source or synthetic_clip()
+    load_model(args.model)  # keep model load out of the timings
+
+    print(f"source={source} model={args.model}")
+    for stride in map(int, args.strides.split(",")):
+        for batch in map(int, args.batches.split(",")):
+            engine = DetectionEngine(args.model, frame_stride=stride, batch_size=batch)
+            start = time.perf_counter()
+            records = engine.detect(source, max_seconds=600, max_frames=args.frames)
+            elapsed = time.perf_counter() - start
+            cars = np.mean([r["cars"] for r in records]) if records else 0.0
+            print(f"stride={stride:<3} batch={batch:<3} frames={len(records):<4} "
+                  f"inferred fps={len(records) / elapsed:7.2f}  "
+                  f"source fps covered={len(records) * stride / elapsed:7.2f}  "
+                  f"mean cars={cars:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
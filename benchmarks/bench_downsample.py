@@ -0,0 +1,84 @@
+"""Figure size and render cost for long histories, raw vs downsampled.
+
+For each history length, "raw" is the figure ``px.line`` builds from every
+point (what the graph shipped before downsampling).  "downsampled" is the
+figure ``metrics_figure`` builds from the snapshot's min/max pyramid for
+an 800 px plot.  "zoom" posts a relayout event for the middle 1% of the
+history to ``/_dash-update-component``, like a browser drag-zoom.  A single
+spike is planted in each history to check that it survives.
+
+Run from the repo root:  python benchmarks/bench_downsample.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("METRICS_HISTORY_POINTS", "1000000")
+
+from bench_metrics_store import CAM, post_metrics, setup_workdir  # noqa: E402
+
+SPIKE = 300
+WIDTH = 800
+
+
+def seed(app, rows):
+    rng = np.random.default_rng(rows)
+    start = pd.Timestamp.now(tz="UTC").floor("h")
+    cars = rng.poisson(12, rows)
+    cars[rows // 3] = SPIKE
+    records = [
+        {"ts": (start + pd.Timedelta(seconds=i)).isoformat(), "cars": int(c), "buses": i % 3, "trucks": i % 5}
+        for i, c in enumerate(cars)
+    ]
+    app.save_records(CAM, records)
+
+
+def main():
+    app = setup_workdir("downsample-bench-", rows=0)
+    client = app.app.server.test_client()
+    client.get("/")
+
+    print(f"{'points':>8} {'raw KB':>8} {'raw ms':>8} {'ds KB':>7} {'ds ms':>7} "
+          f"{'pyramid ms':>11} {'zoom KB':>8} {'zoom ms':>8} {'spike kept':>11}")
+    total = 0
+    for rows in (10_000, 100_000, 1_000_000):
+        seed(app, rows - total)
+        total = rows
+        snap = app.METRICS_STORE.snapshot(CAM)
+
+        t0 = time.perf_counter()
+        raw = px.line(snap.frame(), x="ts", y=["cars", "buses", "trucks"], markers=True).to_json()
+        raw_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        snap.pyramid()
+        pyramid_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        fig = app.metrics_figure(snap, app.point_budget(WIDTH))
+        ds = fig.to_json()
+        ds_ms = (time.perf_counter() - t0) * 1000
+        kept = SPIKE in fig.data[0].y
+
+        ts = snap.ts
+        lo, hi = ts[int(rows * 0.495)], ts[int(rows * 0.505)]
+        relayout = {"xaxis.range[0]": str(lo), "xaxis.range[1]": str(hi)}
+        t0 = time.perf_counter()
+        zoom_bytes, _, _ = post_metrics(client, 0, app.metrics_cursor(CAM, snap), "metrics-graph.relayoutData",
+                                        relayout=relayout, width=WIDTH)
+        zoom_ms = (time.perf_counter() - t0) * 1000
+
+        print(f"{rows:>8} {len(raw) / 1024:>8.0f} {raw_ms:>8.0f} {len(ds) / 1024:>7.0f} {ds_ms:>7.1f} "
+              f"{pyramid_ms:>11.0f} {zoom_bytes / 1024:>8.0f} {zoom_ms:>8.1f} {str(kept):>11}")
+
+
+if __name__ == "__main__":
+    main()
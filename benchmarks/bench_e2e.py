@@ -0,0 +1,228 @@
+"""End-to-end dashboard load test: concurrent clients against the callback endpoint.
+
+Starts the real app on a local port, with weather and news pointed at local
+stubs and history seeded by ``synthetic.SyntheticTraffic``.  Each simulated
+client is a thread with its own HTTP session.  It posts to
+``/_dash-update-component`` what a browser tab posts on every ``refresh``
+tick:
+
+* ``update_metrics``, carrying its ``metrics-cursor`` between ticks,
+* ``update_corridor_panels``,
+* ``update_corridor_overview``, carrying its ``corridor-cursor``,
+* and, every 120th / 360th tick, ``update_weather`` / ``update_news``.
+
+Clients fire ticks back to back (closed loop), and a writer appends a new
+sample to every watched camera twice a second.  The app runs in its own
+process so the client threads don't compete with it for the GIL.  Each
+history size uses its own set of cameras.  Reported per run: p50/p99
+latency per request, throughput, the server's RSS, and its RSS growth
+per client.
+
+Run from the repo root:  python benchmarks/bench_e2e.py
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+from werkzeug.serving import make_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bench_upstream_cache  # noqa: E402
+from bench_feed_cache import FEEDS, FeedHandler  # noqa: E402
+from bench_upstream_cache import StubHandler, start_stub  # noqa: E402
+
+HISTORIES = (1_000, 10_000, 100_000)
+CLIENTS = (1, 8, 32)
+CAMERAS_PER_RUN = 8
+RUN_SECONDS = 5
+# weather / news fire once per 120 / 360 refresh ticks (10 min / 30 min vs 5 s)
+WEATHER_TICKS = 120
+NEWS_TICKS = 360
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def body(outputs, inputs, state, changed):
+    return json.dumps({
+        "output": "..{}..".format("...".join(f"{i}.{p}" for i, p in outputs))
+        if len(outputs) > 1 else f"{outputs[0][0]}.{outputs[0][1]}",
+        "outputs": [{"id": i, "property": p} for i, p in outputs]
+        if len(outputs) > 1 else {"id": outputs[0][0], "property": outputs[0][1]},
+        "inputs": [{"id": i, "property": p, "value": v} for i, p, v in inputs],
+        "state": [{"id": i, "property": p, "value": v} for i, p, v in state],
+        "changedPropIds": [changed],
+    })
+
+
+class Client(threading.Thread):
+
+    def __init__(self, base, camera, deadline):
+        super().__init__(daemon=True)
+        self.url = base + "/_dash-update-component"
+        self.camera = camera
+        self.deadline = deadline
+        self.session = requests.Session()
+        self.latencies = []
+        self.bytes = 0
+        self.errors = 0
+
+    def post(self, payload):
+        start = time.perf_counter()
+        resp = self.session.post(self.url, data=payload, headers={"Content-Type": "application/json"})
+        self.latencies.append(time.perf_counter() - start)
+        self.bytes += len(resp.content)
+        if resp.status_code not in (200, 204):
+            self.errors += 1
+            return {}
+        return json.loads(resp.content)["response"] if resp.status_code == 200 else {}
+
+    def run(self):
+        cursor = overview = None
+        tick = 0
+        while time.monotonic() < self.deadline:
+            changed = "camera-select.value" if tick == 0 else "refresh.n_intervals"
+            out = self.post(body(
+                [("metrics-graph", "figure"), ("metrics-graph", "extendData"), ("metrics-cursor", "data")],
+                [("refresh", "n_intervals", tick), ("camera-select", "value", self.camera),
+                 ("metrics-graph", "relayoutData", None), ("push-metrics", "data", None)],
+                [("metrics-cursor", "data", cursor), ("graph-width", "data", 800)],
+                changed,
+            ))
+            cursor = out.get("metrics-cursor", {}).get("data", cursor)
+
+            self.post(body(
+                [("traffic-advice-box", "children"), ("eta-content", "children"), ("delay-content", "children"),
+                 ("alt-route-content", "children"), ("bus-perf-content", "children")],
+                [("refresh", "n_intervals", tick), ("camera-select", "value", self.camera),
+                 ("push-metrics", "data", None)],
+                [], changed,
+            ))
+
+            out = self.post(body(
+                [("corridor-heatmap", "figure"), ("corridor-status", "children"), ("corridor-cursor", "data")],
+                [("corridor-refresh", "n_intervals", tick), ("push-metrics", "data", None)],
+                [("corridor-cursor", "data", overview)], "corridor-refresh.n_intervals",
+            ))
+            overview = out.get("corridor-cursor", {}).get("data", overview)
+
+            if tick % WEATHER_TICKS == 0:
+                self.post(body([("weather-box", "children")],
+                               [("weather-refresh", "n_intervals", tick), ("push-weather", "data", None)],
+                               [], "weather-refresh.n_intervals"))
+            if tick % NEWS_TICKS == 0:
+                self.post(body([("news-box", "children")],
+                               [("news-refresh", "n_intervals", tick), ("push-news", "data", None)],
+                               [], "news-refresh.n_intervals"))
+            tick += 1
+
+
+def writer(app, traffic, cameras, stop):
+    while not stop.wait(0.5):
+        ts = np.array([time.time_ns()])
+        for url in cameras:
+            app.TIMESERIES.append(url, traffic.counts(url, ts))
+
+
+def serve(conn):
+    """Server process: the app, its stubs and the writer; driven over ``conn``."""
+    bench_upstream_cache.UPSTREAM_DELAY = 0
+    weather = start_stub(StubHandler)
+    news = start_stub(FeedHandler)
+    os.environ["WEATHER_URL"] = f"http://127.0.0.1:{weather.server_port}/Queens?format=j1"
+    os.environ["NEWS_FEED_URLS"] = ",".join(f"http://127.0.0.1:{news.server_port}{path}" for path in FEEDS)
+
+    from bench_metrics_store import setup_workdir
+    from synthetic import SyntheticTraffic
+
+    app = setup_workdir("e2e-bench-", rows=0)
+    app.WEATHER_CACHE.refresh()
+    for cache in app.NEWS_CACHE.caches.values():
+        cache.refresh()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app.app.server, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn.send((server.server_port, list(app.CAMERA_STREAMS.values())))
+
+    traffic = SyntheticTraffic(seed=1)
+    stop = threading.Event()
+    while True:
+        command, *args = conn.recv()
+        if command == "seed":
+            cameras, history = args
+            end = time.time_ns() - 10**9
+            traffic.seed_store(app.TIMESERIES, cameras, end - history * 10**9, end, step_seconds=1.0)
+        elif command == "write":
+            stop = threading.Event()
+            threading.Thread(target=writer, args=(app, traffic, args[0], stop), daemon=True).start()
+        elif command == "pause":
+            stop.set()
+        else:
+            server.shutdown()
+            conn.send(None)
+            return
+        conn.send(rss_mb())
+
+
+def main():
+    # clients run here, the server in its own process, so they don't share a GIL
+    ctx = multiprocessing.get_context("spawn")
+    conn, child_conn = ctx.Pipe()
+    proc = ctx.Process(target=serve, args=(child_conn,), daemon=True)
+    proc.start()
+    port, all_cameras = conn.recv()
+    base = f"http://127.0.0.1:{port}"
+    requests.get(base + "/")
+
+    def call(*command):
+        conn.send(command)
+        return conn.recv()
+
+    print(f"{'history':>8} {'clients':>7} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'KB/req':>7} {'server RSS MB':>14} {'MB/client':>10} {'errors':>6}")
+
+    for h, history in enumerate(HISTORIES):
+        cameras = all_cameras[h * CAMERAS_PER_RUN:(h + 1) * CAMERAS_PER_RUN]
+        call("seed", cameras, history)
+
+        for clients in CLIENTS:
+            rss_before = call("write", cameras)
+            deadline = time.monotonic() + RUN_SECONDS
+            threads = [Client(base, cameras[i % len(cameras)], deadline) for i in range(clients)]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            rss_after = call("pause")
+
+            latencies = np.array([lat for t in threads for lat in t.latencies]) * 1000
+            total_bytes = sum(t.bytes for t in threads)
+            errors = sum(t.errors for t in threads)
+            print(f"{history:>8} {clients:>7} {len(latencies) / elapsed:>8.0f} "
+                  f"{np.percentile(latencies, 50):>7.1f} {np.percentile(latencies, 99):>7.1f} "
+                  f"{total_bytes / len(latencies) / 1024:>7.1f} {rss_after:>14.0f} "
+                  f"{(rss_after - rss_before) / clients:>10.2f} {errors:>6}")
+
+    call("stop")
+    proc.join()
+
+
+if __name__ == "__main__":
+    main()
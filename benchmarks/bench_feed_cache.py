@@ -0,0 +1,94 @@
+"""News feed cache against a local RSS fixture server that honours ETags.
+
+Serves two fixture feeds, points ``NEWS_FEED_URLS`` at them and drives
+``update_news`` from many clients while forcing refreshes.  Unchanged
+feeds should cost a 304 and no re-parse.  Runs entirely offline.
+
+Run from the repo root:  python benchmarks/bench_feed_cache.py
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_upstream_cache import start_stub  # noqa: E402
+
+CLIENTS = 50
+REFRESHES = 10
+
+
+def rss(name, items=30):
+    entries = "".join(
+        f"<item><title>{name} story {i}</title><link>https://example.com/{name}/{i}</link>"
+        f"<pubDate>{formatdate(1_790_000_000 + i * 60, usegmt=True)}</pubDate></item>"
+        for i in range(items)
+    )
+    return (f'<?xml version="1.0"?><rss version="2.0"><channel><title>{name}</title>'
+            f"{entries}</channel></rss>").encode()
+
+
+FEEDS = {f"/{name}.xml": rss(name) for name in ("nyregion", "transit")}
+ETAG = '"fixture-v1"'
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    counts = {"200": 0, "304": 0, "bytes": 0}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        body = FEEDS[self.path]
+        with FeedHandler.lock:
+            if self.headers.get("If-None-Match") == ETAG:
+                FeedHandler.counts["304"] += 1
+                self.send_response(304)
+                self.end_headers()
+                return
+            FeedHandler.counts["200"] += 1
+            FeedHandler.counts["bytes"] += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = start_stub(FeedHandler)
+    base = f"http://127.0.0.1:{server.server_port}"
+    os.environ["NEWS_FEED_URLS"] = ",".join(base + path for path in FEEDS)
+
+    import app
+
+    for cache in app.NEWS_CACHE.caches.values():
+        cache.refresh()
+
+    with ThreadPoolExecutor(CLIENTS) as pool:
+        for tick in range(REFRESHES):
+            list(pool.map(app.update_news, [tick] * CLIENTS))
+            # what the background refreshers do once per TTL
+            for cache in app.NEWS_CACHE.caches.values():
+                cache.refresh()
+
+    parsed = sum(f.parsed for f in app.NEWS_CACHE.feeds.values())
+    calls = CLIENTS * REFRESHES
+    full = sum(len(body) for body in FEEDS.values())
+    print(f"{len(FEEDS)} feeds, {CLIENTS} clients x {REFRESHES} ticks = {calls} callbacks")
+    print(f"before fetches={calls * len(FEEDS)}  parses={calls * len(FEEDS)}  "
+          f"bytes={calls * full}")
+    print(f"after  200s={FeedHandler.counts['200']}  304s={FeedHandler.counts['304']}  "
+          f"parses={parsed}  bytes={FeedHandler.counts['bytes']}")
+    print("top entries:", [e["title"] for e in app.NEWS_CACHE.entries()][:3])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Cost of the callback instrumentation behind ``/metrics``.
+
+* record: µs to record one callback call (histogram bucket + counters).
+* wrapper: µs a timed no-op callback adds over the bare function.
+* endpoint: ms per ``update_metrics`` request through the real Dash
+  endpoint, instrumented vs with the original callback swapped back in.
+* scrape: ms to render ``/metrics`` with every callback populated.
+
+Run from the repo root:  python benchmarks/bench_instrumentation.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_metrics_store import post_metrics, setup_workdir  # noqa: E402
+from instrumentation import CallbackStats, Instrumentation  # noqa: E402
+
+CALLS = 200_000
+REQUESTS = 2_000
+
+
+def per_call_us(fn, calls=CALLS):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def requests_ms(client):
+    cursor = None
+    start = time.perf_counter()
+    for n in range(REQUESTS):
+        _, _, cursor = post_metrics(client, n, cursor, "refresh.n_intervals")
+    return (time.perf_counter() - start) / REQUESTS * 1000
+
+
+def main():
+    stats = CallbackStats()
+    print(f"record    {per_call_us(lambda: stats.record(0.003, size=1200)):6.2f} µs/call")
+
+    def bare():
+        return '{"response": {}}'
+
+    timed = Instrumentation._timed(bare, CallbackStats())
+    overhead = per_call_us(timed) - per_call_us(bare)
+    print(f"wrapper   {overhead:6.2f} µs/call over the bare function")
+
+    app = setup_workdir("instrumentation-bench-")
+    client = app.app.server.test_client()
+    entry = next(e for e in app.app.callback_map.values()
+                 if getattr(e.get("callback"), "__name__", "") == "update_metrics")
+    instrumented = entry["callback"]
+    requests_ms(client)  # warm up
+
+    timings = {}
+    for label, callback in (("plain", instrumented.__wrapped__), ("instrumented", instrumented)):
+        entry["callback"] = callback
+        timings[label] = requests_ms(client)
+    entry["callback"] = instrumented
+    delta = timings["instrumented"] - timings["plain"]
+    print(f"endpoint  {timings['plain']:6.3f} ms plain, {timings['instrumented']:.3f} ms instrumented "
+          f"({delta * 1000:+.1f} µs)")
+
+    start = time.perf_counter()
+    for _ in range(100):
+        body = client.get("/metrics").data
+    print(f"scrape    {(time.perf_counter() - start) / 100 * 1000:6.2f} ms for {len(body)} bytes, "
+          f"{len(app.INSTRUMENTATION.callbacks)} callbacks")
+
+
+if __name__ == "__main__":
+    main()
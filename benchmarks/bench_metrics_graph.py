@@ -0,0 +1,61 @@
+"""Bytes per refresh tick for the metrics graph against series length.
+
+Posts to ``/_dash-update-component`` like a browser would, carrying the
+``metrics-cursor`` store between ticks.  "before" is the size of the full
+figure the old callback shipped every tick.  "after" ticks alternate
+between one new detection point (an ``extendData`` delta) and no change
+(a 204 with an empty body).
+
+Run from the repo root:  python benchmarks/bench_metrics_graph.py
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("METRICS_HISTORY_POINTS", "20000")
+
+from bench_metrics_store import CAM, make_records, post_metrics, setup_workdir  # noqa: E402
+
+TICKS = 20
+
+
+def main():
+    app = setup_workdir("graph-bench-", rows=0)
+    client = app.app.server.test_client()
+    client.get("/")
+
+    print(f"{'points':>7} {'before B/tick':>14} {'after B/tick':>13} {'after (new pt)':>15} {'after (no change)':>18}")
+    total = 0
+    for length in (100, 1_000, 10_000):
+        app.save_records(CAM, make_records(length - total))
+        total = length
+
+        # first render: the client has no cursor yet, so it gets the full figure
+        full_bytes, _, cursor = post_metrics(client, 0, None, "camera-select.value")
+
+        sizes = {"new": [], "same": []}
+        for n in range(1, TICKS + 1):
+            if n % 2:
+                last = pd.Timestamp(app.METRICS_STORE.snapshot(CAM).ts[-1], tz="UTC")
+                app.save_records(CAM, [{"ts": (last + pd.Timedelta(seconds=1)).isoformat(),
+                                        "cars": 12, "buses": 1, "trucks": 2}])
+                total += 1
+                size, _, cursor = post_metrics(client, n, cursor, "refresh.n_intervals")
+                sizes["new"].append(size)
+            else:
+                size, _, cursor = post_metrics(client, n, cursor, "refresh.n_intervals")
+                sizes["same"].append(size)
+
+        after = (sum(sizes["new"]) + sum(sizes["same"])) / TICKS
+        print(f"{length:>7} {full_bytes:>14} {after:>13.0f} "
+              f"{sum(sizes['new']) / len(sizes['new']):>15.0f} "
+              f"{sum(sizes['same']) / len(sizes['same']):>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Metrics loads per refresh tick, before and after MetricsStore.
+
+"before" replays what the six refresh callbacks used to do: one
+``pd.read_csv("metrics.csv")`` each.  "after" drives the real callbacks,
+which share one snapshot loaded from the per-camera time-series store.
+
+Run from the repo root:  python benchmarks/bench_metrics_store.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TICKS = 50
+ROWS = 5_000
+CAM = "https://s7.nysdot.skyvdn.com:443/rtplive/R11_159/playlist.m3u8"
+METRICS_OUTPUTS = [("metrics-graph", "figure"), ("metrics-graph", "extendData"), ("metrics-cursor", "data")]
+
+
+def make_records(rows):
+    now = pd.Timestamp.now(tz="UTC")
+    return [
+        {"ts": (now + pd.Timedelta(seconds=i)).isoformat(),
+         "cars": 5 + i % 25, "buses": i % 3, "trucks": i % 5}
+        for i in range(rows)
+    ]
+
+
+def setup_workdir(prefix, rows=ROWS):
+    """Chdir into a fresh temp dir, seed CAM's history and import the app."""
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    os.chdir(workdir)
+    os.environ["TIMESERIES_ROOT"] = os.path.join(workdir, "timeseries")
+
+    import app
+
+    records = make_records(rows)
+    pd.DataFrame(records).to_csv("metrics.csv", index=False)
+    app.save_records(CAM, records)
+    return app
+
+
+def post_metrics(client, n, cursor, changed, relayout=None, width=800):
+    """Drive ``update_metrics`` the way the browser does; returns (bytes, response, cursor)."""
+    body = {
+        "output": "..{}..".format("...".join(f"{i}.{p}" for i, p in METRICS_OUTPUTS)),
+        "outputs": [{"id": i, "property": p} for i, p in METRICS_OUTPUTS],
+        "inputs": [
+            {"id": "refresh", "property": "n_intervals", "value": n},
+            {"id": "camera-select", "property": "value", "value": CAM},
+            {"id": "metrics-graph", "property": "relayoutData", "value": relayout},
+            {"id": "push-metrics", "property": "data", "value": None},
+        ],
+        "state": [
+            {"id": "metrics-cursor", "property": "data", "value": cursor},
+            {"id": "graph-width", "property": "data", "value": width},
+        ],
+        "changedPropIds": [changed],
+    }
+    resp = client.post("/_dash-update-component", data=json.dumps(body),
+                       content_type="application/json")
+    assert resp.status_code in (200, 204), resp.data[:300]
+    if resp.status_code == 204:
+        return 0, {}, cursor
+    payload = json.loads(resp.data)["response"]
+    return len(resp.data), payload, payload.get("metrics-cursor", {}).get("data", cursor)
+
+
+def legacy_tick():
+    for _ in range(6):
+        pd.read_csv("metrics.csv")
+
+
+def store_tick(app, client):
+    post_metrics(client, 0, None, "refresh.n_intervals")
+    app.update_corridor_panels(0, CAM)
+
+
+def run(label, tick, loads):
+    before = loads()
+    for _ in range(TICKS):
+        tick()
+    print(f"{label:<8} loads/tick={(loads() - before) / TICKS:5.2f}")
+
+
+def main():
+    app = setup_workdir("metrics-bench-")
+
+    calls = {"n": 0}
+    real_read_csv = pd.read_csv
+
+    def counting_read_csv(*args, **kwargs):
+        calls["n"] += 1
+        return real_read_csv(*args, **kwargs)
+
+    pd.read_csv = counting_read_csv
+
+    print(f"{ROWS} rows, {TICKS} ticks")
+    run("before", legacy_tick, lambda: calls["n"])
+    client = app.app.server.test_client()
+    run("after", lambda: store_tick(app, client), lambda: app.METRICS_STORE.load_count)
+
+
+if __name__ == "__main__":
+    main()
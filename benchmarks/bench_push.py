@@ -0,0 +1,110 @@
+"""Callback requests per client-minute: fixed polling vs pushed change events.
+
+Starts the app on a local port and opens a real ``/events`` stream.  A
+feeder replays a corridor sampler (every camera appended once per
+``SAMPLER_INTERVAL``) at ``SCALE``x speed, and the stream is read like
+``assets/push.js`` would.  Requests per client-minute are then:
+
+* before: every ``POLL_INTERVALS`` tick (5 s refresh, 10 min weather,
+  30 min news), times the callbacks it drives,
+* after:  the slowed ``PUSHED_INTERVALS`` ticks plus one round trip per
+  pushed event that reaches the client's camera / panel.
+
+Both include the corridor overview's own 5 s timer, which push doesn't slow.
+
+"idle" has no new detections; "sampling" runs the sampler replay.  The
+latency column is publish → event received on the stream.
+
+Run from the repo root:  python benchmarks/bench_push.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_metrics_store import CAM, make_records, setup_workdir  # noqa: E402
+
+SCALE = 10            # simulated seconds per real second
+SIM_SECONDS = 120
+SAMPLER_INTERVAL = 30
+# server callbacks each interval / push store drives
+CALLBACKS = {"refresh": 2, "corridor-refresh": 1, "weather-refresh": 1, "news-refresh": 1}
+PUSH_CALLBACKS = {"metrics": 2, "weather": 1, "news": 1}
+
+
+class StreamReader(threading.Thread):
+
+    def __init__(self, url):
+        super().__init__(daemon=True)
+        self.url = url
+        self.events = []  # (received_at, topic, key)
+
+    def run(self):
+        with requests.get(self.url, stream=True, timeout=(3, 60)) as resp:
+            topic = None
+            for line in resp.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    topic = line[len("event: "):]
+                elif line.startswith("data: ") and topic:
+                    key = requests.compat.json.loads(line[len("data: "):])["key"]
+                    self.events.append((time.monotonic(), topic, key))
+                    topic = None
+
+
+def polling_rate(app, intervals):
+    intervals = {**intervals, "corridor-refresh": app.POLL_INTERVALS["refresh"]}
+    return sum(60_000 / ms * CALLBACKS[id_] for id_, ms in intervals.items())
+
+
+def run(app, port, sampling):
+    reader = StreamReader(f"http://127.0.0.1:{port}/events")
+    reader.start()
+    time.sleep(0.3)
+
+    published = []
+    start = time.monotonic()
+    next_round = start
+    while time.monotonic() - start < SIM_SECONDS / SCALE:
+        if sampling and time.monotonic() >= next_round:
+            for url in app.CAMERA_STREAMS.values():
+                published.append((time.monotonic(), url))
+                app.save_records(url, make_records(1))
+            next_round += SAMPLER_INTERVAL / SCALE
+        time.sleep(0.01)
+    time.sleep(0.3)
+
+    mine = [(t, topic) for t, topic, key in reader.events
+            if topic != "metrics" or key == CAM]
+    pushed = sum(PUSH_CALLBACKS[topic] for _, topic in mine)
+    after = polling_rate(app, app.PUSHED_INTERVALS) + pushed / (SIM_SECONDS / 60)
+
+    sent = [t for t, url in published if url == CAM]
+    got = [t for t, topic, key in reader.events if topic == "metrics" and key == CAM]
+    lat = [(g - s) * 1000 for s, g in zip(sent, got)]
+    return after, len(reader.events), (sum(lat) / len(lat) if lat else float("nan"))
+
+
+def main():
+    app = setup_workdir("push-bench-", rows=10)
+    server = make_server("127.0.0.1", 0, app.app.server, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    before = polling_rate(app, app.POLL_INTERVALS)
+    print(f"{len(app.CAMERA_STREAMS)} cameras, {SIM_SECONDS}s simulated at {SCALE}x")
+    print(f"{'scenario':<9} {'before req/min':>15} {'after req/min':>14} {'events seen':>12} {'push latency ms':>16}")
+    for label, sampling in (("idle", False), ("sampling", True)):
+        after, seen, latency = run(app, server.server_port, sampling)
+        print(f"{label:<9} {before:>15.1f} {after:>14.1f} {seen:>12} {latency:>16.1f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Adaptive sampling rates vs fixed ones on a simulated corridor.
+
+An hour of simulated time, no cameras, no model.  A quarter of the
+cameras are volatile: their mean count jumps between light and heavy
+traffic every few minutes.  The rest drift slowly.  A visit reads
+``FRAMES`` Poisson frames around the camera's current mean and costs
+``VISIT_CPU_S`` CPU seconds on a ``CORES``-core box.  The hour is run
+twice: once quiet, and once with something else (the dashboard under
+load, say) taking ``BURST`` of the CPU from minute 20 to 40.  The fixed
+schedule visits every camera every ``INTERVAL`` s; the adaptive one runs
+``sampler.RateController`` on the same budgets.  Reported per schedule:
+
+* visits per camera per hour, volatile and steady,
+* staleness error: mean gap between the last sampled count and the true
+  mean, over time, volatile and steady,
+* minutes the CPU spent under the controller's target headroom.
+
+Run from the repo root:  python benchmarks/bench_rates.py
+"""
+
+import heapq
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sampler import SAMPLER_TARGET_HEADROOM, CameraBudget, RateController  # noqa: E402
+
+CAMERAS = 40
+VOLATILE = 10
+SECONDS = 3600
+INTERVAL = 30.0
+FRAMES = 4
+VISIT_CPU_S = 2.0
+CORES = 4
+BURST = (1200, 2400, 0.6)  # start, end, CPU share taken by something else
+NO_BURST = (0, 0, 0.0)
+STEP = 1.0
+
+
+def truth(rng):
+    """``(cameras, seconds)`` true mean counts."""
+    t = np.arange(int(SECONDS / STEP)) * STEP
+    means = np.empty((CAMERAS, len(t)))
+    for c in range(CAMERAS):
+        if c < VOLATILE:
+            # regime switches: light / heavy, every 2-6 minutes
+            level, mean = 0, np.empty(len(t))
+            edges = np.cumsum(rng.uniform(120, 360, size=40))
+            for i, s in enumerate(t):
+                level = int(np.searchsorted(edges, s)) % 2
+                mean[i] = (3, 20)[level]
+            means[c] = mean * rng.uniform(0.8, 1.2)
+        else:
+            means[c] = rng.uniform(4, 8) + np.sin(t / 1800 + rng.uniform(0, 6))
+    return means
+
+
+def simulate(means, controller, rng, burst):
+    budgets = {c: CameraBudget(frames=FRAMES, interval=INTERVAL) for c in range(CAMERAS)}
+    queue = [(c * INTERVAL / CAMERAS, c) for c in range(CAMERAS)]
+    heapq.heapify(queue)
+    last = {c: None for c in range(CAMERAS)}
+    visits = np.zeros(CAMERAS)
+    work = []  # visit times, for the CPU load
+    error = np.zeros(CAMERAS)
+    under = 0.0
+    clock = 0.0
+
+    def headroom():
+        recent = sum(1 for w in work if clock - w < INTERVAL) * VISIT_CPU_S / (INTERVAL * CORES)
+        background = burst[2] if burst[0] <= clock < burst[1] else 0.0
+        return max(0.0, 1.0 - recent - background)
+
+    if controller is not None:
+        controller.headroom = headroom
+    for step in range(means.shape[1]):
+        clock = step * STEP
+        while queue and queue[0][0] <= clock:
+            _, c = heapq.heappop(queue)
+            counts = rng.poisson(means[c, step], FRAMES)
+            records = [{"cars": int(n), "buses": 0, "trucks": 0} for n in counts]
+            last[c] = counts.mean()
+            visits[c] += 1
+            work.append(clock)
+            if controller is not None:
+                controller.observe(c, records)
+                controller.update(budgets, clock)
+            heapq.heappush(queue, (clock + budgets[c].period, c))
+        for c in range(CAMERAS):
+            if last[c] is not None:
+                error[c] += abs(last[c] - means[c, step]) * STEP
+        if headroom() < SAMPLER_TARGET_HEADROOM:
+            under += STEP
+    return visits * 3600 / SECONDS, error / SECONDS, under / 60
+
+
+def main():
+    means = truth(np.random.default_rng(1))
+    print(f"{CAMERAS} cameras ({VOLATILE} volatile), {SECONDS // 60} min, every {INTERVAL:.0f} s nominal, "
+          f"{VISIT_CPU_S} CPU s per visit on {CORES} cores")
+    print(f"{'':<6} {'schedule':<9} {'visits/h volatile':>18} {'steady':>7} {'error volatile':>15} {'steady':>7} "
+          f"{'min under headroom':>19}")
+    for name, burst in (("quiet", NO_BURST), ("burst", BURST)):
+        for label, controller in (("fixed", None), ("adaptive", RateController())):
+            visits, error, under = simulate(means, controller, np.random.default_rng(2), burst)
+            print(f"{name:<6} {label:<9} {visits[:VOLATILE].mean():18.1f} {visits[VOLATILE:].mean():7.1f} "
+                  f"{error[:VOLATILE].mean():15.2f} {error[VOLATILE:].mean():7.2f} {under:19.1f}")
+
+
+if __name__ == "__main__":
+    main()
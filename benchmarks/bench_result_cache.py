@@ -0,0 +1,143 @@
+"""Overlapping detection runs on one camera, with and without the result cache.
+
+Serves a local live HLS stand-in: a sliding three-segment playlist of
+2 s MPEG-TS segments rendered with OpenCV, advancing with the wall
+clock.  USERS people press "Run AI Detection" on it STAGGER seconds
+apart, and each run is a normal ``DetectionEngine.detect`` over the live
+edge.  Inference is a stand-in that sleeps ``INFER_MS`` per frame (about
+yolov8n on one core), so the bench needs no weights.  Reported per
+mode: records returned and their distinct timestamps, frames inferred,
+segments downloaded, mean run time and the cache hit rate.  Without the
+cache, runs that share a segment all record its frames (under the same
+timestamps); with it, each frame is recorded once.
+
+Run from the repo root:  python benchmarks/bench_result_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import detection  # noqa: E402
+from bench_upstream_cache import start_stub  # noqa: E402
+from detection import DetectionEngine  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+
+SEGMENT_SECONDS = 2
+FPS = 25
+WINDOW = 3
+USERS = 4
+STAGGER = 2.0
+RUN_SECONDS = 5
+INFER_MS = 40
+STAND_IN_MODEL = "stand-in"
+
+
+def render_segments(count=6, size=(320, 180)):
+    import cv2
+
+    root = tempfile.mkdtemp(prefix="hls-bench-")
+    w, h = size
+    for s in range(count):
+        # OpenCV warns about the MPEG-TS codec tag and falls back to a valid one
+        writer = cv2.VideoWriter(os.path.join(root, f"{s}.ts"), cv2.CAP_FFMPEG,
+                                 cv2.VideoWriter_fourcc(*"mp4v"), FPS, size)
+        for i in range(SEGMENT_SECONDS * FPS):
+            frame = np.full((h, w, 3), 40, dtype=np.uint8)
+            x = (s * SEGMENT_SECONDS * FPS + i) * 4 % w
+            cv2.rectangle(frame, (x, 70), (x + 40, 100), (220, 220, 220), -1)
+            writer.write(frame)
+        writer.release()
+    return root, count
+
+
+class LiveHandler(BaseHTTPRequestHandler):
+    root = None
+    rendered = 0
+    segments = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path.endswith(".m3u8"):
+            newest = int(time.time() // SEGMENT_SECONDS)
+            first = newest - WINDOW + 1
+            lines = ["#EXTM3U", f"#EXT-X-TARGETDURATION:{SEGMENT_SECONDS}", f"#EXT-X-MEDIA-SEQUENCE:{first}"]
+            for seq in range(first, newest + 1):
+                lines += [f"#EXTINF:{SEGMENT_SECONDS}.0,", f"seg{seq}.ts"]
+            body = ("\n".join(lines) + "\n").encode()
+        else:
+            seq = int(self.path.rsplit("seg", 1)[1].split(".")[0])
+            with open(os.path.join(LiveHandler.root, f"{seq % LiveHandler.rendered}.ts"), "rb") as f:
+                body = f.read()
+            with LiveHandler.lock:
+                LiveHandler.segments += 1
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInEngine(DetectionEngine):
+
+    def __init__(self, **kwargs):
+        super().__init__(model_path=STAND_IN_MODEL, **kwargs)
+        self.inferred = 0
+        self._lock = threading.Lock()
+
+    def infer_boxes(self, frames):
+        time.sleep(INFER_MS / 1000 * len(frames))
+        with self._lock:
+            self.inferred += len(frames)
+        return [np.array([[0.4, 0.4, 0.5, 0.5, 0.9, 2]], dtype=np.float32) for _ in frames]
+
+
+def run(label, url, cache):
+    engine = StandInEngine(cache=cache)
+    LiveHandler.segments = 0
+    durations = []
+    records = []
+
+    def user():
+        start = time.perf_counter()
+        records.extend(r["ts"] for r in engine.detect(url, max_seconds=RUN_SECONDS, max_frames=30))
+        durations.append(time.perf_counter() - start)
+
+    threads = []
+    for _ in range(USERS):
+        threads.append(threading.Thread(target=user))
+        threads[-1].start()
+        time.sleep(STAGGER)
+    for t in threads:
+        t.join()
+
+    hit_rate = f"{cache.hits / (cache.hits + cache.misses):.0%}" if cache and cache.hits + cache.misses else "-"
+    print(f"{label:<9} records={len(records):<4} distinct ts={len(set(records)):<4} inferred={engine.inferred:<4} "
+          f"segments downloaded={LiveHandler.segments:<3} mean run={np.mean(durations):5.2f} s  "
+          f"hit rate={hit_rate}")
+
+
+def main():
+    LiveHandler.root, LiveHandler.rendered = render_segments()
+    detection._models[STAND_IN_MODEL] = None  # detect() loads the model before capturing
+    server = start_stub(LiveHandler)
+    url = f"http://127.0.0.1:{server.server_port}/live/playlist.m3u8"
+
+    print(f"{USERS} runs of {RUN_SECONDS} s, {STAGGER:.0f} s apart, on one live camera; "
+          f"{INFER_MS} ms inference per frame")
+    run("no cache", url, None)
+    run("cache", url, ResultCache())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Cost of "last N points for camera X" as history grows.
+
+Compares a full ``pd.read_csv`` of a single metrics file against
+``TimeSeriesStore.tail`` over hourly binary segments.
+
+Run from the repo root:  python benchmarks/bench_timeseries.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from timeseries import RECORD_DTYPE, TimeSeriesStore  # noqa: E402
+
+CAM = "https://s7.nysdot.skyvdn.com:443/rtplive/R11_159/playlist.m3u8"
+TAIL = 500
+REPEAT = 20
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    for rows in (10_000, 100_000, 1_000_000):
+        workdir = tempfile.mkdtemp(prefix="ts-bench-")
+        store = TimeSeriesStore(os.path.join(workdir, "ts"))
+
+        data = np.zeros(rows, dtype=RECORD_DTYPE)
+        data["ts"] = pd.Timestamp("2026-01-01", tz="UTC").value + np.arange(rows) * 10**9
+        data["cars"] = np.arange(rows) % 30
+        store.append(CAM, data)
+
+        csv_path = os.path.join(workdir, "metrics.csv")
+        pd.DataFrame({
+            "ts": pd.to_datetime(data["ts"], utc=True).map(pd.Timestamp.isoformat),
+            "cars": data["cars"], "buses": data["buses"], "trucks": data["trucks"],
+        }).to_csv(csv_path, index=False)
+
+        csv_ms = timed(lambda: pd.read_csv(csv_path).tail(TAIL))
+        tail_ms = timed(lambda: store.tail(CAM, TAIL))
+        print(f"rows={rows:>9}  segments={len(store.segments(CAM)):>4}  "
+              f"read_csv+tail={csv_ms:8.2f} ms  store.tail({TAIL})={tail_ms:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
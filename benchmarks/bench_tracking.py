@@ -0,0 +1,101 @@
+"""Tracked flow vs per-frame counts on simulated detections with known truth.
+
+Vehicles arrive at random in two lanes each way.  They drive down the
+image (toward the camera) or up it (away) and take about ``TRANSIT_S``
+seconds to cross the view.  A detector sees them at 5 fps (stride 5 at
+25 fps).  It misses ``MISS`` of them, reports ``WEAK`` at low confidence
+and jitters every box.  Reported:
+
+* truth: vehicles that actually crossed the counting line each way, per min,
+* per-frame: the sum of per-frame counts per minute (what reading ``cars``
+  as "vehicles seen" gives),
+* tracked: ``FlowCounter``'s ``flow_in`` / ``flow_out``,
+* cost: µs per frame in the tracker, and the most tracks it held at once.
+
+Run from the repo root:  python benchmarks/bench_tracking.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tracking import FlowCounter  # noqa: E402
+
+FPS = 5
+SECONDS = 300
+RATE_PER_MIN = 24  # per direction
+TRANSIT_S = 3.0
+MISS = 0.10
+WEAK = 0.15
+JITTER = 0.004
+BOX = (0.06, 0.05)
+LANES = {"in": (0.15, 0.3), "out": (0.6, 0.75)}  # lane centres (x) per direction
+
+
+def simulate(rng):
+    vehicles = []  # (direction, lane x, entry time)
+    for direction, lanes in LANES.items():
+        t = 0.0
+        while True:
+            t += rng.exponential(60 / RATE_PER_MIN)
+            if t >= SECONDS - TRANSIT_S:
+                break
+            vehicles.append((direction, lanes[rng.integers(len(lanes))], t))
+    return vehicles
+
+
+def frame_detections(vehicles, t, rng):
+    rows = []
+    w, h = BOX
+    for direction, x, entry in vehicles:
+        progress = (t - entry) / TRANSIT_S
+        if not 0 <= progress <= 1:
+            continue
+        # bottom edge sweeps 0..1 (toward) or 1..0 (away)
+        bottom = progress if direction == "in" else 1 - progress
+        if rng.random() < MISS:
+            continue
+        conf = rng.uniform(0.15, 0.34) if rng.random() < WEAK else rng.uniform(0.5, 0.95)
+        box = np.array([x - w / 2, bottom - h, x + w / 2, bottom]) + rng.normal(0, JITTER, 4)
+        rows.append([*box, conf, 2])
+    return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+
+def main():
+    rng = np.random.default_rng(3)
+    vehicles = simulate(rng)
+    truth = {d: sum(1 for v in vehicles if v[0] == d) / (SECONDS / 60) for d in LANES}
+
+    counter = FlowCounter(classes={2: "cars"})
+    per_frame = 0
+    peak_tracks = 0
+    elapsed = 0.0
+    frames = SECONDS * FPS
+    counts = {}
+    for i in range(frames):
+        t = i / FPS
+        detections = frame_detections(vehicles, t, rng)
+        per_frame += int((detections[:, 4] >= 0.35).sum())
+        start = time.perf_counter()
+        counts = counter.update(detections, t)
+        elapsed += time.perf_counter() - start
+        peak_tracks = max(peak_tracks, len(counter.tracker.tracks))
+
+    minutes = SECONDS / 60
+    print(f"{len(vehicles)} vehicles over {SECONDS} s at {FPS} fps, miss {MISS:.0%}, weak {WEAK:.0%}")
+    print(f"truth      in {truth['in']:5.1f}/min   out {truth['out']:5.1f}/min")
+    print(f"per-frame  {per_frame / minutes:5.1f} detections/min in total "
+          f"({per_frame / minutes / sum(truth.values()):.1f}x the true flow)")
+    print(f"tracked    in {counts['flow_in']:5.1f}/min   out {counts['flow_out']:5.1f}/min   "
+          f"error {abs(counts['flow_in'] - truth['in']) / truth['in']:.1%} / "
+          f"{abs(counts['flow_out'] - truth['out']) / truth['out']:.1%}")
+    print(f"cost       {elapsed / frames * 1e6:5.0f} µs/frame, at most {peak_tracks} tracks held")
+
+
+if __name__ == "__main__":
+    main()
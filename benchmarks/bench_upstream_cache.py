@@ -0,0 +1,94 @@
+"""Upstream calls and callback latency for the weather panel under many clients.
+
+Starts a local stub of wttr.in that answers slowly and counts requests,
+points ``WEATHER_URL`` at it, then fires ``update_weather`` from many
+concurrent "clients".  Runs entirely offline.
+
+Run from the repo root:  python benchmarks/bench_upstream_cache.py
+"""
+
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CLIENTS = 50
+TICKS = 5
+UPSTREAM_DELAY = 0.5
+
+WEATHER_BODY = json.dumps({"current_condition": [{
+    "temp_F": "61", "windspeedMiles": "9",
+    "weatherDesc": [{"value": "Partly cloudy"}],
+}]}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    hits = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.hits += 1
+        time.sleep(UPSTREAM_DELAY)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(WEATHER_BODY)))
+        self.end_headers()
+        self.wfile.write(WEATHER_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    server = start_stub(StubHandler)
+    os.environ["WEATHER_URL"] = f"http://127.0.0.1:{server.server_port}/Queens?format=j1"
+
+    import app
+
+    app.WEATHER_CACHE.refresh()  # the background refresher would prime it at startup
+
+    calls = CLIENTS * TICKS
+    print(f"{CLIENTS} clients x {TICKS} ticks = {calls} callbacks")
+    print(f"before          upstream calls={calls}  callback latency >= {UPSTREAM_DELAY * 1000:.0f} ms each")
+    run("after (fresh)", app, lambda: None)
+    # every read sees a stale value: served instantly, one refresh in flight at a time
+    app.WEATHER_CACHE.ttl = 0
+    run("after (stale)", app, lambda: time.sleep(0.2))
+
+
+def run(label, app, between_ticks):
+    StubHandler.hits = 0
+    latencies = []
+
+    def client(tick):
+        start = time.perf_counter()
+        app.update_weather(tick)
+        latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(CLIENTS) as pool:
+        for tick in range(TICKS):
+            list(pool.map(client, [tick] * CLIENTS))
+            between_ticks()
+
+    latencies.sort()
+    print(f"{label:<15} upstream calls={StubHandler.hits}  "
+          f"p50={statistics.median(latencies) * 1000:.3f} ms  "
+          f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Concurrency stress test: one writer, many readers, no torn reads.
+
+The writer process appends batches of ``BATCH`` rows where every row in a
+batch carries the batch number in ``cars`` and its position in ``trucks``.
+Reader processes hammer ``tail()``, ``range()`` and ``version()`` and check
+that every batch they see is complete and in order.  Any violation means
+a reader observed a partially published write.
+
+First, a batch older than the rows already stored (a late sampler worker)
+is appended after a newer one; the stored rows must stay sorted, with the
+late rows counted and dropped.
+
+Run from the repo root:
+    python benchmarks/stress_timeseries.py [--readers 8] [--seconds 10]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from timeseries import RECORD_DTYPE, SEGMENT_NS, TimeSeriesStore  # noqa: E402
+
+CAM = "https://s7.nysdot.skyvdn.com:443/rtplive/R11_159/playlist.m3u8"
+BATCH = 37
+# spread batches so segments roll over every few batches
+STEP_NS = SEGMENT_NS // (BATCH * 5)
+
+
+def writer(root, seconds, batches):
+    store = TimeSeriesStore(root)
+    deadline = time.monotonic() + seconds
+    n = 0
+    while time.monotonic() < deadline:
+        rows = np.zeros(BATCH, dtype=RECORD_DTYPE)
+        rows["ts"] = (n * BATCH + np.arange(BATCH)) * STEP_NS
+        rows["cars"] = n
+        rows["trucks"] = np.arange(BATCH)
+        store.append(CAM, rows)
+        n += 1
+    batches.value = n
+
+
+def check(rows, allow_partial_head):
+    if not len(rows):
+        return 0
+    errors = 0
+    if np.any(np.diff(rows["ts"]) <= 0):
+        errors += 1
+    batch_ids, starts, counts = np.unique(rows["cars"], return_index=True, return_counts=True)
+    for i, (b, start, count) in enumerate(zip(batch_ids, starts, counts)):
+        positions = rows["trucks"][start:start + count]
+        head = i == 0 and allow_partial_head
+        expected = np.arange(BATCH - count, BATCH) if head else np.arange(BATCH)
+        if count != len(expected) or not np.array_equal(positions, expected):
+            errors += 1
+    return errors
+
+
+def reader(root, seconds, results):
+    store = TimeSeriesStore(root)
+    deadline = time.monotonic() + seconds
+    reads = errors = 0
+    last_version = None
+    while time.monotonic() < deadline:
+        version = store.version(CAM)
+        if version is not None and last_version is not None and version < last_version:
+            errors += 1
+        last_version = version or last_version
+
+        errors += check(store.tail(CAM, 5 * BATCH + 3), allow_partial_head=True)
+        # whole-batch window: a partially published batch shows up as a short group
+        errors += check(store.range(CAM, 0, 1 << 62), allow_partial_head=False)
+        reads += 2
+    results.put((reads, errors))
+
+
+def check_late(root):
+    store = TimeSeriesStore(root)
+    newer = np.zeros(BATCH, dtype=RECORD_DTYPE)
+    newer["ts"] = (BATCH + np.arange(BATCH)) * STEP_NS
+    older = np.zeros(2 * BATCH, dtype=RECORD_DTYPE)
+    # reaches back behind the stored rows and past them
+    older["ts"] = (BATCH // 2 + np.arange(2 * BATCH)) * STEP_NS
+    store.append(CAM, newer)
+    written = store.append(CAM, older)
+
+    rows = store.range(CAM, 0, 1 << 62)
+    # newer, plus the older batch's rows past its end
+    errors = int(np.any(np.diff(rows["ts"]) <= 0))
+    errors += int(written != BATCH // 2 or len(rows) != BATCH + BATCH // 2)
+    # a fresh store (after a restart) finds the newest row on disk
+    errors += int(TimeSeriesStore(root).append(CAM, older) != 0)
+    errors += int(store.late_rows != 2 * BATCH - written)
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    late_errors = check_late(os.path.join(tempfile.mkdtemp(prefix="ts-late-"), "ts"))
+    print(f"out-of-order append errors={late_errors}")
+
+    root = os.path.join(tempfile.mkdtemp(prefix="ts-stress-"), "ts")
+    results = multiprocessing.Queue()
+    batches = multiprocessing.Value("i", 0)
+
+    procs = [multiprocessing.Process(target=writer, args=(root, args.seconds, batches))]
+    procs += [multiprocessing.Process(target=reader, args=(root, args.seconds, results))
+              for _ in range(args.readers)]
+    for p in procs:
+        p.start()
+    stats = [results.get() for _ in range(args.readers)]
+    for p in procs:
+        p.join()
+
+    reads = sum(r for r, _ in stats)
+    errors = sum(e for _, e in stats)
+    print(f"writer batches={batches.value}  readers={args.readers}  "
+          f"reads={reads}  torn/partial reads={errors}")
+    sys.exit(1 if errors or late_errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Shared stale-while-revalidate cache for slow upstreams (weather, news).
+
+Callbacks used to call the upstream themselves, so every client paid for
+its own request and could stall a worker for the whole timeout.  A
+``RefreshingCache`` owns one value for the whole process.  A single
+background refresher keeps it fresh, and ``get()`` always answers from
+memory.  Once the value is older than ``ttl``, ``get()`` still returns it
+and kicks off one refresh in the background.  Failed refreshes keep
+serving the last good value until it is older than ``max_stale``.
+``on_change`` is called after a refresh that brings a different value.
+"""
+
+import threading
+import time
+
+_MISSING = object()
+
+
+class RefreshingCache:
+
+    def __init__(self, fetch, ttl, max_stale=None, name="cache", on_change=None):
+        self.fetch = fetch
+        self.on_change = on_change
+        self.ttl = ttl
+        self.max_stale = max_stale if max_stale is not None else ttl * 6
+        self.name = name
+
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.errors = 0
+        self.last_error = None
+
+        self._value = _MISSING
+        self._fetched_at = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def age(self):
+        if self._fetched_at is None:
+            return None
+        return time.monotonic() - self._fetched_at
+
+    def get(self, default=None):
+        """Return the cached value immediately; never blocks on the upstream."""
+        age = self.age
+        if self._value is _MISSING or age > self.max_stale:
+            self.misses += 1
+            self.refresh_async()
+            return default
+
+        self.hits += 1
+        if age > self.ttl:
+            self.refresh_async()
+        return self._value
+
+    def refresh(self):
+        """Fetch now on the calling thread; returns True on success."""
+        try:
+            value = self.fetch()
+        except Exception as exc:
+            self.errors += 1
+            self.last_error = repr(exc)
+            return False
+        finally:
+            self.fetches += 1
+
+        changed = value != self._value
+        self._value = value
+        self._fetched_at = time.monotonic()
+        self.last_error = None
+        if changed and self.on_change is not None:
+            self.on_change(value)
+        return True
+
+    def refresh_async(self):
+        # single flight: at most one refresh in progress at a time
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._run_refresh, name=f"{self.name}-refresh", daemon=True).start()
+
+    def _run_refresh(self):
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def start(self):
+        """Start the periodic background refresher (idempotent)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name=f"{self.name}-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                busy = self._refreshing
+                if not busy:
+                    self._refreshing = True
+            if not busy:
+                self._run_refresh()
+            # retry failures sooner than a full ttl
+            self._stop.wait(self.ttl if self.last_error is None else min(self.ttl, 30))
@@ -0,0 +1,115 @@
+"""Corridor × time tiles for the all-corridor overview heatmap.
+
+Every append to the ``TimeSeriesStore`` is folded into fixed-width time
+tiles (``TILE_SECONDS``) per corridor.  A tile keeps a running
+``(sum, count)`` of ``cars`` for each camera that reported in it.  Its
+corridor total (sum of per-camera means) and camera percentiles are only
+recomputed when that tile changes.  The heatmap reads a
+corridors × tiles grid built from these summaries, so drawing it never
+touches raw samples no matter how many cameras are streaming.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+TILE_SECONDS = int(os.environ.get("CORRIDOR_TILE_SECONDS", "300"))
+TILE_HISTORY = int(os.environ.get("CORRIDOR_TILE_HISTORY", "288"))  # 24 h of 5-min tiles
+
+
+class Tile:
+
+    def __init__(self):
+        self.cameras = {}  # camera_url -> [sum, count]
+        self._summary = None
+
+    def add(self, camera_url, total, count):
+        acc = self.cameras.setdefault(camera_url, [0, 0])
+        acc[0] += total
+        acc[1] += count
+        self._summary = None
+
+    def summary(self):
+        """``(corridor total, p50, p90, cameras reporting)`` over per-camera means."""
+        if self._summary is None:
+            means = np.array([s / n for s, n in self.cameras.values()])
+            p50, p90 = np.percentile(means, [50, 90])
+            self._summary = (float(means.sum()), float(p50), float(p90), len(means))
+        return self._summary
+
+
+class CorridorTiles:
+
+    def __init__(self, groups, timeseries=None, tile_seconds=TILE_SECONDS, history=TILE_HISTORY):
+        # groups: {camera_url: corridor name}
+        self.groups = groups
+        self.corridors = sorted(set(groups.values()))
+        self.tile_ns = tile_seconds * 10**9
+        self.history = history
+        self.version = 0
+        self._tiles = {corridor: {} for corridor in self.corridors}  # corridor -> {bucket: Tile}
+        self._lock = threading.Lock()
+        self._grid = None
+        if timeseries is not None:
+            timeseries.subscribe(self.update)
+
+    def update(self, camera_url, rows):
+        """Fold new ``RECORD_DTYPE`` rows for a camera into its corridor's tiles."""
+        corridor = self.groups.get(camera_url)
+        if corridor is None or not len(rows):
+            return
+
+        # per-bucket sums in one pass over the batch
+        buckets, inverse = np.unique(rows["ts"] // self.tile_ns, return_inverse=True)
+        sums = np.bincount(inverse, weights=rows["cars"])
+        counts = np.bincount(inverse)
+
+        with self._lock:
+            tiles = self._tiles[corridor]
+            for bucket, total, count in zip(buckets.tolist(), sums.tolist(), counts.tolist()):
+                tile = tiles.get(bucket)
+                if tile is None:
+                    tile = tiles[bucket] = Tile()
+                tile.add(camera_url, total, count)
+
+            # drop tiles older than the history window
+            newest = max(tiles)
+            for bucket in [b for b in tiles if b <= newest - self.history]:
+                del tiles[bucket]
+            self.version += 1
+
+    def prime(self, timeseries, camera_urls):
+        """Fill the tiles from history on disk (e.g. at startup)."""
+        start = (time.time_ns() // self.tile_ns - self.history + 1) * self.tile_ns
+        end = start + (self.history + 1) * self.tile_ns
+        for camera_url in camera_urls:
+            self.update(camera_url, timeseries.range(camera_url, start, end))
+
+    def grid(self, tiles=None, now_ns=None):
+        """``(corridors, tile start ns, total, p50, p90, cameras)`` for the newest ``tiles`` tiles.
+
+        Arrays are corridors × tiles; tiles nobody reported in are NaN (0 cameras).
+        """
+        tiles = tiles or self.history
+        end = (now_ns or time.time_ns()) // self.tile_ns
+        key = (self.version, tiles, end)
+        grid = self._grid
+        if grid is not None and grid[0] == key:
+            return grid[1]
+
+        buckets = np.arange(end - tiles + 1, end + 1)
+        shape = (len(self.corridors), tiles)
+        total, p50, p90 = (np.full(shape, np.nan) for _ in range(3))
+        cameras = np.zeros(shape, dtype=int)
+        with self._lock:
+            for i, corridor in enumerate(self.corridors):
+                for bucket, tile in self._tiles[corridor].items():
+                    j = bucket - buckets[0]
+                    if 0 <= j < tiles:
+                        total[i, j], p50[i, j], p90[i, j], cameras[i, j] = tile.summary()
+
+        result = (self.corridors, buckets * self.tile_ns, total, p50, p90, cameras)
+        self._grid = (key, result)
+        return result
@@ -0,0 +1,102 @@
+"""Reduced-resolution, keyframe-only decoding of HLS segments with ffmpeg.
+
+OpenCV decodes every frame of a segment at the camera's full resolution
+and converts each one to BGR.  Yet the stride throws most frames away,
+and the model shrinks the rest to ``DETECT_IMG_SIZE`` anyway.
+``decode_segment`` pipes the segment through a single ffmpeg process
+instead.  ``select`` drops the frames the stride skips before they are
+scaled or converted, and ``scale`` shrinks the kept ones to
+``DETECT_DECODE_WIDTH``.  With ``keyframes``, the decoder is told to
+``-skip_frame nokey``: only the I-frames get decoded, which is about one
+per segment on these cameras.  That is far too sparse for tracking, so
+keyframes are for the corridor sampler's few-frames-per-visit counts.
+
+Keyframes are where ffmpeg pays off: about 14 ms of CPU per 720p segment
+against about 92 ms for OpenCV (``benchmarks/bench_decode.py``).  Every
+``stride``-th frame through ffmpeg at 640 wide costs about the same as
+OpenCV at full size.  So ``auto`` only uses ffmpeg for keyframes, and
+stride decoding for the dashboard stays on OpenCV unless
+``DETECT_DECODER=ffmpeg``.  Without an ffmpeg binary, segments always go
+through OpenCV.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+
+import numpy as np
+
+# "auto" uses ffmpeg for keyframe decoding when the binary is on PATH, else OpenCV; or "ffmpeg" / "opencv"
+DETECT_DECODER = os.environ.get("DETECT_DECODER", "auto")
+# decoded frame width; 0 keeps the source resolution (frames are never upscaled)
+DECODE_WIDTH = int(os.environ.get("DETECT_DECODE_WIDTH", "640"))
+DETECT_KEYFRAMES = os.environ.get("DETECT_KEYFRAMES", "0") == "1"
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+DECODE_TIMEOUT = 30
+
+# one line per frame that reaches showinfo, i.e. per kept frame, after scaling
+_SHOWINFO = re.compile(r"Parsed_showinfo.*?\sn:\s*(\d+).*?pts_time:\s*(-?[\d.]+).*?\ss:(\d+)x(\d+)")
+
+
+def decode_segment(data, stride=1, width=DECODE_WIDTH, keyframes=False, ffmpeg=FFMPEG_BINARY):
+    """``[(index, position_seconds, frame)]`` of one segment's kept BGR frames.
+
+    ``index`` is the frame's number in the segment, or its keyframe number
+    with ``keyframes``.  A segment ffmpeg can't decode gives an empty list.
+    """
+    filters = []
+    if stride > 1 and not keyframes:
+        filters.append(f"select=not(mod(n\\,{stride}))")
+    if width:
+        filters.append(f"scale=w=min({width}\\,iw):h=-2:flags=area")
+    filters.append("showinfo=checksum=0")
+
+    cmd = [ffmpeg, "-hide_banner", "-nostats", "-loglevel", "info", "-threads", "1"]
+    if keyframes:
+        cmd += ["-skip_frame", "nokey"]
+    cmd += ["-i", "pipe:0", "-an", "-sn", "-vf", ",".join(filters), "-fps_mode", "passthrough",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+    try:
+        proc = subprocess.run(cmd, input=data, capture_output=True, timeout=DECODE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return []
+
+    raw = proc.stdout
+    frames = []
+    offset = 0
+    for n, pts, w, h in _SHOWINFO.findall(proc.stderr.decode(errors="replace")):
+        w, h = int(w), int(h)
+        size = w * h * 3
+        if offset + size > len(raw):
+            break
+        frame = np.frombuffer(raw, dtype=np.uint8, count=size, offset=offset).reshape(h, w, 3)
+        offset += size
+        frames.append((int(n) if keyframes else int(n) * stride, float(pts), frame))
+    return frames
+
+
+class SegmentDecoder:
+    """ffmpeg settings for HLS segments; the engine uses OpenCV where this is ``None``."""
+
+    def __init__(self, width=DECODE_WIDTH, keyframes=False, ffmpeg=FFMPEG_BINARY):
+        self.width = width
+        self.keyframes = keyframes
+        self.ffmpeg = ffmpeg
+
+    @property
+    def key(self):
+        # what detections depend on, for the result cache's scope
+        return ("ffmpeg", self.width, self.keyframes)
+
+    def __call__(self, data, stride):
+        return decode_segment(data, stride, self.width, self.keyframes, self.ffmpeg)
+
+
+def segment_decoder(decoder=DETECT_DECODER, width=DECODE_WIDTH, keyframes=DETECT_KEYFRAMES):
+    """A ``SegmentDecoder``, or ``None`` for OpenCV (``opencv``, or ``auto`` without keyframes or ffmpeg)."""
+    if decoder not in ("auto", "ffmpeg", "opencv"):
+        raise ValueError(f"unknown decoder {decoder!r}; expected auto, ffmpeg or opencv")
+    if decoder == "opencv" or (decoder == "auto" and (not keyframes or shutil.which(FFMPEG_BINARY) is None)):
+        return None
+    return SegmentDecoder(width, keyframes)
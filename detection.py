@@ -0,0 +1,360 @@
+"""YOLO vehicle detection behind ``run_detection_for_dashboard``.
+
+Frames come from the NYSDOT ``playlist.m3u8`` HLS URLs (segments fetched
+through the shared outbound HTTP layer and decoded by OpenCV, or by
+ffmpeg for keyframe-only decoding, see ``decode.py``) or from
+anything ``cv2.VideoCapture`` opens directly, such as a local HLS stand-in
+or a plain video file.  Every ``frame_stride``-th frame is kept and the
+kept frames are sent through the model ``batch_size`` at a time on CPU.
+Each frame becomes one ``ts/cars/buses/trucks`` record.  With tracking
+on, the counts are the vehicles tracked inside the camera's ROI and the
+record also carries ``flow_in`` / ``flow_out`` (see ``tracking.py``).  The
+dashboard's engine shares per-frame HLS results between runs through
+``result_cache.RESULT_CACHE``, and static frames skip the model (see
+``motion.MotionGate``).  The model runs in PyTorch or as an exported ONNX /
+OpenVINO model (see ``backends.py``), and ``warm_up`` loads it and runs
+one blank batch before the first real run needs it.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from backends import DETECT_BACKEND, DETECT_PRECISION, DETECT_THREADS, ExportedModel, check_backend, export_model
+from decode import DECODE_WIDTH, DETECT_DECODER, DETECT_KEYFRAMES, segment_decoder
+from hls import is_remote_hls, iter_segments
+from motion import MOTION_GATE, MotionGate
+from result_cache import ENTRY_BYTES, RESULT_CACHE
+from tracking import DETECT_TRACKING, TRACK_LOW_CONF, FlowCounter
+
+MODEL_PATH = os.environ.get("YOLO_MODEL", "yolov8n.pt")
+FRAME_STRIDE = int(os.environ.get("DETECT_FRAME_STRIDE", "5"))
+BATCH_SIZE = int(os.environ.get("DETECT_BATCH_SIZE", "8"))
+IMG_SIZE = int(os.environ.get("DETECT_IMG_SIZE", "640"))
+CONFIDENCE = float(os.environ.get("DETECT_CONFIDENCE", "0.35"))
+# "yolo", or "synthetic" for offline load tests (see synthetic.py)
+DETECTION_SOURCE = os.environ.get("DETECTION_SOURCE", "yolo")
+
+# COCO class ids -> record column
+VEHICLE_CLASSES = {2: "cars", 5: "buses", 7: "trucks"}
+
+# pending frame that reuses the previous frame's detections (see motion.py)
+_CARRY = object()
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(path=MODEL_PATH):
+    # ultralytics pulls in torch; only pay for it once a detection actually runs
+    with _models_lock:
+        if path not in _models:
+            from ultralytics import YOLO
+            _models[path] = YOLO(path)
+        return _models[path]
+
+
+def load_exported(path, backend, precision, imgsz, threads=DETECT_THREADS):
+    key = (path, backend, precision, imgsz, threads)
+    with _models_lock:
+        if key not in _models:
+            _models[key] = ExportedModel(export_model(path, backend, precision, imgsz), backend, threads)
+        return _models[key]
+
+
+def _read_capture(cap_source, stride, deadline, counter):
+    """Yield ``(index, position_seconds, frame)`` for every ``stride``-th frame of one capture.
+
+    ``counter`` is a one-item list holding the running frame index.
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(cap_source)
+    if not cap.isOpened():
+        return
+
+    try:
+        while time.monotonic() < deadline:
+            if counter[0] % stride:
+                # grab() demuxes and decodes but skips the BGR conversion
+                if not cap.grab():
+                    break
+                counter[0] += 1
+                continue
+
+            ok, frame = cap.read()
+            if not ok:
+                break
+            counter[0] += 1
+            yield counter[0] - 1, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, frame
+    finally:
+        cap.release()
+
+
+def _segment_key(scope, stride, segment):
+    return ("segment", scope, stride, segment.uri, segment.sequence)
+
+
+def _frame_key(scope, segment, index):
+    return ("frame", scope, segment.uri, segment.sequence, index)
+
+
+def _recorded_key(frame_key):
+    # a frame is recorded once whatever model settings a run used
+    return ("recorded",) + frame_key[2:]
+
+
+def _segment_frames(data, stride, deadline, decoder):
+    """``_read_capture`` over one downloaded segment, through ``decoder`` or OpenCV."""
+    if decoder is not None:
+        for item in decoder(data, stride):
+            if time.monotonic() >= deadline:
+                return
+            yield item
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=".ts", delete=False) as f:
+        f.write(data)
+    try:
+        yield from _read_capture(f.name, stride, deadline, [0])
+    finally:
+        os.unlink(f.name)
+
+
+def _iter_hls_frames(url, max_seconds, stride, cache=None, scope=(), decoder=None):
+    # segments come through the shared outbound pool; ffmpeg or OpenCV only decodes them
+    deadline = time.monotonic() + max_seconds
+    base = 0.0
+
+    def cached(segment):
+        # every kept frame already inferred: no need to download or decode it
+        kept = cache.peek(_segment_key(scope, stride, segment))
+        return kept is not None and all(cache.peek(_frame_key(scope, segment, i)) is not None for i, _ in kept)
+
+    for segment, data in iter_segments(url, max_seconds, skip=cached if cache is not None else None):
+        if data is None:
+            for index, pos in cache.peek(_segment_key(scope, stride, segment)) or ():
+                yield base + pos, segment.start + pos, None, _frame_key(scope, segment, index)
+            base += segment.duration
+            continue
+
+        first = None
+        kept = []
+        # the stride restarts every segment, so every run keeps the same frames of it
+        for index, pos, frame in _segment_frames(data, stride, deadline, decoder):
+            first = pos if first is None else first
+            kept.append((index, pos - first))
+            yield base + pos - first, segment.start + pos - first, frame, _frame_key(scope, segment, index)
+        if cache is not None and time.monotonic() < deadline:
+            cache.put(_segment_key(scope, stride, segment), tuple(kept))
+        base += segment.duration
+
+
+def iter_frames(source, max_seconds, stride=1, cache=None, scope=(), decoder=None):
+    """Yield ``(offset_seconds, time, frame, key)`` for every ``stride``-th decoded frame.
+
+    For HLS sources ``time`` is the frame's UTC epoch seconds, from its
+    segment's start (see ``hls.stamp_segments``), and ``key`` identifies the
+    frame by segment and index (see ``result_cache``); with a ``cache``,
+    frames of fully cached segments come back as ``None`` without being
+    downloaded.  HLS segments go through ``decoder`` (a
+    ``decode.SegmentDecoder``) when there is one.  Other sources are read
+    by OpenCV and have neither a time nor a key.
+    """
+    if is_remote_hls(source):
+        yield from _iter_hls_frames(source, max_seconds, stride, cache, scope, decoder)
+        return
+
+    started = time.monotonic()
+    first_pos = None
+    for index, pos, frame in _read_capture(source, stride, started + max_seconds, [0]):
+        if first_pos is None:
+            first_pos = pos
+        offset = pos - first_pos
+        if offset <= 0 and index > 0:
+            # live streams don't always report a position
+            offset = time.monotonic() - started
+        yield offset, None, frame, None
+
+
+class DetectionEngine:
+
+    def __init__(self, model_path=MODEL_PATH, frame_stride=FRAME_STRIDE,
+                 batch_size=BATCH_SIZE, imgsz=IMG_SIZE, conf=CONFIDENCE, device="cpu", cache=None,
+                 motion_gate=MOTION_GATE, tracking=DETECT_TRACKING, backend=DETECT_BACKEND,
+                 precision=DETECT_PRECISION, threads=DETECT_THREADS, decoder=DETECT_DECODER,
+                 decode_width=DECODE_WIDTH, keyframes=DETECT_KEYFRAMES):
+        check_backend(backend, precision)
+        # decoder: a decode.SegmentDecoder for HLS segments, or None for OpenCV
+        self.decoder = segment_decoder(decoder, decode_width, keyframes)
+        # cache: a result_cache.ResultCache shared with other runs, or None
+        self.cache = cache
+        # motion_gate: carry detections forward over static frames instead of inferring them
+        self.motion_gate = motion_gate
+        # tracking: count tracked vehicles in the camera's ROI and emit flows (see tracking.py);
+        # keyframes come a segment apart, too far for the tracker to link
+        self.tracking = tracking and not (self.decoder is not None and self.decoder.keyframes)
+        self.gated_frames = 0
+        self.skipped_frames = 0
+        self.model_path = model_path
+        self.frame_stride = max(1, int(frame_stride))
+        self.batch_size = max(1, int(batch_size))
+        self.imgsz = imgsz
+        self.conf = conf
+        self.device = device
+        # backend: "torch", "onnx" or "openvino"; threads: intra-op threads, 0 for the runtime default
+        self.backend = backend
+        self.precision = precision
+        self.threads = threads
+        self.warmup_seconds = None
+
+    @property
+    def predict_conf(self):
+        # the tracker's second pass needs the weak detections too
+        return min(self.conf, TRACK_LOW_CONF) if self.tracking else self.conf
+
+    def load(self):
+        if self.backend == "torch":
+            return load_model(self.model_path)
+        return load_exported(self.model_path, self.backend, self.precision, self.imgsz, self.threads)
+
+    def warm_up(self):
+        """Load (exporting if needed) and run one blank batch, so the first real run pays for neither."""
+        start = time.perf_counter()
+        self.infer_boxes([np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)])
+        if self.backend == "torch" and self.threads:
+            import torch
+
+            # ultralytics resets torch's thread count when its predictor is set up on the first predict
+            torch.set_num_threads(self.threads)
+        self.warmup_seconds = time.perf_counter() - start
+
+    def infer_boxes(self, frames):
+        """Run one batch; one ``(n, 6)`` ``x1 y1 x2 y2 conf cls`` array per frame, boxes normalized 0..1."""
+        model = self.load()
+        if self.backend != "torch":
+            return model.predict(frames, self.imgsz, self.predict_conf, list(VEHICLE_CLASSES))
+        results = model.predict(
+            frames,
+            imgsz=self.imgsz,
+            conf=self.predict_conf,
+            device=self.device,
+            classes=list(VEHICLE_CLASSES),
+            verbose=False,
+        )
+
+        return [
+            np.column_stack([
+                r.boxes.xyxyn.cpu().numpy(), r.boxes.conf.cpu().numpy(), r.boxes.cls.cpu().numpy(),
+            ]).astype(np.float32)
+            for r in results
+        ]
+
+    def counts(self, detections):
+        """Per-frame ``{"cars", "buses", "trucks"}`` of one frame's confident detections."""
+        cls = detections[detections[:, 4] >= self.conf, 5].astype(int)
+        hist = np.bincount(cls, minlength=max(VEHICLE_CLASSES) + 1)
+        return {col: int(hist[c]) for c, col in VEHICLE_CLASSES.items()}
+
+    def infer(self, frames):
+        """Run one batch and return a ``{"cars", "buses", "trucks"}`` dict per frame."""
+        return [self.counts(d) for d in self.infer_boxes(frames)]
+
+    def detect(self, source, max_seconds=5, max_frames=30, progress=None, roi=None, save=None):
+        # save(records): persists the run; frames only stay claimed if it succeeds
+        # load before the capture window starts so it isn't spent on weights
+        self.load()
+        now = datetime.now(timezone.utc)
+        records = []
+        claimed = []
+        batch = []
+        pending = []  # (offset, time, key, detections / None until inferred / _CARRY), in frame order
+        last = None
+        gate = MotionGate() if self.motion_gate else None
+        flow = FlowCounter(roi, VEHICLE_CLASSES) if self.tracking else None
+        # results only carry over between runs with the same model settings
+        scope = (self.model_path, self.backend, self.precision, self.imgsz, self.predict_conf,
+                 self.decoder.key if self.decoder is not None else "opencv")
+
+        def flush():
+            nonlocal last
+            inferred = iter(self.infer_boxes(batch) if batch else ())
+            for offset, at, key, detections in pending:
+                if detections is None:
+                    detections = next(inferred)
+                    if key is not None and self.cache is not None:
+                        self.cache.put(key, detections, ENTRY_BYTES + detections.nbytes)
+                elif detections is _CARRY:
+                    detections = last
+                    # cached too, or the segment never counts as fully cached
+                    if key is not None and self.cache is not None:
+                        self.cache.put(key, detections, ENTRY_BYTES + detections.nbytes)
+                last = detections
+                counts = flow.update(detections, offset) if flow is not None else self.counts(detections)
+                if key is not None and self.cache is not None:
+                    if not self.cache.claim(_recorded_key(key)):
+                        # an overlapping run already recorded this frame
+                        continue
+                    claimed.append(_recorded_key(key))
+                ts = pd.Timestamp(at, unit="s", tz="UTC") if at is not None else now + pd.Timedelta(seconds=offset)
+                records.append({"ts": ts.isoformat(), **counts})
+            batch.clear()
+            pending.clear()
+            if progress is not None:
+                progress(len(records))
+
+        for offset, at, frame, key in iter_frames(source, max_seconds, self.frame_stride, self.cache, scope,
+                                                  self.decoder):
+            detections = self.cache.get(key) if key is not None and self.cache is not None else None
+            if detections is None:
+                if frame is None:
+                    # expired between the segment check and now
+                    continue
+                if gate is not None and gate.static(frame):
+                    detections = _CARRY
+                else:
+                    batch.append(frame)
+            pending.append((offset, at, key, detections))
+            if len(records) + len(pending) >= max_frames:
+                break
+            if len(batch) >= self.batch_size:
+                flush()
+
+        if pending:
+            flush()
+        if gate is not None:
+            self.gated_frames += gate.frames
+            self.skipped_frames += gate.skipped
+        if save is None:
+            return records
+        try:
+            return save(records)
+        except BaseException:
+            # let a later run record these frames instead
+            if claimed:
+                self.cache.release(claimed)
+            raise
+
+
+_engine = None
+
+
+def loaded_engine():
+    """The shared engine if something has created it already, else None."""
+    return _engine
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        if DETECTION_SOURCE == "synthetic":
+            from synthetic import SyntheticDetector
+            _engine = SyntheticDetector()
+        else:
+            _engine = DetectionEngine(cache=RESULT_CACHE)
+    return _engine
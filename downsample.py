@@ -0,0 +1,101 @@
+"""Vectorized downsampling for long vehicle-count histories.
+
+Plotting days of per-second samples point by point is slow to serialize
+and slower to draw.  ``Pyramid`` precomputes min/max bucket reductions of
+a snapshot at bucket sizes 4, 16, 64, ... so any zoom level can be
+answered by slicing the right level.  Min/max keeps every spike and dip
+that a pixel column would show.  ``lttb`` (Largest-Triangle-Three-Buckets)
+can then thin a level down to an exact point budget.
+"""
+
+import math
+
+import numpy as np
+
+PYRAMID_BASE = 4
+
+
+def minmax_indices(y, bucket):
+    """Indices of the min and max of every ``bucket``-sized run of ``y``, in order."""
+    n = len(y)
+    if bucket <= 1 or n <= 2:
+        return np.arange(n)
+
+    nb = math.ceil(n / bucket)
+    padded = np.full(nb * bucket, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(nb, bucket)
+    offsets = np.arange(nb) * bucket
+
+    lo = np.nanargmin(rows, axis=1) + offsets
+    hi = np.nanargmax(rows, axis=1) + offsets
+    pairs = np.sort(np.stack([lo, hi], axis=1), axis=1)
+    # flat buckets have lo == hi; keep one copy
+    keep = np.ones(pairs.shape, dtype=bool)
+    keep[:, 1] = pairs[:, 1] != pairs[:, 0]
+    return pairs[keep]
+
+
+def lttb(x, y, n_out):
+    """Indices of ``n_out`` points picked by Largest-Triangle-Three-Buckets."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # interior points split into n_out - 2 buckets; first and last are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    # average of each bucket, used as the third triangle vertex for the bucket before it
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+class Pyramid:
+
+    def __init__(self, ts, series, base=PYRAMID_BASE):
+        # ts: int64 ns, sorted; series: {name: values aligned with ts}
+        self.ts = ts
+        self.series = series
+        self.base = base
+        self.levels = []  # levels[k-1] = {name: indices} for bucket size base**k
+        size = base
+        while size < len(ts):
+            self.levels.append({name: minmax_indices(y, size) for name, y in series.items()})
+            size *= base
+
+    def query(self, n_out, start_ns=None, end_ns=None, method="minmax"):
+        """``{name: indices}`` covering [start_ns, end_ns] in roughly ``n_out`` points each."""
+        lo = 0 if start_ns is None else int(np.searchsorted(self.ts, start_ns, "left"))
+        hi = len(self.ts) if end_ns is None else int(np.searchsorted(self.ts, end_ns, "right"))
+        count = hi - lo
+        if count <= n_out:
+            raw = np.arange(lo, hi)
+            return {name: raw for name in self.series}
+
+        # min/max emits up to two points per bucket
+        level = min(len(self.levels), max(1, math.ceil(math.log(2 * count / n_out, self.base))))
+        if method == "lttb":
+            # start one level finer and let LTTB cut it down to the exact budget
+            level = max(1, level - 1)
+        picked = {}
+        for name, idx in self.levels[level - 1].items():
+            idx = idx[np.searchsorted(idx, lo, "left"):np.searchsorted(idx, hi, "left")]
+            if method == "lttb" and len(idx) > n_out:
+                idx = idx[lttb(self.ts[idx], self.series[name][idx], n_out)]
+            picked[name] = idx
+        return picked
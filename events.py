@@ -0,0 +1,92 @@
+"""Change events pushed to browsers over server-sent events.
+
+Every client used to poll on fixed ``dcc.Interval`` timers whether or not
+anything had changed.  Producers now ``publish`` a topic when their data
+changes: the detection pipeline after each append, and the weather/news
+caches when a refresh brings a new value.  ``/events`` streams those
+topics to each browser, and ``assets/push.js`` turns them into
+``dcc.Store`` updates that trigger the matching callbacks.  The intervals
+stay in the layout as a slow safety net and speed back up whenever the
+stream drops.
+"""
+
+import json
+import threading
+from collections import deque
+
+from flask import Response, stream_with_context
+
+HEARTBEAT_SECONDS = 15
+BACKLOG = 256
+
+
+class EventBus:
+
+    def __init__(self, backlog=BACKLOG):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._events = deque(maxlen=backlog)  # (seq, topic, key)
+        self.published = 0
+        self.clients = 0
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def publish(self, topic, key=None):
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, topic, key))
+            self.published += 1
+            self._cond.notify_all()
+
+    def wait(self, after, timeout):
+        """Events newer than ``after``; blocks up to ``timeout`` for the first one.
+
+        Returns None if the client fell behind the backlog and missed events.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after, timeout)
+            if self._events and self._events[0][0] > after + 1:
+                return None
+            return [e for e in self._events if e[0] > after]
+
+    def stream(self, heartbeat=HEARTBEAT_SECONDS):
+        """Server-sent events body for one client."""
+        with self._cond:
+            self.clients += 1
+            seq = self._seq
+        try:
+            # ask the browser to reconnect quickly after a restart
+            yield "retry: 3000\n\n"
+            while True:
+                events = self.wait(seq, heartbeat)
+                if events is None:
+                    seq = self._seq
+                    yield "event: resync\ndata: {}\n\n"
+                    continue
+                if not events:
+                    # comment line; keeps proxies open and notices closed sockets
+                    yield ": keep-alive\n\n"
+                    continue
+                seq = events[-1][0]
+                # a burst of appends to one camera is one re-render
+                latest = {(topic, key): s for s, topic, key in events}
+                for (topic, key), s in latest.items():
+                    yield f"event: {topic}\ndata: {json.dumps({'key': key, 'seq': s})}\n\n"
+        finally:
+            with self._cond:
+                self.clients -= 1
+
+    def register(self, server, path="/events"):
+        """Serve the stream from a Flask app."""
+        def events():
+            return Response(
+                stream_with_context(self.stream()),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+        server.add_url_rule(path, "events", events)
+
+
+EVENTS = EventBus()
@@ -0,0 +1,98 @@
+"""Shared RSS ingestion for the news panel.
+
+``update_news`` used to download and parse the full NYRegion feed for every
+client on every tick.  ``FeedCache`` fetches each feed once for the whole
+process on a background refresher (see ``cache.RefreshingCache``) through
+the pooled ``outbound`` session.  It sends ``If-None-Match`` /
+``If-Modified-Since`` so an unchanged feed costs a 304 and no parse, and
+it keeps only the parsed top-N entries in memory.  Each feed refreshes on
+its own thread, so several feeds are fetched concurrently.
+"""
+
+import calendar
+
+import feedparser
+
+from cache import RefreshingCache
+from outbound import OUTBOUND
+
+
+class _ConditionalFeed:
+    # fetch callable for one feed; remembers validators between refreshes
+
+    def __init__(self, url, top_n, http):
+        self.url = url
+        self.top_n = top_n
+        self.http = http
+        self.etag = None
+        self.modified = None
+        self.entries = None
+        self.not_modified = 0
+        self.parsed = 0
+
+    def __call__(self):
+        headers = {}
+        if self.entries is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.modified:
+                headers["If-Modified-Since"] = self.modified
+
+        resp = self.http.get(self.url, headers=headers)
+        if resp.status_code == 304 and self.entries is not None:
+            self.not_modified += 1
+            return self.entries
+        resp.raise_for_status()
+
+        feed = feedparser.parse(resp.content)
+        if feed.bozo and not feed.entries:
+            raise ValueError(f"unparseable feed: {feed.get('bozo_exception', '')}")
+
+        self.parsed += 1
+        self.etag = resp.headers.get("ETag")
+        self.modified = resp.headers.get("Last-Modified")
+        self.entries = [_entry(e) for e in feed.entries[:self.top_n]]
+        return self.entries
+
+
+def _entry(e):
+    parsed = e.get("published_parsed") or e.get("updated_parsed")
+    return {
+        "title": e.get("title", ""),
+        "link": e.get("link", ""),
+        "published": e.get("published", e.get("updated", "")),
+        # epoch seconds, used to merge several feeds newest first
+        "ts": calendar.timegm(parsed) if parsed else 0,
+    }
+
+
+class FeedCache:
+
+    def __init__(self, feeds, ttl, top_n=5, http=OUTBOUND, on_change=None):
+        # feeds: {name: url}
+        self.top_n = top_n
+        self.feeds = {name: _ConditionalFeed(url, top_n, http) for name, url in feeds.items()}
+        self.caches = {
+            name: RefreshingCache(fetch, ttl=ttl, name=f"feed-{name}", on_change=on_change)
+            for name, fetch in self.feeds.items()
+        }
+
+    def start(self):
+        for cache in self.caches.values():
+            cache.start()
+
+    @property
+    def last_error(self):
+        errors = [c.last_error for c in self.caches.values() if c.last_error]
+        return errors[0] if errors else None
+
+    def entries(self):
+        """Top-N entries across all feeds, newest first; None until the first fetch lands."""
+        loaded = [cache.get() for cache in self.caches.values()]
+        loaded = [entries for entries in loaded if entries is not None]
+        if not loaded:
+            return None
+        if len(loaded) == 1:
+            return loaded[0]
+        merged = sorted((e for entries in loaded for e in entries), key=lambda e: e["ts"], reverse=True)
+        return merged[:self.top_n]
@@ -0,0 +1,168 @@
+"""Minimal HLS client for the NYSDOT ``playlist.m3u8`` camera streams.
+
+Playlists and ``.ts`` segments are fetched through ``outbound.OUTBOUND``,
+so stream ingestion shares its connection pool, per-host limits and
+retries.  Only what the detection engine needs is parsed: master playlist
+variants, media sequence numbers, segment URIs, durations and
+``EXT-X-PROGRAM-DATE-TIME``.
+
+Every segment gets a wall-clock ``start``, so frames are timestamped by
+the segment they came from rather than by when a run happened to start.
+Streams without program date-times are anchored the first time they are
+seen: the newest segment is taken to end about now.  From then on a
+segment starts ``sequence × mean segment duration`` after that anchor, so
+two runs over the same segment give its frames the same timestamps.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, replace
+from urllib.parse import urljoin
+
+import pandas as pd
+
+from outbound import OUTBOUND
+
+# re-anchor a stream whose sequence clock is this far (s) off the wall clock, e.g. after a restart
+ANCHOR_DRIFT = 60.0
+
+# media playlist URL -> (wall-clock start of sequence 0, seconds per sequence number)
+_anchors = {}
+_anchors_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Segment:
+    uri: str
+    sequence: int
+    duration: float
+    # UTC epoch seconds; None until stamp_segments fills it in
+    start: float = None
+
+
+@dataclass
+class MediaPlaylist:
+    target_duration: float
+    segments: list
+    ended: bool
+
+
+def is_remote_hls(source):
+    return source.startswith(("http://", "https://")) and ".m3u8" in source
+
+
+def parse_playlist(text, base_url):
+    """Return ``("master", [variant urls])`` or ``("media", MediaPlaylist)``."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or lines[0] != "#EXTM3U":
+        raise ValueError("not an HLS playlist")
+
+    variants = []
+    segments = []
+    sequence = 0
+    target = 2.0
+    duration = None
+    clock = None
+    ended = False
+    expect_variant = False
+    bandwidth = 0
+
+    for line in lines[1:]:
+        if line.startswith("#EXT-X-STREAM-INF"):
+            expect_variant = True
+            for attr in line.split(":", 1)[1].split(","):
+                if attr.startswith("BANDWIDTH="):
+                    bandwidth = int(attr.split("=", 1)[1])
+        elif line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+            sequence = int(line.split(":", 1)[1])
+        elif line.startswith("#EXT-X-TARGETDURATION:"):
+            target = float(line.split(":", 1)[1])
+        elif line.startswith("#EXTINF:"):
+            duration = float(line.split(":", 1)[1].split(",", 1)[0])
+        elif line.startswith("#EXT-X-PROGRAM-DATE-TIME:"):
+            clock = pd.Timestamp(line.split(":", 1)[1]).timestamp()
+        elif line.startswith("#EXT-X-ENDLIST"):
+            ended = True
+        elif line.startswith("#"):
+            continue
+        elif expect_variant:
+            variants.append((bandwidth, urljoin(base_url, line)))
+            expect_variant = False
+            bandwidth = 0
+        else:
+            segments.append(Segment(urljoin(base_url, line), sequence, duration or target, clock))
+            if clock is not None:
+                # the date-time carries on through the following segments
+                clock += duration or target
+            sequence += 1
+            duration = None
+
+    if variants:
+        # detection doesn't need the top rendition; the lowest decodes cheapest
+        return "master", [url for _, url in sorted(variants)]
+    return "media", MediaPlaylist(target, segments, ended)
+
+
+def stamp_segments(media_url, playlist, now=None):
+    """``playlist.segments`` with ``start`` filled in where the playlist has no date-time."""
+    segments = playlist.segments
+    if not segments or all(s.start is not None for s in segments):
+        return segments
+    now = time.time() if now is None else now
+    newest = segments[-1].sequence
+    with _anchors_lock:
+        anchor, step = _anchors.get(media_url, (None, None))
+        if anchor is None or abs(anchor + (newest + 1) * step - now) > ANCHOR_DRIFT:
+            # first sight, or the sequence clock no longer matches (stream restarted)
+            step = sum(s.duration for s in segments) / len(segments)
+            anchor = now - (newest + 1) * step
+            _anchors[media_url] = (anchor, step)
+    return [s if s.start is not None else replace(s, start=anchor + s.sequence * step) for s in segments]
+
+
+def fetch_media_playlist(url, http=OUTBOUND):
+    for _ in range(3):
+        resp = http.get(url)
+        resp.raise_for_status()
+        kind, playlist = parse_playlist(resp.text, resp.url)
+        if kind == "media":
+            return url, playlist
+        url = playlist[0]
+    raise ValueError("too many nested master playlists")
+
+
+def iter_segments(url, max_seconds, live_edge=1, http=OUTBOUND, skip=None):
+    """Yield ``(Segment, bytes)`` from the live edge onward until ``max_seconds`` pass.
+
+    Segments for which ``skip(segment)`` is true are yielded as
+    ``(Segment, None)`` without being downloaded.
+    """
+    deadline = time.monotonic() + max_seconds
+    media_url, playlist = fetch_media_playlist(url, http)
+    playlist.segments = stamp_segments(media_url, playlist)
+    last_seq = None
+
+    while True:
+        fresh = [s for s in playlist.segments if last_seq is None or s.sequence > last_seq]
+        if last_seq is None and not playlist.ended:
+            fresh = fresh[-live_edge:]
+
+        for segment in fresh:
+            if time.monotonic() >= deadline:
+                return
+            last_seq = segment.sequence
+            if skip is not None and skip(segment):
+                yield segment, None
+                continue
+            resp = http.get(segment.uri)
+            resp.raise_for_status()
+            yield segment, resp.content
+
+        if playlist.ended or time.monotonic() >= deadline:
+            return
+        # live playlist: wait for the server to publish the next segment
+        time.sleep(min(playlist.target_duration / 2, max(0.0, deadline - time.monotonic())))
+        resp = http.get(media_url)
+        resp.raise_for_status()
+        playlist = parse_playlist(resp.text, resp.url)[1]
+        playlist.segments = stamp_segments(media_url, playlist)
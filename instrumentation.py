@@ -0,0 +1,236 @@
+"""Callback timings, job throughput and cache hit rates in Prometheus text.
+
+``instrument_callbacks`` wraps every server-side callback registered on
+the Dash app.  Each call records its latency in a fixed-bucket
+histogram, and the wrapper counts calls, errors, ``PreventUpdate``s and
+the size of the JSON response.  A record is one ``perf_counter`` pair,
+a bisect and a few integer adds under a per-callback lock (a couple of
+µs), so it stays on in production.
+
+Other producers either push (``histogram`` / ``counter``, e.g. detection
+job fps) or are pulled when ``/metrics`` is scraped (``collect``, e.g. the
+hit/miss counters the weather and news caches already keep).  Nothing is
+computed between scrapes.
+"""
+
+import bisect
+import functools
+import threading
+import time
+
+from dash.exceptions import PreventUpdate
+from flask import Response
+
+# seconds; callbacks answer from memory, so most land in the low buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+FPS_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 100)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self, name, labels=None):
+        labels = labels or {}
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for le, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            yield f"{name}_bucket{_labels({**labels, 'le': _number(le)})} {cumulative}"
+        yield f"{name}_sum{_labels(labels)} {_number(total)}"
+        yield f"{name}_count{_labels(labels)} {count}"
+
+
+class Counter:
+
+    def __init__(self, label=None):
+        self.label = label
+        # an unlabelled counter reports 0 before its first increment
+        self.values = {} if label else {None: 0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, value=None):
+        with self._lock:
+            self.values[value] = self.values.get(value, 0) + amount
+
+    def samples(self, name):
+        with self._lock:
+            values = dict(self.values)
+        for value, total in values.items():
+            labels = {self.label: value} if self.label else None
+            yield f"{name}{_labels(labels)} {_number(total)}"
+
+
+class CallbackStats:
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.calls = 0
+        self.errors = 0
+        self.prevented = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, size=0, error=False, prevented=False):
+        self.latency.observe(seconds)
+        with self._lock:
+            self.calls += 1
+            self.bytes += size
+            self.errors += error
+            self.prevented += prevented
+
+
+class Instrumentation:
+
+    def __init__(self, prefix="transit"):
+        self.prefix = prefix
+        self.callbacks = {}  # callback function name -> CallbackStats
+        self._metrics = []  # (name, kind, help, samples() -> iterable of lines)
+
+    # ---------------------------------------------------------------- callbacks
+
+    def instrument_callbacks(self, dash_app):
+        """Wrap every server-side callback on ``dash_app``; call after they are all registered."""
+        for entry in dash_app.callback_map.values():
+            func = entry.get("callback")
+            if func is None or getattr(func, "_instrumented", False):
+                continue
+            # dash wraps the user function with functools.wraps, so this is its name
+            stats = self.callbacks.setdefault(func.__name__, CallbackStats())
+            entry["callback"] = self._timed(func, stats)
+
+    @staticmethod
+    def _timed(func, stats):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                out = func(*args, **kwargs)
+            except PreventUpdate:
+                stats.record(time.perf_counter() - start, prevented=True)
+                raise
+            except Exception:
+                stats.record(time.perf_counter() - start, error=True)
+                raise
+            # dash returns the serialized (ASCII) JSON body, so its length is the byte count
+            stats.record(time.perf_counter() - start, size=len(out) if isinstance(out, str) else 0)
+            return out
+
+        timed._instrumented = True
+        return timed
+
+    def _callback_samples(self, name, attr):
+        def samples():
+            for callback, stats in sorted(self.callbacks.items()):
+                yield f"{name}{_labels({'callback': callback})} {getattr(stats, attr)}"
+        return samples
+
+    # ---------------------------------------------------------------- producers
+
+    def histogram(self, name, help, buckets):
+        histogram = Histogram(buckets)
+        self._add(name, "histogram", help, lambda: histogram.samples(f"{self.prefix}_{name}"))
+        return histogram
+
+    def counter(self, name, help, label=None):
+        counter = Counter(label)
+        self._add(name, "counter", help, lambda: counter.samples(f"{self.prefix}_{name}"))
+        return counter
+
+    def collect(self, name, kind, help, fn, label=None):
+        """Pull a value at scrape time; with ``label``, ``fn`` returns ``{label value: number}``."""
+        full = f"{self.prefix}_{name}"
+
+        def samples():
+            value = fn()
+            if label is None:
+                yield f"{full} {_number(value)}"
+                return
+            for key, v in value.items():
+                yield f"{full}{_labels({label: key})} {_number(v)}"
+
+        self._add(name, kind, help, samples)
+
+    def watch_caches(self, caches):
+        """Hit, miss and fetch counters of ``RefreshingCache``s, by name."""
+        def field(attr):
+            return lambda: {name: getattr(cache, attr) for name, cache in caches.items()}
+
+        def hit_ratio():
+            return {name: cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else 0.0
+                    for name, cache in caches.items()}
+
+        self.collect("cache_hits_total", "counter", "Cache reads answered from memory", field("hits"), "cache")
+        self.collect("cache_misses_total", "counter", "Cache reads with nothing fresh enough to serve",
+                     field("misses"), "cache")
+        self.collect("cache_fetches_total", "counter", "Upstream fetches", field("fetches"), "cache")
+        self.collect("cache_errors_total", "counter", "Failed upstream fetches", field("errors"), "cache")
+        self.collect("cache_hit_ratio", "gauge", "Hits over all reads since start", hit_ratio, "cache")
+
+    def _add(self, name, kind, help, samples):
+        self._metrics.append((f"{self.prefix}_{name}", kind, help, samples))
+
+    # ---------------------------------------------------------------- exposition
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        p = self.prefix
+        families = [
+            (f"{p}_callback_duration_seconds", "histogram", "Server-side callback latency",
+             lambda: (line for callback, stats in sorted(self.callbacks.items())
+                      for line in stats.latency.samples(f"{p}_callback_duration_seconds", {"callback": callback}))),
+            (f"{p}_callback_calls_total", "counter", "Callback calls",
+             self._callback_samples(f"{p}_callback_calls_total", "calls")),
+            (f"{p}_callback_errors_total", "counter", "Callback calls that raised",
+             self._callback_samples(f"{p}_callback_errors_total", "errors")),
+            (f"{p}_callback_prevented_total", "counter", "Callback calls that sent no update",
+             self._callback_samples(f"{p}_callback_prevented_total", "prevented")),
+            (f"{p}_callback_bytes_total", "counter", "JSON bytes returned by callbacks",
+             self._callback_samples(f"{p}_callback_bytes_total", "bytes")),
+        ]
+        for name, kind, help, samples in families + self._metrics:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples())
+        return "\n".join(lines) + "\n"
+
+    def register(self, server, path="/metrics"):
+        """Serve ``render()`` from a Flask app."""
+        def metrics():
+            return Response(self.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+        server.add_url_rule(path, "prometheus_metrics", metrics)
+
+
+INSTRUMENTATION = Instrumentation()
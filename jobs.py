@@ -0,0 +1,119 @@
+"""Background detection jobs.
+
+``run_once`` used to call ``run_detection_for_dashboard`` inside the Dash
+callback and block a server worker for the whole capture window.  The
+``DetectionScheduler`` runs detections on a bounded thread pool instead,
+hands back a job id immediately and lets ``run-status`` poll progress.
+Concurrent requests for the same camera URL share one job.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+DETECT_WORKERS = int(os.environ.get("DETECT_WORKERS", "2"))
+# finished jobs kept around so late polls still find them
+JOB_HISTORY = 200
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class DetectionJob:
+    id: str
+    camera_url: str
+    status: str = QUEUED
+    frames: int = 0
+    count: int = 0
+    error: str = None
+    submitted: float = field(default_factory=time.monotonic)
+    started: float = None
+    finished: float = None
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def fps(self):
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "camera_url": self.camera_url,
+            "status": self.status,
+            "frames": self.frames,
+            "count": self.count,
+            "fps": round(self.fps, 2),
+            "error": self.error,
+        }
+
+
+class DetectionScheduler:
+
+    def __init__(self, run, max_workers=DETECT_WORKERS, on_finish=None):
+        # run(camera_url, progress=callable) -> number of records written
+        # on_finish(job) is called once a job is done or has failed
+        self._run = run
+        self.on_finish = on_finish
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="detect")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._by_url = {}
+
+    def submit(self, camera_url):
+        with self._lock:
+            job = self._by_url.get(camera_url)
+            if job is not None and job.active:
+                return job
+
+            job = DetectionJob(id=uuid.uuid4().hex, camera_url=camera_url)
+            self._jobs[job.id] = job
+            self._by_url[camera_url] = job
+            while len(self._jobs) > JOB_HISTORY:
+                old_id, old = next(iter(self._jobs.items()))
+                if old.active:
+                    break
+                del self._jobs[old_id]
+
+        self._pool.submit(self._execute, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _execute(self, job):
+        job.status = RUNNING
+        job.started = time.monotonic()
+
+        def progress(frames):
+            job.frames = frames
+
+        try:
+            job.count = self._run(job.camera_url, progress=progress)
+            job.status = DONE if job.count else FAILED
+        except Exception as exc:
+            job.error = str(exc)
+            job.status = FAILED
+        finally:
+            job.finished = time.monotonic()
+            with self._lock:
+                if self._by_url.get(job.camera_url) is job:
+                    del self._by_url[job.camera_url]
+            if self.on_finish is not None:
+                self.on_finish(job)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,96 @@
+"""Shared in-process snapshots of per-camera detection metrics.
+
+Every dashboard callback used to call ``pd.read_csv("metrics.csv")`` on its
+own.  ``MetricsStore`` loads the recent history of a camera from the
+``TimeSeriesStore`` once per change (keyed on the store's cheap version
+stamp) and hands the same immutable, columnar snapshot to every caller.
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from downsample import Pyramid
+
+COUNT_COLUMNS = ("cars", "buses", "trucks")
+# points per camera kept in the snapshot the dashboard renders from;
+# the graph downsamples, so this can cover days of per-second samples
+HISTORY_POINTS = int(os.environ.get("METRICS_HISTORY_POINTS", "100000"))
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    # TimeSeriesStore.version() of the camera this snapshot was loaded from
+    version: tuple
+    ts: np.ndarray
+    cars: np.ndarray
+    buses: np.ndarray
+    trucks: np.ndarray
+    # derived views built lazily, once per snapshot
+    _cache: dict = field(default_factory=dict, repr=False, compare=False)
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def empty(self):
+        return len(self.ts) == 0
+
+    def frame(self):
+        if "frame" not in self._cache:
+            self._cache["frame"] = pd.DataFrame({
+                "ts": self.ts,
+                "cars": self.cars,
+                "buses": self.buses,
+                "trucks": self.trucks,
+            })
+        return self._cache["frame"]
+
+    def pyramid(self):
+        # min/max levels for the graph; zooming reuses them until the next change
+        if "pyramid" not in self._cache:
+            self._cache["pyramid"] = Pyramid(
+                self.ts.astype("int64"),
+                {col: getattr(self, col) for col in COUNT_COLUMNS},
+            )
+        return self._cache["pyramid"]
+
+
+class MetricsStore:
+
+    def __init__(self, timeseries, history=HISTORY_POINTS):
+        self.timeseries = timeseries
+        self.history = history
+        self.load_count = 0
+        self._lock = threading.Lock()
+        self._snapshots = {}
+
+    def _load(self, camera_url, key):
+        rows = self.timeseries.tail(camera_url, self.history)
+        self.load_count += 1
+        return MetricsSnapshot(
+            version=key,
+            ts=rows["ts"].astype("datetime64[ns]"),
+            **{col: rows[col].astype(np.int64) for col in COUNT_COLUMNS},
+        )
+
+    def snapshot(self, camera_url):
+        """Return the camera's current snapshot, or None before its first detection."""
+        key = self.timeseries.version(camera_url)
+        if key is None:
+            return None
+
+        current = self._snapshots.get(camera_url)
+        if current is not None and current.version == key:
+            return current
+
+        with self._lock:
+            # another thread may have loaded it while we waited
+            current = self._snapshots.get(camera_url)
+            if current is not None and current.version == key:
+                return current
+            current = self._snapshots[camera_url] = self._load(camera_url, key)
+            return current
@@ -0,0 +1,138 @@
+"""One outbound HTTP layer for weather, news and HLS stream ingestion.
+
+Everything the app fetches goes through ``OUTBOUND``:
+
+* a single keep-alive ``requests.Session`` with a sized connection pool,
+* a per-host concurrency limit (the NYSDOT ``s7``/``s52``/``s53`` stream
+  hosts get a small one),
+* retries on connection errors, timeouts and 429/5xx with full-jitter
+  exponential backoff (honouring ``Retry-After``),
+* default connect/read timeouts.
+
+``get`` / ``request`` are the sync API.  ``aget`` / ``arequest`` /
+``gather`` are the asyncio API: they take an asyncio per-host semaphore
+and run the pooled request on a worker thread, so both APIs share the
+same connection pool and host limits.
+
+The limits are per process unless they are shared.  Corridor sampler
+workers are separate processes, each with its own ``OUTBOUND``, so the
+sampler builds the ``HOST_LIMITS`` semaphores once with
+``shared_host_limits`` and installs them with ``share_host_limits`` in the
+dashboard and in every worker.  The stream hosts then see at most their
+limit across the whole app.  Other hosts keep a per-process limit.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = (3.05, 10)
+DEFAULT_HOST_LIMIT = 8
+HOST_LIMITS = {
+    "s7.nysdot.skyvdn.com": 4,
+    "s52.nysdot.skyvdn.com": 4,
+    "s53.nysdot.skyvdn.com": 4,
+}
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+
+class Outbound:
+
+    def __init__(self, host_limits=None, default_limit=DEFAULT_HOST_LIMIT, retries=3,
+                 backoff=0.25, max_backoff=8.0, timeout=DEFAULT_TIMEOUT, pool_maxsize=32):
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.default_limit = default_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._host_sems = {}
+        self._async_sems = {}
+
+    def limit_for(self, host):
+        return self.host_limits.get(host, self.default_limit)
+
+    def _host_sem(self, host):
+        with self._lock:
+            sem = self._host_sems.get(host)
+            if sem is None:
+                sem = self._host_sems[host] = threading.BoundedSemaphore(self.limit_for(host))
+            return sem
+
+    def share_host_limits(self, sems):
+        """Use ``{host: semaphore}`` (e.g. from ``shared_host_limits``) for those hosts."""
+        with self._lock:
+            self._host_sems.update(sems)
+
+    def _async_sem(self, host):
+        # asyncio semaphores belong to one event loop
+        key = (id(asyncio.get_running_loop()), host)
+        with self._lock:
+            sem = self._async_sems.get(key)
+            if sem is None:
+                sem = self._async_sems[key] = asyncio.Semaphore(self.limit_for(host))
+            return sem
+
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        # full jitter: spreads retries from many callers instead of syncing them
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        sem = self._host_sem(urlsplit(url).hostname)
+
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                with sem:
+                    response = self.session.request(method, url, **kwargs)
+            except RETRY_EXCEPTIONS:
+                if last:
+                    raise
+                time.sleep(self._delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUSES and not last:
+                response.close()
+                time.sleep(self._delay(attempt, response))
+                continue
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    async def arequest(self, method, url, **kwargs):
+        async with self._async_sem(urlsplit(url).hostname):
+            return await asyncio.to_thread(self.request, method, url, **kwargs)
+
+    async def aget(self, url, **kwargs):
+        return await self.arequest("GET", url, **kwargs)
+
+    async def gather(self, urls, **kwargs):
+        """GET many URLs concurrently within the host limits; exceptions are returned, not raised."""
+        return await asyncio.gather(*(self.aget(u, **kwargs) for u in urls), return_exceptions=True)
+
+
+def shared_host_limits(ctx, host_limits=None):
+    """Semaphores for ``host_limits`` that processes started from ``ctx`` can share."""
+    limits = HOST_LIMITS if host_limits is None else host_limits
+    return {host: ctx.BoundedSemaphore(limit) for host, limit in limits.items()}
+
+
+OUTBOUND = Outbound()
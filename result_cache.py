@@ -0,0 +1,102 @@
+"""Per-frame detection results shared between overlapping detection runs.
+
+A NYSDOT playlist serves the same ``.ts`` segments to every viewer for
+several seconds.  Two people pressing "Run AI Detection" on one camera
+used to download, decode and infer the same frames twice.  Results are
+keyed by what was inferred rather than by who asked: the segment URI and
+media sequence number, the frame's index inside the segment, and the
+model settings.  A later run looks its frames up before inferring.  A
+segment whose kept frames are all cached is not downloaded at all.
+``claim`` marks a frame as recorded, so a frame two runs share is
+saved by only one of them; ``release`` hands the frames back if that
+save fails.
+
+Entries are evicted least-recently-used once the cache passes its
+memory cap, and they expire after ``ttl`` seconds.  A live segment
+leaves the playlist within a minute, so older entries are never asked
+for again.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DETECT_CACHE_TTL = float(os.environ.get("DETECT_CACHE_TTL", "300"))
+DETECT_CACHE_MB = float(os.environ.get("DETECT_CACHE_MB", "16"))
+
+# rough per-entry footprint: key tuple, counts dict, bookkeeping
+ENTRY_BYTES = 512
+
+
+class ResultCache:
+
+    def __init__(self, ttl=DETECT_CACHE_TTL, max_bytes=int(DETECT_CACHE_MB * 2**20)):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires, size, value)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """The cached value, or None if it is missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def peek(self, key):
+        """Like ``get`` but without counting or refreshing recency."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[2]
+
+    def put(self, key, value, size=ENTRY_BYTES):
+        with self._lock:
+            self._put(key, value, size)
+
+    def claim(self, key, size=ENTRY_BYTES):
+        """Store ``key`` unless a live entry already has it; True if this call did."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                return False
+            self._put(key, True, size)
+            return True
+
+    def release(self, keys):
+        """Drop ``keys`` (e.g. claims whose records weren't saved after all)."""
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._drop(key)
+
+    def _put(self, key, value, size):
+        # caller holds the lock
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.bytes += size
+        while self.bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        self.bytes -= self._entries.pop(key)[1]
+
+
+RESULT_CACHE = ResultCache()
@@ -0,0 +1,250 @@
+"""Streaming per-camera statistics behind the corridor panels.
+
+The panels used to re-slice the last few rows of a snapshot on every tick
+and guess the next value with a fixed 1.15 / 0.90 factor.
+``RollingAnalytics`` subscribes to ``TimeSeriesStore`` appends and folds
+each new sample into per-camera running state instead:
+
+* rolling mean / variance over the last ``ROLLING_WINDOW`` samples (running
+  integer sums, O(1) per sample),
+* rolling percentiles from a sorted copy of the same window (binary-search
+  insert/remove; the window is small, so this is effectively constant),
+* an EWMA of the count,
+* a damped Holt (level + trend) forecast ``FORECAST_SECONDS`` ahead.  It
+  runs on the mean count of each ``HOLT_STEP_SECONDS`` step, not on raw
+  samples, so the horizon and the damping are in wall-clock time whether
+  a camera is sampled five times a second or twice a minute.  A gap of
+  ``k`` steps with no samples is folded in as ``k`` steps of damping.
+* the latest tracked ``flow_in`` / ``flow_out`` (NaN until a tracked run
+  has reported one).
+
+A camera that has history on disk but no state yet (e.g. after a restart)
+is primed from ``TimeSeriesStore.tail`` on first use.
+"""
+
+import bisect
+import math
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+ROLLING_WINDOW = int(os.environ.get("ROLLING_WINDOW", "30"))
+EWMA_ALPHA = float(os.environ.get("EWMA_ALPHA", "0.3"))
+# Holt smoothing for level / trend, and trend damping per step
+HOLT_ALPHA = float(os.environ.get("HOLT_ALPHA", "0.3"))
+HOLT_BETA = float(os.environ.get("HOLT_BETA", "0.1"))
+HOLT_DAMPING = float(os.environ.get("HOLT_DAMPING", "0.9"))
+HOLT_STEP_SECONDS = float(os.environ.get("HOLT_STEP_SECONDS", "30"))
+FORECAST_SECONDS = 300
+PRIME_POINTS = 200
+
+
+@dataclass(frozen=True)
+class RollingState:
+    samples: int
+    current: int
+    window: int
+    mean: float
+    std: float
+    p50: float
+    p90: float
+    ewma: float
+    level: float
+    slope: float
+    # Holt forecast FORECAST_SECONDS ahead and the HOLT_STEP_SECONDS steps that took
+    forecast: float
+    steps: int
+    # vehicles/min across the counting line from the newest tracked record, NaN if none
+    flow_in: float
+    flow_out: float
+
+
+class RollingWindow:
+    """Mean, variance and percentiles of the last ``size`` integer samples."""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.ordered = []
+        # integer sums stay exact, so the variance never drifts
+        self.total = 0
+        self.squares = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def push(self, x):
+        self.values.append(x)
+        bisect.insort(self.ordered, x)
+        self.total += x
+        self.squares += x * x
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            del self.ordered[bisect.bisect_left(self.ordered, old)]
+            self.total -= old
+            self.squares -= old * old
+
+    @property
+    def mean(self):
+        return self.total / len(self.values)
+
+    @property
+    def variance(self):
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        return (self.squares - self.total * self.total / n) / (n - 1)
+
+    def percentile(self, q):
+        # linear interpolation, same as numpy's default
+        pos = (len(self.ordered) - 1) * q / 100
+        lo = int(pos)
+        hi = min(lo + 1, len(self.ordered) - 1)
+        return self.ordered[lo] + (self.ordered[hi] - self.ordered[lo]) * (pos - lo)
+
+
+class CameraStats:
+
+    def __init__(self, window=ROLLING_WINDOW, alpha=EWMA_ALPHA, holt_alpha=HOLT_ALPHA,
+                 holt_beta=HOLT_BETA, damping=HOLT_DAMPING, step_seconds=HOLT_STEP_SECONDS):
+        self.window = RollingWindow(window)
+        self.alpha = alpha
+        self.holt_alpha = holt_alpha
+        self.holt_beta = holt_beta
+        self.damping = damping
+        self.step_ns = int(step_seconds * 1e9)
+        self.horizon = max(1, round(FORECAST_SECONDS / step_seconds))
+
+        self.samples = 0
+        self.current = None
+        self.last_ts = None
+        self.ewma = None
+        # Holt state up to the last closed step, and the sum / count of the open one
+        self.level = None
+        self.slope = 0.0
+        self._closed = None
+        self._step = None
+        self._step_total = 0
+        self._step_count = 0
+        self.flow_in = self.flow_out = math.nan
+
+    def update(self, ts_ns, x, flow_in=math.nan, flow_out=math.nan):
+        x = int(x)
+        if not math.isnan(flow_in):
+            # a run's flow covers the whole run so far, so the newest one wins
+            self.flow_in, self.flow_out = flow_in, flow_out
+        self.last_ts = ts_ns
+        self.samples += 1
+        self.current = x
+        self.window.push(x)
+        self.ewma = float(x) if self.ewma is None else self.ewma + self.alpha * (x - self.ewma)
+
+        step = ts_ns // self.step_ns
+        if step != self._step and self._step is not None:
+            self.level, self.slope = self._holt(self._step_total / self._step_count)
+            self._closed = self._step
+            self._step_total = self._step_count = 0
+        self._step = step
+        self._step_total += x
+        self._step_count += 1
+
+    def _gain(self, steps):
+        # damped trend: the slope contributes phi + phi^2 + ... + phi^steps
+        phi = self.damping
+        return steps if phi == 1 else phi * (1 - phi ** steps) / (1 - phi)
+
+    def _holt(self, x):
+        """``(level, slope)`` after folding the open step's mean ``x`` into the closed state."""
+        if self.level is None:
+            return float(x), 0.0
+        k = self._step - self._closed
+        prev = self.level
+        level = self.holt_alpha * x + (1 - self.holt_alpha) * (prev + self._gain(k) * self.slope)
+        slope = self.holt_beta * (level - prev) / k + (1 - self.holt_beta) * self.damping ** k * self.slope
+        return level, slope
+
+    def forecast(self, steps=None):
+        """Count ``steps`` Holt steps (default: ``FORECAST_SECONDS``) after the current one."""
+        level, slope = self._holt(self._step_total / self._step_count)
+        return max(0.0, level + self._gain(steps or self.horizon) * slope)
+
+    def state(self):
+        steps = self.horizon
+        level, slope = self._holt(self._step_total / self._step_count)
+        return RollingState(
+            samples=self.samples,
+            current=self.current,
+            window=len(self.window),
+            mean=self.window.mean,
+            std=self.window.variance ** 0.5,
+            p50=self.window.percentile(50),
+            p90=self.window.percentile(90),
+            ewma=self.ewma,
+            level=level,
+            slope=slope,
+            forecast=max(0.0, level + self._gain(steps) * slope),
+            steps=steps,
+            flow_in=self.flow_in,
+            flow_out=self.flow_out,
+        )
+
+
+class RollingAnalytics:
+
+    def __init__(self, timeseries=None, column="cars", **stats_kwargs):
+        self.timeseries = timeseries
+        self.column = column
+        self.stats_kwargs = stats_kwargs
+        self._cameras = {}
+        # camera_url -> store version an empty camera was primed at
+        self._primed = {}
+        self._lock = threading.Lock()
+        if timeseries is not None:
+            timeseries.subscribe(self.update)
+
+    def _camera(self, camera_url):
+        # caller holds the lock
+        stats = self._cameras.get(camera_url)
+        if stats is not None and (stats.samples or self.timeseries is None):
+            return stats
+        # an idle camera stays cached until the store has rows for it; only then read them
+        version = self.timeseries.version(camera_url) if self.timeseries is not None else None
+        if stats is None or self._primed.get(camera_url) != version:
+            stats = self._cameras[camera_url] = CameraStats(**self.stats_kwargs)
+            if self.timeseries is not None:
+                self._feed(stats, self.timeseries.tail(camera_url, PRIME_POINTS))
+                self._primed[camera_url] = version
+        return stats
+
+    def _feed(self, stats, rows):
+        columns = (rows["ts"], rows[self.column], rows["flow_in"], rows["flow_out"])
+        for ts, x, flow_in, flow_out in zip(*(col.tolist() for col in columns)):
+            # priming and the append hook can both see the same rows
+            if stats.last_ts is None or ts > stats.last_ts:
+                stats.update(ts, x, flow_in, flow_out)
+
+    def update(self, camera_url, rows):
+        """Fold new ``RECORD_DTYPE`` rows for a camera into its state."""
+        with self._lock:
+            self._feed(self._camera(camera_url), rows)
+
+    def current_counts(self, camera_urls):
+        """Latest count per camera as a float array, NaN where there is no data yet."""
+        out = np.full(len(camera_urls), np.nan)
+        with self._lock:
+            for i, camera_url in enumerate(camera_urls):
+                stats = self._camera(camera_url)
+                if stats.samples:
+                    out[i] = stats.current
+        return out
+
+    def get(self, camera_url):
+        """Current ``RollingState`` for a camera, or None before its first sample."""
+        with self._lock:
+            stats = self._camera(camera_url)
+            if not stats.samples:
+                return None
+            return stats.state()
@@ -0,0 +1,384 @@
+"""Continuous corridor-wide detection over every camera in ``CAMERA_STREAMS``.
+
+``CorridorSampler`` is a long-running scheduler that keeps every camera on
+a sampling budget: each visit grabs a handful of frames, and a camera is
+due again ``interval / (priority × rate)`` seconds after its last visit.  Due
+cameras are handed round-robin (most overdue first) to a process pool.
+Each worker process loads and warms up the model once in its initializer
+and reuses it for every camera it samples, so inference scales across
+cores without reloading weights.  Workers decode only keyframes where
+ffmpeg is available (see ``decode.py``).  A worker that dies (a crash, the
+OOM killer, an initializer that can't load the model) breaks the whole
+pool; the scheduler then rebuilds it, backing off while it keeps breaking,
+and re-queues the visits that were in flight.
+
+``RateController`` adapts each camera's visit rate.  Cameras whose counts
+swing a lot are visited more often and steady ones less, and the whole
+corridor slows down while the machine is short of CPU.  ``rates()``
+reports what it chose.
+"""
+
+import heapq
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+from outbound import OUTBOUND, shared_host_limits
+
+SAMPLER_INTERVAL = float(os.environ.get("SAMPLER_INTERVAL", "30"))
+SAMPLER_FRAMES = int(os.environ.get("SAMPLER_FRAMES", "4"))
+SAMPLER_GRAB_SECONDS = float(os.environ.get("SAMPLER_GRAB_SECONDS", "3"))
+SAMPLER_WORKERS = int(os.environ.get("SAMPLER_WORKERS", str(os.cpu_count() or 1)))
+SAMPLER_KEYFRAMES = os.environ.get("SAMPLER_KEYFRAMES", "1") == "1"
+SAMPLER_ADAPTIVE = os.environ.get("SAMPLER_ADAPTIVE", "1") == "1"
+# share of the CPU to leave idle for the dashboard; sampling slows down below it
+SAMPLER_TARGET_HEADROOM = float(os.environ.get("SAMPLER_TARGET_HEADROOM", "0.2"))
+# how far volatility may speed a camera up (or slow it down)
+SAMPLER_MAX_BOOST = float(os.environ.get("SAMPLER_MAX_BOOST", "4"))
+# EWMA weight of the newest visit; volatility only counts after a few visits
+VOLATILITY_ALPHA = 0.05
+VOLATILITY_MIN_VISITS = 5
+CPU_CHECK_SECONDS = 5.0
+MIN_CPU_SCALE = 0.1
+# seconds before rebuilding a broken pool, doubling while it keeps breaking
+POOL_RESTART_DELAY = 1.0
+POOL_RESTART_MAX_DELAY = 60.0
+
+log = logging.getLogger(__name__)
+
+# =========================================================
+# Worker process side
+# =========================================================
+
+_worker_engine = None
+
+
+def _init_worker(engine_kwargs, threads, host_sems):
+    global _worker_engine
+    from detection import DETECTION_SOURCE, DetectionEngine
+
+    # the stream hosts' limits hold across every worker, not per worker
+    OUTBOUND.share_host_limits(host_sems)
+
+    if DETECTION_SOURCE == "synthetic":
+        from synthetic import SyntheticDetector
+        _worker_engine = SyntheticDetector()
+        return
+
+    # split the cores between workers instead of every worker grabbing all of them
+    _worker_engine = DetectionEngine(**{"threads": threads, "keyframes": SAMPLER_KEYFRAMES, **engine_kwargs})
+    _worker_engine.warm_up()
+
+
+def _sample_camera(camera_url, frames, grab_seconds, roi=None):
+    started = time.process_time()
+    records = _worker_engine.detect(camera_url, max_seconds=grab_seconds, max_frames=frames, roi=roi)
+    return records, time.process_time() - started
+
+
+# =========================================================
+# Scheduler side
+# =========================================================
+
+@dataclass
+class CameraBudget:
+    frames: int = SAMPLER_FRAMES
+    interval: float = SAMPLER_INTERVAL
+    priority: float = 1.0
+    # set by the RateController
+    rate: float = 1.0
+
+    @property
+    def period(self):
+        return self.interval / max(self.priority * self.rate, 1e-6)
+
+
+@dataclass
+class CameraStats:
+    visits: int = 0
+    frames: int = 0
+    failures: int = 0
+    last_sample: float = None
+
+
+class CpuMeter:
+    """Idle share of the machine's CPU since the last reading, from ``/proc/stat``."""
+
+    def __init__(self):
+        self._last = self._read()
+
+    @staticmethod
+    def _read():
+        try:
+            with open("/proc/stat") as f:
+                # user nice system idle iowait irq softirq steal
+                fields = [int(x) for x in f.readline().split()[1:9]]
+        except (OSError, ValueError):
+            return None
+        return fields[3] + fields[4], sum(fields)
+
+    def headroom(self):
+        now = self._read()
+        if now is None or self._last is None:
+            # no /proc: the load average is the next best thing
+            return max(0.0, 1.0 - os.getloadavg()[0] / (os.cpu_count() or 1))
+        last, self._last = self._last, now
+        total = now[1] - last[1]
+        return (now[0] - last[0]) / total if total > 0 else 1.0
+
+
+class RateController:
+    """Per-camera visit rates from traffic volatility, all scaled to the CPU headroom.
+
+    A camera's volatility is the coefficient of variation of its per-visit
+    mean vehicle count, tracked as a slow EWMA.  The slow weighting matters.
+    A camera whose traffic switches between light and heavy every few
+    minutes must stay fast through the calm stretches in between, or it
+    misses the next switch.  Its rate is that volatility
+    over the corridor average, clipped to ``1/max_boost .. max_boost``, so
+    the total stays about the same.  Every ``check_seconds`` the whole
+    corridor is slowed down while headroom is under ``target_headroom``
+    and eased back towards the configured intervals once there is room.
+    """
+
+    def __init__(self, target_headroom=SAMPLER_TARGET_HEADROOM, max_boost=SAMPLER_MAX_BOOST,
+                 alpha=VOLATILITY_ALPHA, min_visits=VOLATILITY_MIN_VISITS, check_seconds=CPU_CHECK_SECONDS,
+                 headroom=None):
+        # headroom: callable returning the idle CPU share, 0..1
+        self.target_headroom = target_headroom
+        self.max_boost = max_boost
+        self.alpha = alpha
+        self.min_visits = min_visits
+        self.check_seconds = check_seconds
+        self.headroom = headroom or CpuMeter().headroom
+        self.scale = 1.0
+        self.last_headroom = None
+        self._mean = {}
+        self._var = {}
+        self._visits = {}
+        self._checked = None
+
+    def observe(self, camera_url, records):
+        x = sum(r["cars"] + r["buses"] + r["trucks"] for r in records) / len(records)
+        self._visits[camera_url] = self._visits.get(camera_url, 0) + 1
+        if camera_url not in self._mean:
+            self._mean[camera_url], self._var[camera_url] = x, 0.0
+            return
+        d = x - self._mean[camera_url]
+        self._mean[camera_url] += self.alpha * d
+        self._var[camera_url] = (1 - self.alpha) * (self._var[camera_url] + self.alpha * d * d)
+
+    def volatility(self, camera_url):
+        if self._visits.get(camera_url, 0) < self.min_visits:
+            return None
+        # +1 so a nearly empty road doesn't look volatile over a single car
+        return self._var[camera_url] ** 0.5 / (self._mean[camera_url] + 1)
+
+    def update(self, budgets, now):
+        """Set every budget's ``rate``."""
+        if self._checked is None or now - self._checked >= self.check_seconds:
+            self._checked = now
+            self.last_headroom = headroom = self.headroom()
+            if headroom < self.target_headroom:
+                # back off harder the further under target, at most halving per check
+                self.scale = max(MIN_CPU_SCALE, self.scale * max(0.5, headroom / self.target_headroom))
+            else:
+                self.scale = min(1.0, self.scale * 1.25)
+
+        known = [v for v in map(self.volatility, budgets) if v is not None]
+        average = sum(known) / len(known) if known else 0.0
+        for url, budget in budgets.items():
+            v = self.volatility(url)
+            boost = 1.0 if v is None or average <= 0 else min(self.max_boost, max(1 / self.max_boost, v / average))
+            budget.rate = boost * self.scale
+
+
+class CorridorSampler:
+
+    def __init__(self, cameras, on_records, workers=SAMPLER_WORKERS, budgets=None,
+                 grab_seconds=SAMPLER_GRAB_SECONDS, engine_kwargs=None, rois=None, adaptive=SAMPLER_ADAPTIVE,
+                 controller=None):
+        # cameras: {label: url}; on_records(camera_url, records) runs on the scheduler thread
+        # rois: {camera_url: tracking.CameraROI} for cameras that don't use the whole frame
+        self.cameras = dict(cameras)
+        self.rois = rois or {}
+        self.on_records = on_records
+        self.workers = max(1, int(workers))
+        self.grab_seconds = grab_seconds
+        self.engine_kwargs = engine_kwargs or {}
+        self.budgets = {url: CameraBudget() for url in self.cameras.values()}
+        self.budgets.update(budgets or {})
+        self.stats = {url: CameraStats() for url in self.budgets}
+        # adaptive: let ``controller`` (a RateController by default) set each camera's rate
+        self.controller = (controller or RateController()) if adaptive else None
+
+        self._queue = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pool = None
+        self._started = None
+        self._cpu_seconds = 0.0
+        self.pool_restarts = 0
+        self.last_error = None
+        # restarts since the last visit that came back from a worker
+        self._broken_in_row = 0
+
+    def set_priority(self, camera_url, priority):
+        with self._lock:
+            self.budgets[camera_url].priority = priority
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._pool = self._new_pool()
+        now = time.monotonic()
+        # stagger the first pass so the pool isn't hit by every camera at once
+        for i, url in enumerate(self.budgets):
+            heapq.heappush(self._queue, (now + i * 1e-3, url))
+        self._started = now
+        self._thread = threading.Thread(target=self._loop, name="corridor-sampler", daemon=True)
+        self._thread.start()
+
+    def _new_pool(self):
+        # torch and fork don't mix; each worker gets a clean interpreter
+        ctx = multiprocessing.get_context("spawn")
+        # fresh per pool: a worker that died mid-request never released its slot
+        host_sems = shared_host_limits(ctx)
+        OUTBOUND.share_host_limits(host_sems)
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self.engine_kwargs, max(1, (os.cpu_count() or 1) // self.workers), host_sems),
+        )
+
+    def _restart_pool(self, in_flight, error):
+        """Replace a broken pool and re-queue the cameras it was sampling."""
+        self.pool_restarts += 1
+        self.last_error = repr(error)
+        delay = min(POOL_RESTART_MAX_DELAY, POOL_RESTART_DELAY * 2 ** self._broken_in_row)
+        self._broken_in_row += 1
+        log.warning("corridor sampler pool broke (%r); restarting in %.0f s", error, delay)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+        # the visits never happened, so they go back to the front of the queue
+        now = time.monotonic()
+        for url in in_flight.values():
+            heapq.heappush(self._queue, (now, url))
+        in_flight.clear()
+        if not self._stop.wait(delay):
+            self._pool = self._new_pool()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _loop(self):
+        in_flight = {}
+        while not self._stop.is_set():
+            now = time.monotonic()
+
+            broken = None
+
+            # keep at most one visit per worker in flight
+            while self._queue and len(in_flight) < self.workers and self._queue[0][0] <= now:
+                _, url = heapq.heappop(self._queue)
+                budget = self.budgets[url]
+                try:
+                    future = self._pool.submit(_sample_camera, url, budget.frames, self.grab_seconds,
+                                               self.rois.get(url))
+                except BrokenProcessPool as exc:
+                    heapq.heappush(self._queue, (now, url))
+                    broken = exc
+                    break
+                in_flight[future] = url
+
+            for future in [f for f in in_flight if f.done()]:
+                if isinstance(future.exception(), BrokenProcessPool):
+                    broken = future.exception()
+                    continue
+                url = in_flight.pop(future)
+                self._broken_in_row = 0
+                self._finish(url, future)
+
+            if broken is not None:
+                self._restart_pool(in_flight, broken)
+                continue
+            self._stop.wait(0.05)
+
+    def _finish(self, url, future):
+        stats = self.stats[url]
+        stats.visits += 1
+        stats.last_sample = time.monotonic()
+        try:
+            records, cpu_seconds = future.result()
+        except Exception as exc:
+            self.last_error = repr(exc)
+            records, cpu_seconds = [], 0.0
+
+        with self._lock:
+            self._cpu_seconds += cpu_seconds
+            if self.controller is not None:
+                if records:
+                    self.controller.observe(url, records)
+                self.controller.update(self.budgets, stats.last_sample)
+            period = self.budgets[url].period
+        if records:
+            try:
+                self.on_records(url, records)
+            except Exception as exc:
+                # a store or listener error costs this visit, not the sampler
+                log.exception("corridor sampler couldn't save %d records for %s", len(records), url)
+                self.last_error = repr(exc)
+                records = []
+        if records:
+            stats.frames += len(records)
+        else:
+            stats.failures += 1
+        heapq.heappush(self._queue, (stats.last_sample + period, url))
+
+    def report(self):
+        """Throughput summary: frames/s overall and per core."""
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        frames = sum(s.frames for s in self.stats.values())
+        covered = sum(1 for s in self.stats.values() if s.frames)
+        fps = frames / elapsed if elapsed else 0.0
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "workers": self.workers,
+            "cameras": len(self.stats),
+            "cameras_covered": covered,
+            "frames": frames,
+            "fps": round(fps, 3),
+            "fps_per_core": round(fps / self.workers, 3),
+            # frames per second of worker CPU time actually spent inferring
+            "fps_per_cpu_second": round(frames / self._cpu_seconds, 3) if self._cpu_seconds else 0.0,
+            "cpu_scale": round(self.controller.scale, 3) if self.controller is not None else 1.0,
+            "failures": sum(s.failures for s in self.stats.values()),
+            "pool_restarts": self.pool_restarts,
+            "last_error": self.last_error,
+        }
+
+    def rates(self):
+        """Per camera: seconds between visits, the controller's rate and the camera's volatility (NaN if unseen)."""
+        with self._lock:
+            rates = {}
+            for url, budget in self.budgets.items():
+                volatility = self.controller.volatility(url) if self.controller is not None else None
+                rates[url] = {
+                    "period_s": budget.period,
+                    "rate": budget.rate,
+                    "volatility": float("nan") if volatility is None else volatility,
+                }
+            return rates
@@ -0,0 +1,84 @@
+"""Threshold ladders for congestion, delay and bus speed, scalar or vectorized.
+
+Each rule the panels apply to a ``cars`` count (traffic level, predicted
+delay, bus speed, ETA penalty, alternative-route advice) is a ``Ladder``:
+sorted bin edges plus one value per bin.  ``ladder(cars)`` scores one
+count with a binary search.  ``ladder.apply(counts)`` scores a whole array
+with ``np.digitize``, and ``score_counts`` runs every ladder over all
+cameras in one pass for the operations overview.  The per-camera panels
+and the overview share the same edges.
+"""
+
+import bisect
+from dataclasses import dataclass
+
+import numpy as np
+
+
+class Ladder:
+
+    def __init__(self, edges, values, right=False):
+        # right=False: bin i holds edges[i-1] <= x < edges[i]
+        # right=True:  bin i holds edges[i-1] <  x <= edges[i]
+        self.edges = tuple(edges)
+        self.values = np.asarray(values)
+        self.right = right
+        self._edges = np.asarray(edges)
+        self._search = bisect.bisect_left if right else bisect.bisect_right
+
+    def index(self, x):
+        return self._search(self.edges, x)
+
+    def __call__(self, x):
+        return self.values[self.index(x)].item()
+
+    def indices(self, counts):
+        return np.digitize(counts, self._edges, right=self.right)
+
+    def apply(self, counts):
+        return self.values[self.indices(counts)]
+
+
+LEVEL = Ladder((10, 25), ("Low", "Medium", "High"))
+DELAY = Ladder((10, 20, 30), (0, 2, 5, 10))
+SPEED = Ladder((10, 18, 28), (18, 12, 8, 4))
+# minutes added to the ETA above each count
+ETA_PENALTY = Ladder((18, 28), (0, 3, 6), right=True)
+# alternative-route advice
+CONGESTION = Ladder((15, 25), ("normal", "moderate", "heavy"), right=True)
+
+FREE_FLOW_MPH = 18
+
+
+def bus_delay(speed):
+    # scalar speed or an array of them; truncates like int()
+    return np.maximum(0, ((FREE_FLOW_MPH - np.asarray(speed)) * 0.8).astype(int))
+
+
+@dataclass(frozen=True)
+class Scores:
+    # one entry per camera; cameras without data have valid=False
+    valid: np.ndarray
+    level: np.ndarray
+    delay: np.ndarray
+    speed: np.ndarray
+    bus_delay: np.ndarray
+    eta_penalty: np.ndarray
+    congestion: np.ndarray
+
+
+def score_counts(counts):
+    """Score an array of per-camera ``cars`` counts (NaN = no data yet)."""
+    counts = np.asarray(counts, dtype=float)
+    valid = ~np.isnan(counts)
+    # NaN lands in the top bin; masked by ``valid``
+    speed = SPEED.apply(counts)
+    return Scores(
+        valid=valid,
+        level=LEVEL.indices(counts),
+        delay=DELAY.apply(counts),
+        speed=speed,
+        bus_delay=bus_delay(speed),
+        eta_penalty=ETA_PENALTY.apply(counts),
+        congestion=CONGESTION.indices(counts),
+    )
@@ -0,0 +1,339 @@
+"""Append-only, per-camera time-series storage for detection records.
+
+Replaces the single ``metrics.csv`` that every run overwrote.  Records are
+stored as fixed-width binary rows (``RECORD_DTYPE``) under
+
+    <root>/<corridor>/<camera>/<YYYYMMDDHH>.v2.bin
+
+one segment file per camera per UTC hour.  Version 2 added the tracked
+``flow_in`` / ``flow_out`` rates.  Version 1 segments are still read, with
+NaN flows.  Because rows are fixed width
+the last N points of a camera are read with a seek straight to the tail of
+the newest segment(s), so ``tail(camera, n)`` costs O(n) no matter how much
+history is on disk.
+
+Writes are published atomically.  Rows are appended to the segments
+first, then a per-camera ``manifest.json`` recording the committed row
+count of every segment is swapped in with write-then-rename.  Readers only
+look at committed rows, so a reader racing a writer sees either the whole
+batch or none of it, never a torn row or half a batch.  One process owns
+the writes for a given root (the dashboard; sampler workers hand their
+records back to it).
+
+Each commit renames a fresh manifest in, so readers parse it once per
+commit and reuse it until the file changes; polling ``version()`` or
+``tail()`` doesn't re-read the camera's history.  Segments older than
+``TIMESERIES_RETENTION_HOURS`` before the camera's newest one are dropped
+from the manifest when a new hour starts, then deleted.
+
+A camera's rows are stored in time order, which the readers rely on.
+Runs in other processes stamp frames with their own clocks, so a batch can
+arrive that reaches back behind rows already committed.  Committed rows
+are never rewritten: rows at or before the camera's newest committed
+``ts`` are dropped and counted in ``late_rows``.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+TIMESERIES_ROOT = os.environ.get("TIMESERIES_ROOT", os.path.join("data", "timeseries"))
+
+FORMAT_VERSION = 2
+# ts is UTC nanoseconds since the epoch; flows are vehicles/min across the
+# camera's counting line each way (NaN when the frame wasn't tracked)
+RECORD_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("cars", "<i4"),
+    ("buses", "<i4"),
+    ("trucks", "<i4"),
+    ("flow_in", "<f4"),
+    ("flow_out", "<f4"),
+])
+LEGACY_DTYPES = {
+    1: np.dtype([("ts", "<i8"), ("cars", "<i4"), ("buses", "<i4"), ("trucks", "<i4")]),
+}
+SEGMENT_FORMAT = "%Y%m%d%H"
+SEGMENT_SUFFIX = f".v{FORMAT_VERSION}.bin"
+SEGMENT_SUFFIXES = {f".v{v}.bin": dtype for v, dtype in [(FORMAT_VERSION, RECORD_DTYPE), *LEGACY_DTYPES.items()]}
+FLOW_COLUMNS = ("flow_in", "flow_out")
+SEGMENT_NS = 3600 * 10**9
+MANIFEST = "manifest.json"
+# hours kept per camera, counted back from its newest segment; 0 keeps everything
+RETENTION_HOURS = int(os.environ.get("TIMESERIES_RETENTION_HOURS", str(30 * 24)))
+HOUR_CHARS = len(pd.Timestamp(0).strftime(SEGMENT_FORMAT))
+
+
+def slugify(text, limit=60):
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug[:limit].rstrip("-") or "unknown"
+
+
+def camera_key(camera_url):
+    # readable stream id (e.g. R11_159) plus a hash so keys never collide
+    parts = [p for p in camera_url.replace("\\", "/").split("/") if p]
+    stem = parts[-2] if len(parts) >= 2 and parts[-1].endswith(".m3u8") else (parts[-1] if parts else "")
+    digest = hashlib.sha1(camera_url.encode("utf-8")).hexdigest()[:10]
+    return f"{slugify(stem, 32)}-{digest}"
+
+
+def empty_rows(n):
+    """``n`` zeroed ``RECORD_DTYPE`` rows with untracked (NaN) flows."""
+    rows = np.zeros(n, dtype=RECORD_DTYPE)
+    for col in FLOW_COLUMNS:
+        rows[col] = np.nan
+    return rows
+
+
+def to_array(records):
+    """Convert ``ts/cars/buses/trucks`` (+ optional flow) dicts into a ``RECORD_DTYPE`` array."""
+    out = empty_rows(len(records))
+    if not len(records):
+        return out
+    df = pd.DataFrame.from_records(records)
+    out["ts"] = pd.DatetimeIndex(pd.to_datetime(df["ts"], utc=True)).as_unit("ns").asi8
+    for col in ("cars", "buses", "trucks"):
+        out[col] = df[col].to_numpy()
+    for col in FLOW_COLUMNS:
+        if col in df:
+            out[col] = df[col].to_numpy(dtype=float, na_value=np.nan)
+    return out
+
+
+def _segment_name(ts_ns):
+    start = pd.Timestamp(int(ts_ns), unit="ns", tz="UTC")
+    return start.strftime(SEGMENT_FORMAT) + SEGMENT_SUFFIX
+
+
+def _segment_dtype(path):
+    return SEGMENT_SUFFIXES[path[path.rindex(".v"):]]
+
+
+def _hour_ns(name):
+    return pd.Timestamp(pd.to_datetime(name[:HOUR_CHARS], format=SEGMENT_FORMAT), tz="UTC").value
+
+
+def _read_rows(path, start, count):
+    dtype = _segment_dtype(path)
+    try:
+        with open(path, "rb") as f:
+            f.seek(start * dtype.itemsize)
+            rows = np.fromfile(f, dtype=dtype, count=count)
+    except FileNotFoundError:
+        # expired by retention after the caller read the manifest
+        return np.empty(0, dtype=RECORD_DTYPE)
+    if dtype is RECORD_DTYPE:
+        return rows
+    # older format: copy the shared columns, leave the rest empty
+    out = empty_rows(len(rows))
+    for col in dtype.names:
+        out[col] = rows[col]
+    return out
+
+
+def _scan_manifest(path):
+    # directories written before manifests existed: trust whole rows on disk
+    try:
+        entries = [e for e in os.scandir(path) if e.name.endswith(tuple(SEGMENT_SUFFIXES))]
+    except FileNotFoundError:
+        return None
+    if not entries:
+        return None
+    return {
+        "seq": 0,
+        "segments": {e.name: e.stat().st_size // _segment_dtype(e.name).itemsize for e in entries},
+    }
+
+
+# manifest path -> (stat key, manifest, [(segment path, rows)] oldest first, total rows)
+_manifests = {}
+
+
+def _load_manifest(path):
+    """Parsed manifest plus its sorted segments, cached until the next commit.
+
+    The cached objects are shared between callers and must not be modified.
+    """
+    manifest_path = os.path.join(path, MANIFEST)
+    try:
+        st = os.stat(manifest_path)
+    except FileNotFoundError:
+        st = None
+    if st is not None:
+        # every commit renames a new file in, so the inode alone changes per commit
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        cached = _manifests.get(manifest_path)
+        if cached is not None and cached[0] == key:
+            return cached[1:]
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = _scan_manifest(path)
+    else:
+        manifest = _scan_manifest(path)
+    if manifest is None:
+        return None, [], 0
+
+    segments = [(os.path.join(path, name), rows) for name, rows in sorted(manifest["segments"].items())]
+    entry = (manifest, segments, sum(rows for _, rows in segments))
+    if st is not None:
+        _manifests[manifest_path] = (key, *entry)
+    return entry
+
+
+def _read_manifest(path):
+    return _load_manifest(path)[0]
+
+
+def _write_manifest(path, manifest):
+    tmp = os.path.join(path, f".{MANIFEST}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(path, MANIFEST))
+
+
+class TimeSeriesStore:
+
+    def __init__(self, root=TIMESERIES_ROOT, groups=None, retention_hours=RETENTION_HOURS):
+        # groups: {camera_url: corridor name}, used for the directory layout
+        self.root = root
+        self.groups = groups or {}
+        self.retention_hours = retention_hours
+        self.late_rows = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._last_ts = {}  # camera_url -> newest committed ts
+
+    def subscribe(self, listener):
+        """Call ``listener(camera_url, rows)`` after every committed append."""
+        self._listeners.append(listener)
+
+    def camera_dir(self, camera_url):
+        corridor = slugify(self.groups.get(camera_url, "ungrouped"))
+        return os.path.join(self.root, corridor, camera_key(camera_url))
+
+    def _committed(self, camera_url):
+        """``(seq, [(segment path, committed rows), ...])`` oldest first."""
+        manifest, segments, _ = _load_manifest(self.camera_dir(camera_url))
+        if manifest is None:
+            return None, []
+        return manifest["seq"], segments
+
+    def segments(self, camera_url):
+        """Segment paths for a camera, oldest first."""
+        return [segment for segment, _ in self._committed(camera_url)[1]]
+
+    def version(self, camera_url):
+        """Cheap change key: (commit sequence, committed rows)."""
+        manifest, segments, total = _load_manifest(self.camera_dir(camera_url))
+        if not segments:
+            return None
+        return (manifest["seq"], total)
+
+    def _expire(self, segments):
+        """Names in ``segments`` older than the retention window."""
+        if not self.retention_hours or not segments:
+            return []
+        cutoff = _segment_name(_hour_ns(max(segments)) - self.retention_hours * SEGMENT_NS)[:HOUR_CHARS]
+        return [name for name in segments if name[:HOUR_CHARS] <= cutoff]
+
+    def append(self, camera_url, records):
+        rows = records if isinstance(records, np.ndarray) else to_array(records)
+        if not len(rows):
+            return 0
+
+        rows = rows[np.argsort(rows["ts"], kind="stable")]
+        path = self.camera_dir(camera_url)
+
+        with self._lock:
+            last = self._last_ts.get(camera_url)
+            if last is None:
+                newest = self.tail(camera_url, 1)
+                last = int(newest["ts"][0]) if len(newest) else None
+            if last is not None and rows["ts"][0] <= last:
+                late = rows["ts"] <= last
+                self.late_rows += int(late.sum())
+                rows = rows[~late]
+                if not len(rows):
+                    return 0
+            bucket = rows["ts"] // SEGMENT_NS
+            splits = np.flatnonzero(np.diff(bucket)) + 1
+
+            os.makedirs(path, exist_ok=True)
+            committed_manifest = _read_manifest(path) or {"seq": 0, "segments": {}}
+            # the parsed manifest is shared with readers; commit a copy
+            manifest = {"seq": committed_manifest["seq"], "segments": dict(committed_manifest["segments"])}
+            for chunk in np.split(rows, splits):
+                name = _segment_name(chunk["ts"][0])
+                committed = manifest["segments"].get(name, 0)
+                segment = os.path.join(path, name)
+                with open(segment, "r+b" if os.path.exists(segment) else "wb") as f:
+                    # drop rows a crashed writer left past the last commit
+                    f.seek(committed * RECORD_DTYPE.itemsize)
+                    f.truncate()
+                    f.write(chunk.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                manifest["segments"][name] = committed + len(chunk)
+
+            # only a new hour can push old ones out of the window
+            expired = []
+            if manifest["segments"].keys() - committed_manifest["segments"].keys():
+                expired = self._expire(manifest["segments"])
+                for name in expired:
+                    del manifest["segments"][name]
+
+            # the rename is the commit point readers see
+            manifest["seq"] += 1
+            _write_manifest(path, manifest)
+            self._last_ts[camera_url] = int(rows["ts"][-1])
+            for name in expired:
+                try:
+                    os.remove(os.path.join(path, name))
+                except FileNotFoundError:
+                    pass
+
+            # still under the lock, so listeners see each camera's rows in order
+            for listener in self._listeners:
+                listener(camera_url, rows)
+        return len(rows)
+
+    def tail(self, camera_url, n):
+        """Last ``n`` rows for a camera, oldest first."""
+        parts = []
+        remaining = n
+        for segment, count in reversed(self._committed(camera_url)[1]):
+            if remaining <= 0:
+                break
+            take = min(count, remaining)
+            if take:
+                parts.append(_read_rows(segment, count - take, take))
+                remaining -= take
+
+        if not parts:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.concatenate(parts[::-1])
+
+    def range(self, camera_url, start_ns, end_ns):
+        """Rows with ``start_ns <= ts < end_ns``, reading only the overlapping segments."""
+        # compare the hour part only, so older-format segments match too
+        first = _segment_name(start_ns)[:HOUR_CHARS]
+        last = _segment_name(max(start_ns, end_ns - 1))[:HOUR_CHARS]
+        parts = []
+        for segment, count in self._committed(camera_url)[1]:
+            name = os.path.basename(segment)
+            if first <= name[:HOUR_CHARS] <= last:
+                rows = _read_rows(segment, 0, count)
+                parts.append(rows[(rows["ts"] >= start_ns) & (rows["ts"] < end_ns)])
+
+        if not parts:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.concatenate(parts)
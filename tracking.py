@@ -0,0 +1,234 @@
+"""Unique-vehicle tracking and per-direction flow for one camera run.
+
+Per-frame detections count the same car once for every frame it stays in
+view, so ``cars`` says how busy the frame looks, not how many vehicles
+went by.  ``IoUTracker`` links detections across frames ByteTrack-style.
+Confident detections are matched first to the tracks' constant-velocity
+predictions by greedy IoU.  Weak detections then get a second chance
+against whatever tracks are left, which keeps tracks alive through
+partial occlusion without letting noise start new ones.  At 5 fps a car
+can move more than its own length between kept frames, before a track
+has a velocity to predict with.  So tracks still unmatched are finally
+paired with nearby confident detections by centre distance.  Tracks become
+confirmed after ``min_hits`` matches and are dropped after ``max_age``
+seconds unseen.  Only confirmed tracks are counted as flow, but every
+tracked vehicle in the ROI counts towards the frame's ``cars``.  At most ``max_tracks`` are kept, so track state stays
+bounded however long a run is.
+
+``CameraROI`` holds a camera's region of interest and its counting line,
+both in normalized 0..1 image coordinates.  ``FlowCounter`` counts each
+confirmed track once when its bottom-centre crosses the line inside the
+ROI, and reports vehicles per minute each way.  Per-camera ROIs are set
+next to ``CAMERA_STREAM_GROUPS`` in ``app.py``.
+"""
+
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+
+DETECT_TRACKING = os.environ.get("DETECT_TRACKING", "1") == "1"
+TRACK_HIGH_CONF = float(os.environ.get("TRACK_HIGH_CONF", "0.35"))
+TRACK_LOW_CONF = float(os.environ.get("TRACK_LOW_CONF", "0.15"))
+TRACK_MATCH_IOU = float(os.environ.get("TRACK_MATCH_IOU", "0.2"))
+TRACK_MIN_HITS = int(os.environ.get("TRACK_MIN_HITS", "2"))
+TRACK_MAX_AGE = float(os.environ.get("TRACK_MAX_AGE", "1.5"))
+# centre jump (in box sizes) a track may make when IoU finds nothing
+TRACK_MAX_JUMP = float(os.environ.get("TRACK_MAX_JUMP", "2.0"))
+TRACK_MAX_TRACKS = int(os.environ.get("TRACK_MAX_TRACKS", "256"))
+# flows are NaN until the run has watched this long
+FLOW_MIN_SECONDS = float(os.environ.get("FLOW_MIN_SECONDS", "2"))
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU of ``(n, 4)`` and ``(m, 4)`` xyxy boxes."""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def jump_scores(a, b, max_jump):
+    """``1 - centre distance / (max_jump × box size of a)``; positive means close enough."""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)))
+    ca = (a[:, :2] + a[:, 2:]) / 2
+    cb = (b[:, :2] + b[:, 2:]) / 2
+    size = np.maximum(a[:, 2] - a[:, 0], a[:, 3] - a[:, 1])
+    dist = np.hypot(*(ca[:, None, :] - cb[None, :, :]).transpose(2, 0, 1))
+    return 1 - dist / np.maximum(max_jump * size[:, None], 1e-9)
+
+
+def greedy_match(iou, threshold):
+    """``[(row, col)]`` pairs, best IoU first, each row and column used once."""
+    pairs = []
+    if not iou.size:
+        return pairs
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_r, used_c = set(), set()
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if r not in used_r and c not in used_c:
+            used_r.add(r)
+            used_c.add(c)
+            pairs.append((r, c))
+    return pairs
+
+
+@dataclass
+class Track:
+    id: int
+    box: np.ndarray
+    cls: int
+    seen: float
+    velocity: np.ndarray = field(default_factory=lambda: np.zeros(4))
+    hits: int = 1
+    counted: bool = False
+    # bottom-centre at the previous update, for line crossings
+    previous: tuple = None
+
+    def predict(self, t):
+        return self.box + self.velocity * (t - self.seen)
+
+    @property
+    def anchor(self):
+        return ((self.box[0] + self.box[2]) / 2, self.box[3])
+
+
+class IoUTracker:
+
+    def __init__(self, high_conf=TRACK_HIGH_CONF, low_conf=TRACK_LOW_CONF, match_iou=TRACK_MATCH_IOU,
+                 min_hits=TRACK_MIN_HITS, max_age=TRACK_MAX_AGE, max_tracks=TRACK_MAX_TRACKS,
+                 max_jump=TRACK_MAX_JUMP):
+        self.high_conf = high_conf
+        self.low_conf = low_conf
+        self.match_iou = match_iou
+        self.min_hits = min_hits
+        self.max_age = max_age
+        self.max_tracks = max_tracks
+        self.max_jump = max_jump
+        self.tracks = []
+        self._next_id = 0
+
+    def update(self, detections, t):
+        """Fold one frame's ``(n, 6)`` ``x1 y1 x2 y2 conf cls`` detections in; returns the tracks seen now."""
+        detections = np.asarray(detections, dtype=float).reshape(-1, 6)
+        self.tracks = [tr for tr in self.tracks if t - tr.seen <= self.max_age]
+        predicted = np.array([tr.predict(t) for tr in self.tracks]).reshape(-1, 4)
+
+        high = np.flatnonzero(detections[:, 4] >= self.high_conf)
+        low = np.flatnonzero((detections[:, 4] >= self.low_conf) & (detections[:, 4] < self.high_conf))
+        matched = {}
+        # first pass: confident detections against every track
+        for r, c in greedy_match(iou_matrix(predicted, detections[high, :4]), self.match_iou):
+            matched[r] = high[c]
+        # second pass: weak detections only keep existing tracks alive
+        left = [r for r in range(len(self.tracks)) if r not in matched]
+        for r, c in greedy_match(iou_matrix(predicted[left], detections[low, :4]), self.match_iou):
+            matched[left[r]] = low[c]
+        # last pass: no overlap at all, but a confident detection close by
+        left = [r for r in range(len(self.tracks)) if r not in matched]
+        free = np.array([d for d in high if d not in set(matched.values())], dtype=int)
+        for r, c in greedy_match(jump_scores(predicted[left], detections[free, :4], self.max_jump), 1e-9):
+            matched[left[r]] = free[c]
+
+        for r, d in matched.items():
+            tr = self.tracks[r]
+            box = detections[d, :4]
+            dt = t - tr.seen
+            if dt > 0:
+                tr.velocity = 0.5 * tr.velocity + 0.5 * (box - tr.box) / dt
+            tr.previous = tr.anchor
+            tr.box, tr.seen, tr.hits = box, t, tr.hits + 1
+            tr.cls = int(detections[d, 5])
+
+        used = set(matched.values())
+        for d in high:
+            if d not in used:
+                self.tracks.append(Track(self._next_id, detections[d, :4], int(detections[d, 5]), t))
+                self._next_id += 1
+
+        if len(self.tracks) > self.max_tracks:
+            # bounded state: keep the most recently seen tracks
+            self.tracks = sorted(self.tracks, key=lambda tr: tr.seen)[-self.max_tracks:]
+
+        return [tr for tr in self.tracks if tr.seen == t]
+
+
+def _inside(points, polygon):
+    """Even-odd test of ``(n, 2)`` points against a polygon."""
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1]):
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            at = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < at)
+    return inside
+
+
+@dataclass(frozen=True)
+class CameraROI:
+    # polygon and line in normalized (x, y) image coordinates, y pointing down
+    polygon: tuple = ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0))
+    line: tuple = ((0.0, 0.5), (1.0, 0.5))
+    # what "in" and "out" mean on this camera, for display; with the default
+    # left-to-right line, "in" is moving down the image (usually toward the camera)
+    directions: tuple = ("toward camera", "away from camera")
+
+    def inside(self, points):
+        return _inside(np.asarray(points, dtype=float).reshape(-1, 2), list(self.polygon))
+
+    def side(self, point):
+        """Sign of ``point`` relative to the counting line (+ is the "in" side)."""
+        (x1, y1), (x2, y2) = self.line
+        return np.sign((x2 - x1) * (point[1] - y1) - (y2 - y1) * (point[0] - x1))
+
+
+DEFAULT_ROI = CameraROI()
+
+
+class FlowCounter:
+    """Tracker + ROI for one run: per-frame counts of tracked vehicles, flows each way."""
+
+    def __init__(self, roi=None, classes=None, tracker=None):
+        # classes: {class id: record column}
+        self.roi = roi or DEFAULT_ROI
+        self.classes = classes or {}
+        self.tracker = tracker or IoUTracker()
+        self.crossed = {"in": 0, "out": 0}
+        self.first = None
+
+    def update(self, detections, t):
+        """Counts of tracked vehicles in the ROI, plus ``flow_in`` / ``flow_out`` so far.
+
+        ``detections`` are ``x1 y1 x2 y2 conf cls`` rows in normalized coordinates.
+        """
+        self.first = t if self.first is None else self.first
+        tracks = self.tracker.update(detections, t)
+        anchors = np.array([tr.anchor for tr in tracks]).reshape(-1, 2)
+        inside = self.roi.inside(anchors)
+
+        counts = {col: 0 for col in self.classes.values()}
+        for tr, ok in zip(tracks, inside.tolist()):
+            if not ok:
+                continue
+            col = self.classes.get(tr.cls)
+            if col is not None:
+                counts[col] += 1
+            if not tr.counted and tr.previous is not None and tr.hits >= self.tracker.min_hits:
+                before, after = self.roi.side(tr.previous), self.roi.side(tr.anchor)
+                if before and after and before != after:
+                    self.crossed["in" if after > 0 else "out"] += 1
+                    tr.counted = True
+
+        minutes = (t - self.first) / 60
+        for direction, crossed in self.crossed.items():
+            counts[f"flow_{direction}"] = crossed / minutes if minutes * 60 >= FLOW_MIN_SECONDS else float("nan")
+        return counts